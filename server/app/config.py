@@ -19,16 +19,54 @@ class Settings(BaseSettings):
     # Anthropic
     anthropic_api_key: str
 
+    # Chat sessions
+    chat_session_idle_ttl_seconds: int = 1800  # Idle clients are disconnected; rejoining resumes via sdk_session_id
+    chat_max_sessions: int = 100  # Live ClaudeSDKClients per worker; least recently used idle ones are evicted
+    chat_session_reap_interval_seconds: int = 60
+
     # OpenAI
     openai_api_key: str
     openai_embedding_model: str = "text-embedding-3-small"
+    openai_embedding_batch_max_items: int = 256  # API hard limit is 2048 inputs per request
+    openai_embedding_batch_max_tokens: int = 100_000  # API hard limit is 300k tokens per request
+    openai_max_retries: int = 5  # Retries with exponential backoff on 429, 5xx and connection errors
+
+    # RAG ingestion
+    rag_ingestion_workers: int = 4  # Threads per embed/store stage (documents in flight per stage)
+    rag_ingestion_page_size: int = 50  # Stale documents fetched per page
+    rag_poll_interval_seconds: int = 600  # Safety net; agent edits and editor saves (POST /{id}/changed) are indexed via the queue
+    rag_indexing_debounce_seconds: float = 2.0
+    rag_indexing_max_delay_seconds: float = 10.0
+    rag_ingestion_lease_ttl_seconds: int = 300  # Cross-worker lease for full runs
+    rag_chunk_target_tokens: int = 400  # Small adjacent nodes are merged up to this size
+    rag_chunk_max_tokens: int = 1000  # Larger nodes are split at sentence boundaries
+    rag_chunk_overlap_tokens: int = 0
+    rag_parse_processes: int = 0  # >0 parses full runs in a process pool of this size
+    rag_pipeline_queue_size: int = 16  # Bounded queue between ingestion stages (backpressure)
+
+    # Search
+    rag_ann_index: Literal["full", "halfvec"] = "full"  # halfvec is experimental: recall unmeasured, index not built (see migration 20251223000007)
+    search_rerank_overfetch: int = 5  # Candidates fetched per result when re-ranking
+    search_rerank_budget_ms: int = 50  # Re-rank stage budget; first-stage order is used past it
+    search_rerank_lexical_weight: float = 0.3  # BM25 weight relative to first-stage similarity
+    rag_ann_rerank_factor: int = 4  # halfvec candidates fetched per result, re-ranked at full precision (clamped to 1..20)
+    search_io_threads: int = 16  # Bounded pool for blocking OpenAI/Supabase calls in search
+    query_embedding_cache_max_bytes: int = 64 * 1024 * 1024  # ~10k 1536-dim query vectors
+    query_embedding_cache_ttl_seconds: int = 3600
+    query_embedding_cache_shared: bool = False  # Also share query vectors via the embedding_cache table
+    search_result_cache_size: int = 10_000  # Cached search responses; 0 disables the result cache
+    search_result_cache_ttl_seconds: int = 600  # Bounds memory held by cold entries; staleness is handled by corpus versions
+    search_corpus_version_ttl_ms: int = 1000  # How long a read corpus version is reused; bounds staleness after a re-index (0 reads it on every search)
 
     # Supabase
     supabase_url: str
     supabase_anon_key: str
     supabase_service_role_key: str
     database_url: str | None = None
-    supabase_jwt_secret: str | None = None  # For auth middleware
+    supabase_jwt_secret: str | None = None  # HS256 secret; asymmetric keys are fetched via JWKS
+    auth_jwks_cache_seconds: int = 600  # How long fetched JWT signing keys are trusted
+    auth_claims_cache_size: int = 10_000  # Verified tokens whose claims are cached until exp
+    supabase_http_max_connections: int = 100  # Pooled connections shared by user-scoped clients
 
     @field_validator('anthropic_api_key')
     @classmethod
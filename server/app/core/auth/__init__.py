@@ -1,3 +1,4 @@
 from .dependencies import get_current_user, validate_websocket_token
+from .verifier import InvalidTokenError, get_token_verifier
 
-__all__ = ['get_current_user', 'validate_websocket_token']
+__all__ = ['get_current_user', 'validate_websocket_token', 'InvalidTokenError', 'get_token_verifier']
@@ -1,33 +1,15 @@
 """Auth dependencies for FastAPI routes"""
-from fastapi import Request, HTTPException, Depends
+from fastapi import HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
 import logging
-from supabase import create_client, Client
 
-from app.config import settings
+from app.core.auth.verifier import InvalidTokenError, get_token_verifier
 
 logger = logging.getLogger(__name__)
 
 # HTTP Bearer security scheme
 security = HTTPBearer()
 
-# Singleton Supabase client for auth validation
-_supabase_client: Optional[Client] = None
-
-
-def get_supabase_client() -> Client:
-    """Get or create Supabase client for auth validation"""
-    global _supabase_client
-
-    if _supabase_client is None:
-        _supabase_client = create_client(
-            settings.supabase_url,
-            settings.supabase_service_role_key
-        )
-
-    return _supabase_client
-
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -43,29 +25,20 @@ async def get_current_user(
     Raises:
         HTTPException: If user is not authenticated or token is invalid
     """
-    token = credentials.credentials
-
     try:
-        # Validate token with Supabase
-        supabase = get_supabase_client()
-        user_response = supabase.auth.get_user(token)
-
-        if not user_response or not user_response.user:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-        user_id = user_response.user.id
+        # Verified locally; claims are cached until the token expires
+        claims = await get_token_verifier().verify_async(credentials.credentials)
+        user_id = claims["sub"]
         logger.debug(f"Authenticated user: {user_id}")
 
         return user_id
 
-    except HTTPException:
-        raise
-    except Exception as e:
+    except (InvalidTokenError, KeyError) as e:
         logger.error(f"Token validation failed: {e}")
-        raise HTTPException(status_code=401, detail="Authentication failed")
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
 
 
-def validate_websocket_token(token: str) -> str:
+async def validate_websocket_token(token: str) -> str:
     """
     Validate JWT token and return user_id.
 
@@ -82,20 +55,13 @@ def validate_websocket_token(token: str) -> str:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
     try:
-        # Validate token with Supabase
-        supabase = get_supabase_client()
-        user_response = supabase.auth.get_user(token)
-
-        if not user_response or not user_response.user:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-        user_id = user_response.user.id
+        # Verified locally; claims are cached until the token expires
+        claims = await get_token_verifier().verify_async(token)
+        user_id = claims["sub"]
         logger.debug(f"Authenticated WebSocket user: {user_id}")
 
         return user_id
 
-    except HTTPException:
-        raise
-    except Exception as e:
+    except (InvalidTokenError, KeyError) as e:
         logger.error(f"WebSocket token validation failed: {e}")
-        raise HTTPException(status_code=401, detail="Authentication failed")
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
@@ -0,0 +1,223 @@
+"""
+Local Supabase JWT verification.
+Tokens are verified in-process, either with the project's HS256 secret or with
+the auth server's public signing keys (JWKS), and verified claims are cached
+until the token expires, so connects and reconnect storms don't each cost a
+round trip to the auth service.
+"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import httpx
+from jose import jwt, JWTError
+from supabase import Client, create_client
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+AUDIENCE = "authenticated"
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+# Minimum gap between JWKS refetches triggered by an unknown key ID
+JWKS_REFRESH_COOLDOWN_SECONDS = 30
+
+
+class InvalidTokenError(Exception):
+    """Raised when a token can't be verified"""
+
+
+class TokenVerifier:
+    """Verifies Supabase access tokens and caches their claims until exp"""
+
+    def __init__(
+        self,
+        supabase_url: str,
+        jwt_secret: str | None = None,
+        jwks_cache_seconds: int = 600,
+        claims_cache_size: int = 10_000
+    ):
+        """
+        Initialize verifier.
+
+        Args:
+            supabase_url: Project URL; JWKS and the fallback auth API live under it
+            jwt_secret: Legacy HS256 signing secret, if the project uses one
+            jwks_cache_seconds: How long fetched signing keys are trusted
+            claims_cache_size: Maximum number of tokens whose claims are cached
+        """
+        self.supabase_url = supabase_url.rstrip("/")
+        self.jwt_secret = jwt_secret
+        self.jwks_url = f"{self.supabase_url}/auth/v1/.well-known/jwks.json"
+        self.jwks_cache_seconds = jwks_cache_seconds
+        self.claims_cache_size = claims_cache_size
+
+        self._claims: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._claims_lock = threading.Lock()
+        self._jwks: dict[str, dict[str, Any]] = {}  # kid -> JWK
+        self._jwks_fetched_at = 0.0
+        self._jwks_lock = threading.Lock()
+        self._auth_client: Client | None = None
+        self._auth_client_lock = threading.Lock()  # verify_async runs verify on worker threads
+
+    def verify(self, token: str) -> dict[str, Any]:
+        """
+        Verify a token and return its claims.
+
+        Args:
+            token: Supabase access token (JWT)
+
+        Returns:
+            Verified claims
+
+        Raises:
+            InvalidTokenError: If the token is malformed, expired or not validly signed
+        """
+        if not token:
+            raise InvalidTokenError("Missing token")
+
+        cache_key = self._cache_key(token)
+        claims = self._get_cached(cache_key)
+        if claims is not None:
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as e:
+            raise InvalidTokenError(f"Malformed token: {e}") from e
+
+        algorithm = header.get("alg")
+        if algorithm in ASYMMETRIC_ALGORITHMS:
+            claims = self._verify_with_jwks(token, algorithm, header.get("kid"))
+        elif algorithm == "HS256" and self.jwt_secret:
+            claims = self._decode(token, self.jwt_secret, algorithm)
+        else:
+            # No local key for this token (e.g. HS256 without the secret configured)
+            claims = self._verify_remote(token)
+
+        self._put_cached(cache_key, claims)
+        return claims
+
+    async def verify_async(self, token: str) -> dict[str, Any]:
+        """
+        Verify a token from async code without blocking the event loop.
+
+        Cached claims are returned inline; anything else (which may fetch the
+        JWKS or ask the auth server) runs in a worker thread.
+
+        Args:
+            token: Supabase access token (JWT)
+
+        Returns:
+            Verified claims
+
+        Raises:
+            InvalidTokenError: If the token is malformed, expired or not validly signed
+        """
+        if token:
+            claims = self._get_cached(self._cache_key(token))
+            if claims is not None:
+                return claims
+        return await asyncio.to_thread(self.verify, token)
+
+    @staticmethod
+    def _cache_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _get_cached(self, cache_key: str) -> dict[str, Any] | None:
+        with self._claims_lock:
+            claims = self._claims.get(cache_key)
+            if claims is None:
+                return None
+            if claims.get("exp", 0) <= time.time():
+                del self._claims[cache_key]
+                return None
+            self._claims.move_to_end(cache_key)
+            return claims
+
+    def _put_cached(self, cache_key: str, claims: dict[str, Any]) -> None:
+        if "exp" not in claims:
+            return  # Only cache tokens that expire
+        with self._claims_lock:
+            self._claims[cache_key] = claims
+            self._claims.move_to_end(cache_key)
+            while len(self._claims) > self.claims_cache_size:
+                self._claims.popitem(last=False)
+
+    @staticmethod
+    def _decode(token: str, key: Any, algorithm: str) -> dict[str, Any]:
+        try:
+            return jwt.decode(token, key, algorithms=[algorithm], audience=AUDIENCE)
+        except JWTError as e:
+            raise InvalidTokenError(str(e)) from e
+
+    def _verify_with_jwks(self, token: str, algorithm: str, kid: str | None) -> dict[str, Any]:
+        key = self._get_signing_key(kid)
+        if key is None:
+            raise InvalidTokenError(f"Unknown signing key: {kid}")
+        return self._decode(token, key, algorithm)
+
+    def _get_signing_key(self, kid: str | None) -> dict[str, Any] | None:
+        """Look up a signing key, refetching the JWKS when stale or when the key is new"""
+        with self._jwks_lock:
+            age = time.monotonic() - self._jwks_fetched_at
+            stale = not self._jwks or age > self.jwks_cache_seconds
+            # Keys rotate: an unknown kid triggers a refetch, at most every cooldown
+            unknown = kid not in self._jwks and age > JWKS_REFRESH_COOLDOWN_SECONDS
+            if stale or unknown:
+                self._fetch_jwks()
+
+            if kid is None and len(self._jwks) == 1:
+                return next(iter(self._jwks.values()))
+            return self._jwks.get(kid)
+
+    def _fetch_jwks(self) -> None:
+        """Fetch the auth server's public signing keys (caller holds _jwks_lock)"""
+        try:
+            response = httpx.get(self.jwks_url, timeout=10)
+            response.raise_for_status()
+            self._jwks = {key.get("kid"): key for key in response.json().get("keys", [])}
+            logger.info(f"Fetched {len(self._jwks)} JWT signing keys")
+        except Exception as e:
+            # Keep serving with the keys we already have
+            logger.error(f"Failed to fetch JWKS from {self.jwks_url}: {e}")
+        self._jwks_fetched_at = time.monotonic()
+
+    def _verify_remote(self, token: str) -> dict[str, Any]:
+        """Fall back to asking the auth server when no local key can verify the token"""
+        with self._auth_client_lock:
+            if self._auth_client is None:
+                self._auth_client = create_client(self.supabase_url, settings.supabase_service_role_key)
+            auth_client = self._auth_client
+
+        try:
+            user_response = auth_client.auth.get_user(token)
+        except Exception as e:
+            raise InvalidTokenError(str(e)) from e
+
+        if not user_response or not user_response.user:
+            raise InvalidTokenError("Invalid or expired token")
+
+        # The auth server vouched for the token, so its claims can be trusted
+        return jwt.get_unverified_claims(token)
+
+
+# Singleton instance
+_verifier: TokenVerifier | None = None
+
+
+def get_token_verifier() -> TokenVerifier:
+    """Get or create the token verifier instance"""
+    global _verifier
+    if _verifier is None:
+        _verifier = TokenVerifier(
+            settings.supabase_url,
+            jwt_secret=settings.supabase_jwt_secret,
+            jwks_cache_seconds=settings.auth_jwks_cache_seconds,
+            claims_cache_size=settings.auth_claims_cache_size
+        )
+    return _verifier
@@ -1,8 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from supabase import Client, create_client
+from postgrest import SyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS, DEFAULT_POSTGREST_CLIENT_TIMEOUT
 from app.config import settings
+from app.core.auth.verifier import InvalidTokenError, get_token_verifier
+import httpx
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,20 +26,10 @@ async def verify_supabase_token(
             detail="Missing authorization header"
         )
 
-    if not settings.supabase_jwt_secret:
-        logger.warning("SUPABASE_JWT_SECRET not set - skipping auth")
-        return {}  # Skip auth in development
-
     try:
-        # Verify and decode JWT
-        payload = jwt.decode(
-            credentials.credentials,
-            settings.supabase_jwt_secret,
-            algorithms=["HS256"],
-            audience="authenticated"
-        )
-        return payload
-    except JWTError as e:
+        # Verified locally (HS256 secret or JWKS); claims are cached until exp
+        return await get_token_verifier().verify_async(credentials.credentials)
+    except InvalidTokenError as e:
         logger.error(f"JWT verification failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -45,11 +37,66 @@ async def verify_supabase_token(
         )
 
 
+# One pooled HTTP transport shared by every user-scoped PostgREST client, so
+# requests reuse warm connections instead of building a client per request
+_user_http_client: httpx.Client | None = None
+
+
+def get_user_http_client() -> httpx.Client:
+    """Get or create the HTTP transport shared by user-scoped clients"""
+    global _user_http_client
+    if _user_http_client is None:
+        _user_http_client = httpx.Client(
+            timeout=DEFAULT_POSTGREST_CLIENT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.supabase_http_max_connections,
+                max_keepalive_connections=settings.supabase_http_max_connections
+            ),
+            follow_redirects=True,
+            http2=True
+        )
+    return _user_http_client
+
+
+def close_user_http_client() -> None:
+    """Close the shared transport (called on application shutdown)"""
+    global _user_http_client
+    if _user_http_client is not None:
+        _user_http_client.close()
+        _user_http_client = None
+
+
+def create_user_postgrest_client(access_token: str) -> SyncPostgrestClient:
+    """
+    Create a PostgREST client that acts as the given user.
+
+    The client is a thin per-request wrapper: the caller's JWT lives only in its
+    headers, which are sent with every request it makes, while connections come
+    from the shared transport. PostgREST verifies the JWT and applies RLS for
+    that user, exactly as with a full Supabase client.
+
+    Args:
+        access_token: The user's Supabase JWT
+
+    Returns:
+        User-scoped PostgREST client
+    """
+    return SyncPostgrestClient(
+        f"{settings.supabase_url}/rest/v1",
+        headers={
+            **DEFAULT_POSTGREST_CLIENT_HEADERS,
+            "apikey": settings.supabase_anon_key,
+            "Authorization": f"Bearer {access_token}"
+        },
+        http_client=get_user_http_client()
+    )
+
+
 async def get_user_supabase_client(
     credentials: HTTPAuthorizationCredentials | None = Depends(security)
-) -> Client:
+) -> SyncPostgrestClient:
     """
-    Create a user-scoped Supabase client using the JWT token from Authorization header.
+    Get a user-scoped database client using the JWT token from Authorization header.
     This client will respect RLS policies based on the authenticated user.
 
     Usage: Add to route as dependency when you need RLS-aware database access
@@ -60,16 +107,7 @@ async def get_user_supabase_client(
             detail="Missing authorization header"
         )
 
-    # Create client with user's JWT token (uses anon key + user JWT for RLS)
-    client: Client = create_client(
-        settings.supabase_url,
-        settings.supabase_anon_key
-    )
-
-    # Set the user's JWT token for RLS enforcement
-    client.auth.set_session(credentials.credentials, credentials.credentials)
-
-    return client
+    return create_user_postgrest_client(credentials.credentials)
 
 
 # Optional dependency - use when auth is required
@@ -0,0 +1,134 @@
+"""
+Persistent embedding cache for RAG ingestion.
+Stores vectors keyed by a hash of the exact embedded text and model so unchanged
+chunks are never sent to OpenAI twice.
+"""
+import hashlib
+import json
+import logging
+import threading
+from typing import Any
+from postgrest import ReturnMethod
+from supabase import Client
+
+logger = logging.getLogger(__name__)
+
+# Keeps `in.(...)` filters well under URL length limits
+LOOKUP_PAGE_SIZE = 100
+
+
+def hash_embedding_text(text: str, model: str) -> str:
+    """
+    Hash embedding text together with the model that embeds it.
+
+    Args:
+        text: Exact text sent to the embedding API
+        model: Embedding model name
+
+    Returns:
+        Hex sha256 digest used as the cache key
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+def parse_vector(value: Any) -> list[float]:
+    """Parse a pgvector value, which PostgREST returns as a '[...]' string"""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+class EmbeddingCache:
+    """Embedding cache backed by the embedding_cache table"""
+
+    def __init__(self, supabase: Client, model: str):
+        """
+        Initialize cache.
+
+        Args:
+            supabase: Service role Supabase client
+            model: Embedding model whose vectors are cached
+        """
+        self.supabase = supabase
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def hash_text(self, text: str) -> str:
+        """Cache key for text embedded with this cache's model"""
+        return hash_embedding_text(text, self.model)
+
+    def get_many(self, hashes: list[str]) -> dict[str, list[float]]:
+        """
+        Look up cached embeddings.
+
+        Cache failures are logged and treated as misses so ingestion keeps working.
+
+        Args:
+            hashes: Cache keys to look up
+
+        Returns:
+            Mapping of cache key to embedding for every key that was found
+        """
+        found: dict[str, list[float]] = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+
+        try:
+            for start in range(0, len(unique_hashes), LOOKUP_PAGE_SIZE):
+                page = unique_hashes[start:start + LOOKUP_PAGE_SIZE]
+                response = self.supabase.table("embedding_cache") \
+                    .select("content_hash, embedding") \
+                    .in_("content_hash", page) \
+                    .execute()
+
+                for row in response.data:
+                    found[row["content_hash"]] = parse_vector(row["embedding"])
+
+        except Exception as e:
+            logger.warning(f"Embedding cache lookup failed, treating as miss: {e}")
+
+        hits = sum(1 for h in hashes if h in found)
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += len(hashes) - hits
+
+        return found
+
+    def put_many(self, entries: dict[str, list[float]]) -> None:
+        """
+        Store embeddings in the cache.
+
+        Args:
+            entries: Mapping of cache key to embedding
+        """
+        if not entries:
+            return
+
+        try:
+            records = [
+                {"content_hash": content_hash, "model": self.model, "embedding": embedding}
+                for content_hash, embedding in entries.items()
+            ]
+            self.supabase.table("embedding_cache") \
+                .upsert(
+                    records,
+                    on_conflict="content_hash",
+                    ignore_duplicates=True,
+                    returning=ReturnMethod.minimal
+                ) \
+                .execute()
+
+        except Exception as e:
+            logger.warning(f"Failed to write {len(entries)} embeddings to cache: {e}")
+
+    def snapshot_stats(self) -> tuple[int, int]:
+        """
+        Current (hits, misses) counters.
+
+        Runs report the difference between two snapshots rather than resetting
+        the counters, so overlapping full and targeted runs don't zero each
+        other's stats (each run's numbers include lookups made by the other).
+        """
+        with self._stats_lock:
+            return self.hits, self.misses
@@ -0,0 +1,134 @@
+"""
+Event-driven RAG indexing queue.
+Document IDs are pushed here as soon as they change and indexed after a short
+debounce, so edits become searchable within seconds instead of waiting for the
+next polling cycle.
+"""
+import asyncio
+import logging
+import time
+
+from app.config import settings
+from app.core.ingestion_coordinator import get_coordinator
+
+logger = logging.getLogger(__name__)
+
+
+class IndexingQueue:
+    """Debounced in-process queue of documents waiting to be indexed"""
+
+    def __init__(self, debounce_seconds: float = 2.0, max_delay_seconds: float = 10.0):
+        """
+        Initialize queue.
+
+        Args:
+            debounce_seconds: Quiet period after the last change before indexing starts
+            max_delay_seconds: Upper bound on how long a change can wait under continuous edits
+        """
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._pending: dict[str, float] = {}  # document_id -> time first queued
+        self._last_notified = 0.0
+        self._wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.running = False
+
+    def notify(self, document_id: str) -> None:
+        """
+        Queue a document for indexing. Repeated notifications are coalesced.
+
+        Args:
+            document_id: UUID of the document that changed
+        """
+        now = time.monotonic()
+        self._pending.setdefault(document_id, now)
+        self._last_notified = now
+        self._wakeup.set()
+        logger.debug(f"Queued document {document_id} for indexing ({len(self._pending)} pending)")
+
+    async def _wait_for_quiet(self) -> None:
+        """Sleep until edits pause for debounce_seconds or the oldest change hits max_delay_seconds"""
+        while self._pending:
+            now = time.monotonic()
+            quiet_at = self._last_notified + self.debounce_seconds
+            deadline = min(self._pending.values()) + self.max_delay_seconds
+            wake_at = min(quiet_at, deadline)
+            if now >= wake_at:
+                return
+            await asyncio.sleep(wake_at - now)
+
+    async def _index(self, document_ids: list[str]) -> None:
+        """Index a batch of documents once the previous targeted run has finished"""
+        try:
+            stats = await get_coordinator().run_documents(document_ids)
+            logger.info(
+                f"Event-driven indexing completed: "
+                f"{stats['processed']} processed, {stats['failed']} failed, {stats['skipped']} skipped"
+            )
+
+        except Exception as e:
+            logger.error(f"Error in event-driven indexing: {e}", exc_info=True)
+
+    async def _worker_loop(self) -> None:
+        """Main worker loop"""
+        logger.info(f"Indexing queue started (debounce: {self.debounce_seconds}s)")
+
+        while self.running:
+            try:
+                await self._wakeup.wait()
+                await self._wait_for_quiet()
+
+                document_ids = list(self._pending)
+                self._pending.clear()
+                self._wakeup.clear()
+
+                if document_ids:
+                    await self._index(document_ids)
+
+            except asyncio.CancelledError:
+                logger.info("Indexing queue cancelled")
+                break
+            except Exception as e:
+                logger.error(f"Error in indexing queue loop: {e}", exc_info=True)
+
+    def start(self) -> None:
+        """Start the queue worker"""
+        if self.running:
+            logger.warning("Indexing queue already running")
+            return
+
+        self.running = True
+        self.task = asyncio.create_task(self._worker_loop())
+        logger.info("Indexing queue task created")
+
+    async def stop(self) -> None:
+        """Stop the queue worker gracefully"""
+        if not self.running:
+            return
+
+        logger.info("Stopping indexing queue")
+        self.running = False
+
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+        logger.info("Indexing queue stopped")
+
+
+# Singleton instance
+_indexing_queue: IndexingQueue | None = None
+
+
+def get_indexing_queue() -> IndexingQueue:
+    """Get or create the indexing queue instance"""
+    global _indexing_queue
+    if _indexing_queue is None:
+        _indexing_queue = IndexingQueue(
+            debounce_seconds=settings.rag_indexing_debounce_seconds,
+            max_delay_seconds=settings.rag_indexing_max_delay_seconds
+        )
+    return _indexing_queue
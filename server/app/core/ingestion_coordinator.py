@@ -0,0 +1,158 @@
+"""
+Single-flight coordination for RAG ingestion runs.
+Scheduled, manual and event-driven triggers all go through one coordinator so
+two pipelines never process the same documents at the same time.
+"""
+import asyncio
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from app.config import settings
+from app.core.rag_ingestion import get_pipeline
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "rag_ingestion"
+
+
+class IngestionCoordinator:
+    """
+    Coordinates ingestion runs within and across server processes.
+
+    - Within a process, concurrent full-run triggers attach to the in-flight run
+      and receive its result.
+    - Targeted runs are serialized with each other but not with full runs, so
+      an edit is never stuck behind a corpus sweep; a document both sync at
+      once is handled by sync_document_chunks rejecting the stale plan.
+    - Across processes, full runs require a database lease, so several uvicorn
+      workers don't each run their own scheduled scan.
+    """
+
+    def __init__(self, lease_ttl_seconds: int = 300):
+        """
+        Initialize coordinator.
+
+        Args:
+            lease_ttl_seconds: Lease lifetime; renewed while a run is in progress
+        """
+        self.lease_ttl_seconds = lease_ttl_seconds
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._inflight: asyncio.Task | None = None
+        self._run_lock = asyncio.Lock()
+        self._targeted_lock = asyncio.Lock()
+
+    def _acquire_lease(self) -> bool:
+        """Acquire or renew the cross-process ingestion lease"""
+        try:
+            response = get_pipeline().supabase.rpc(
+                "try_acquire_ingestion_lease",
+                {
+                    "p_name": LEASE_NAME,
+                    "p_holder": self.holder_id,
+                    "p_ttl_seconds": self.lease_ttl_seconds
+                }
+            ).execute()
+            return bool(response.data)
+
+        except Exception as e:
+            logger.error(f"Failed to acquire ingestion lease: {e}")
+            return False
+
+    def _release_lease(self) -> None:
+        """Release the cross-process ingestion lease"""
+        try:
+            get_pipeline().supabase.rpc(
+                "release_ingestion_lease",
+                {"p_name": LEASE_NAME, "p_holder": self.holder_id}
+            ).execute()
+
+        except Exception as e:
+            # The lease expires on its own after lease_ttl_seconds
+            logger.warning(f"Failed to release ingestion lease: {e}")
+
+    async def _renew_lease_loop(self, stop: threading.Event) -> None:
+        """
+        Keep the lease alive while a run outlasts its TTL.
+
+        Once a renewal fails another worker may take the lease and start its own
+        run, so stop is set and the pipeline writes nothing further.
+
+        Args:
+            stop: Stop event of the run holding the lease
+        """
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.lease_ttl_seconds / 3)
+            if not await loop.run_in_executor(None, self._acquire_lease):
+                logger.error("Lost ingestion lease during run, stopping the run")
+                stop.set()
+                return
+
+    async def _run_full(self) -> dict[str, int] | None:
+        """Run the full pipeline under the run lock and the cross-process lease"""
+        async with self._run_lock:
+            loop = asyncio.get_event_loop()
+
+            if not await loop.run_in_executor(None, self._acquire_lease):
+                logger.info("Ingestion lease held by another worker, skipping run")
+                return None
+
+            stop = threading.Event()
+            renew_task = asyncio.create_task(self._renew_lease_loop(stop))
+            try:
+                pipeline = get_pipeline()
+                return await loop.run_in_executor(None, pipeline.run, stop)
+            finally:
+                renew_task.cancel()
+                await loop.run_in_executor(None, self._release_lease)
+
+    async def run(self) -> dict[str, int] | None:
+        """
+        Run full ingestion, or attach to the run already in flight.
+
+        Returns:
+            Statistics from the run, or None if another worker holds the lease
+        """
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._run_full())
+        else:
+            logger.info("Ingestion already in flight, attaching to current run")
+
+        # Shield so a cancelled caller doesn't cancel the run for everyone else
+        return await asyncio.shield(self._inflight)
+
+    async def run_documents(self, document_ids: list[str]) -> dict[str, int]:
+        """
+        Index specific documents once no other targeted run is in progress.
+
+        Targeted runs don't take the cross-process lease: they are triggered by
+        edits seen in this process. A full run in this or another worker may
+        sync the same document concurrently; sync_document_chunks rejects whichever plan
+        was diffed against rows the other sync already replaced, and that side
+        re-plans (see RAGIngestionPipeline.sync_chunks).
+
+        Args:
+            document_ids: UUIDs of the documents that changed
+
+        Returns:
+            Statistics from the run
+        """
+        async with self._targeted_lock:
+            loop = asyncio.get_event_loop()
+            pipeline = get_pipeline()
+            return await loop.run_in_executor(None, pipeline.run_documents, document_ids)
+
+
+# Singleton instance
+_coordinator: IngestionCoordinator | None = None
+
+
+def get_coordinator() -> IngestionCoordinator:
+    """Get or create the ingestion coordinator instance"""
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = IngestionCoordinator(settings.rag_ingestion_lease_ttl_seconds)
+    return _coordinator
@@ -0,0 +1,193 @@
+"""
+Minimal staged-pipeline runner used by RAG ingestion.
+Stages run on their own threads and are connected by bounded queues, so a slow
+stage applies backpressure upstream instead of letting work pile up in memory.
+Each stage reports its own throughput and queue depth.
+"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+@dataclass
+class StageMetrics:
+    """Counters for one pipeline stage"""
+    name: str
+    workers: int
+    items: int = 0
+    errors: int = 0
+    busy_seconds: float = 0.0  # Time spent doing work
+    starved_seconds: float = 0.0  # Time spent waiting for input
+    blocked_seconds: float = 0.0  # Time spent waiting for room in the next queue
+    max_queue_depth: int = 0  # Deepest this stage's input queue got
+    _queue_depth_total: int = 0
+    _queue_depth_samples: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, busy: float, starved: float, blocked: float, error: bool = False) -> None:
+        """Record one processed item"""
+        with self._lock:
+            self.items += 1
+            self.errors += int(error)
+            self.busy_seconds += busy
+            self.starved_seconds += starved
+            self.blocked_seconds += blocked
+
+    def sample_queue(self, depth: int) -> None:
+        """Record the depth of this stage's input queue"""
+        with self._lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self._queue_depth_total += depth
+            self._queue_depth_samples += 1
+
+    def as_dict(self, wall_seconds: float) -> dict[str, float]:
+        """Summarize the stage for logs and API responses"""
+        samples = self._queue_depth_samples or 1
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "errors": self.errors,
+            "items_per_second": round(self.items / wall_seconds, 2) if wall_seconds else 0.0,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "starved_seconds": round(self.starved_seconds, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "utilization": round(self.busy_seconds / (wall_seconds * self.workers), 3) if wall_seconds else 0.0,
+            "avg_queue_depth": round(self._queue_depth_total / samples, 2),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline stage.
+
+    fn receives an item from the previous stage and returns the item for the
+    next stage, or None to drop it. If fn raises, the item is dropped, counted
+    in the stage's errors and passed to on_error with the exception (logged
+    by the runner when there is no on_error).
+    """
+    name: str
+    fn: Callable[[Any], Any]
+    workers: int = 1
+    queue_size: int = 16
+    on_error: Callable[[Any, Exception], None] | None = None
+
+
+def run_stages(source_name: str, source: Iterable[Any], stages: list[Stage]) -> dict[str, dict[str, float]]:
+    """
+    Stream items from source through stages and wait for everything to drain.
+
+    Args:
+        source_name: Name reported for the source stage
+        source: Iterable producing the pipeline's input items (consumed on its own thread)
+        stages: Stages in order; stage N's output is stage N+1's input
+
+    Returns:
+        Per-stage metrics keyed by stage name, source first
+    """
+    queues: list[queue.Queue] = [queue.Queue(maxsize=max(1, stage.queue_size)) for stage in stages]
+    source_metrics = StageMetrics(source_name, workers=1)
+    worker_counts = [max(1, stage.workers) for stage in stages]
+    metrics = [StageMetrics(stage.name, workers=count) for stage, count in zip(stages, worker_counts)]
+    remaining = list(worker_counts)
+    remaining_lock = threading.Lock()
+
+    def put(index: int, item: Any) -> float:
+        """Put item on stage index's queue, returning seconds spent blocked"""
+        start = time.perf_counter()
+        queues[index].put(item)
+        metrics[index].sample_queue(queues[index].qsize())
+        return time.perf_counter() - start
+
+    def close(index: int) -> None:
+        """Signal every worker of stage index that its input is exhausted"""
+        for _ in range(worker_counts[index]):
+            queues[index].put(_DONE)
+
+    def run_source() -> None:
+        iterator = iter(source)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                busy = time.perf_counter() - start
+                blocked = put(0, item) if stages else 0.0
+                source_metrics.record(busy, 0.0, blocked)
+        except Exception as e:
+            logger.error(f"Pipeline source '{source_name}' failed: {e}", exc_info=True)
+        finally:
+            if stages:
+                close(0)
+
+    def run_worker(index: int) -> None:
+        stage = stages[index]
+        stage_metrics = metrics[index]
+        is_last = index == len(stages) - 1
+
+        while True:
+            start = time.perf_counter()
+            item = queues[index].get()
+            starved = time.perf_counter() - start
+            if item is _DONE:
+                break
+
+            start = time.perf_counter()
+            error = False
+            try:
+                result = stage.fn(item)
+            except Exception as e:
+                result = None
+                error = True
+                if stage.on_error is None:
+                    logger.error(f"Pipeline stage '{stage.name}' failed: {e}", exc_info=True)
+                else:
+                    try:
+                        stage.on_error(item, e)
+                    except Exception as hook_error:
+                        logger.error(f"Error hook of stage '{stage.name}' failed: {hook_error}", exc_info=True)
+            busy = time.perf_counter() - start
+
+            blocked = put(index + 1, result) if result is not None and not is_last else 0.0
+            stage_metrics.record(busy, starved, blocked, error)
+
+        # The last worker of a stage to finish closes the next stage's input
+        with remaining_lock:
+            remaining[index] -= 1
+            last_worker = remaining[index] == 0
+        if last_worker and not is_last:
+            close(index + 1)
+
+    started = time.perf_counter()
+
+    threads = [threading.Thread(target=run_source, name=f"pipeline-{source_name}", daemon=True)]
+    for index, stage in enumerate(stages):
+        for worker in range(worker_counts[index]):
+            threads.append(threading.Thread(
+                target=run_worker,
+                args=(index,),
+                name=f"pipeline-{stage.name}-{worker}",
+                daemon=True
+            ))
+
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    wall_seconds = time.perf_counter() - started
+    report = {source_name: source_metrics.as_dict(wall_seconds)}
+    for stage_metrics in metrics:
+        report[stage_metrics.name] = stage_metrics.as_dict(wall_seconds)
+    return report
@@ -0,0 +1,273 @@
+"""
+In-process cache of search query embeddings.
+Users repeat the same queries constantly (autocomplete retries, agent tool
+loops), so query vectors are kept in a byte-bounded LRU with a TTL and repeat
+searches skip the embedding round trip. An optional shared backend lets several
+server workers reuse each other's embeddings.
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from typing import Callable
+
+from app.config import settings
+from app.core.embedding_cache import EmbeddingCache, hash_embedding_text
+from app.core.rag_ingestion import get_pipeline
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize query text so trivially different spellings share a cache entry.
+
+    The normalized text is also what gets embedded, so a cached vector is always
+    the vector of its key.
+
+    Args:
+        query: Raw search query
+
+    Returns:
+        NFKC-normalized query with whitespace collapsed
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", query)).strip()
+
+
+class QueryEmbeddingBackend(ABC):
+    """Shared query embedding store consulted on in-process misses"""
+
+    @abstractmethod
+    def get(self, key: str) -> list[float] | None:
+        """Return the embedding stored under key, or None"""
+
+    @abstractmethod
+    def set(self, key: str, embedding: list[float]) -> None:
+        """Store an embedding under key"""
+
+
+class SupabaseQueryEmbeddingBackend(QueryEmbeddingBackend):
+    """Shares query embeddings between workers through the embedding_cache table"""
+
+    def __init__(self, cache: EmbeddingCache):
+        """
+        Initialize backend.
+
+        Args:
+            cache: Embedding cache for the same model as the query cache
+        """
+        self.cache = cache
+
+    def get(self, key: str) -> list[float] | None:
+        return self.cache.get_many([key]).get(key)
+
+    def set(self, key: str, embedding: list[float]) -> None:
+        self.cache.put_many({key: embedding})
+
+
+class QueryEmbeddingCache:
+    """LRU + TTL cache of query embeddings, bounded by approximate memory use"""
+
+    def __init__(
+        self,
+        model: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+        backend: QueryEmbeddingBackend | None = None
+    ):
+        """
+        Initialize cache.
+
+        Args:
+            model: Embedding model; part of every cache key
+            max_bytes: Upper bound on memory held by cached vectors and keys
+            ttl_seconds: How long an entry stays valid after it was stored
+            backend: Optional shared backend consulted on local misses
+        """
+        self.model = model
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        # key -> (expires_at, vector); vectors are stored as float32, which is
+        # what the embeddings API returns, so they round-trip exactly
+        self._entries: OrderedDict[str, tuple[float, array]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _entry_size(key: str, vector: array) -> int:
+        return len(key) + vector.itemsize * len(vector)
+
+    def _get_local(self, key: str) -> list[float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, vector = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._bytes -= self._entry_size(key, vector)
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector.tolist()
+
+    def _put_local(self, key: str, embedding: list[float]) -> None:
+        vector = array("f", embedding)
+        size = self._entry_size(key, vector)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(key, previous[1])
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                old_key, (_, old_vector) = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(old_key, old_vector)
+
+    def _lookup(self, key: str) -> list[float] | None:
+        """Local then shared lookup; counts a hit when found"""
+        embedding = self._get_local(key)
+        if embedding is not None:
+            return embedding
+
+        if self.backend is not None:
+            try:
+                embedding = self.backend.get(key)
+            except Exception as e:
+                logger.warning(f"Shared query embedding lookup failed: {e}")
+            if embedding is not None:
+                with self._lock:
+                    self.hits += 1
+                self._put_local(key, embedding)
+                return embedding
+
+        return None
+
+    def _store(self, key: str, embedding: list[float]) -> None:
+        """Cache a freshly computed embedding locally and in the shared backend"""
+        self._put_local(key, embedding)
+
+        if self.backend is not None:
+            try:
+                self.backend.set(key, embedding)
+            except Exception as e:
+                logger.warning(f"Failed to share query embedding: {e}")
+
+    def get_embedding(self, query: str, embed: Callable[[str], list[float]]) -> list[float]:
+        """
+        Return the embedding for a query, computing it only on a cache miss.
+
+        Args:
+            query: Raw search query
+            embed: Function that embeds normalized query text
+
+        Returns:
+            Query embedding
+        """
+        text = normalize_query(query)
+        key = hash_embedding_text(text, self.model)
+
+        embedding = self._lookup(key)
+        if embedding is not None:
+            return embedding
+
+        with self._lock:
+            self.misses += 1
+        embedding = embed(text)
+        self._store(key, embedding)
+        return embedding
+
+    def get_embeddings(
+        self,
+        queries: list[str],
+        embed_many: Callable[[list[str]], list[list[float]]]
+    ) -> list[list[float]]:
+        """
+        Return embeddings for several queries, embedding all misses in one call.
+
+        Args:
+            queries: Raw search queries
+            embed_many: Function that embeds a list of normalized query texts, in order
+
+        Returns:
+            Query embeddings in the order of queries
+        """
+        keys = []
+        found: dict[str, list[float]] = {}
+        missing: dict[str, str] = {}  # key -> normalized text, deduplicated
+        for query in queries:
+            text = normalize_query(query)
+            key = hash_embedding_text(text, self.model)
+            keys.append(key)
+            if key in found or key in missing:
+                continue
+            embedding = self._lookup(key)
+            if embedding is not None:
+                found[key] = embedding
+            else:
+                missing[key] = text
+
+        if missing:
+            with self._lock:
+                self.misses += len(missing)
+            embeddings = embed_many(list(missing.values()))
+            for key, embedding in zip(missing, embeddings):
+                self._store(key, embedding)
+                found[key] = embedding
+
+        return [found[key] for key in keys]
+
+    def stats(self) -> dict[str, int]:
+        """Current size and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def clear(self) -> None:
+        """Drop all local entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+# Singleton instance
+_query_embedding_cache: QueryEmbeddingCache | None = None
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Get or create the query embedding cache instance"""
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        backend = None
+        if settings.query_embedding_cache_shared:
+            # Own EmbeddingCache so search lookups don't count towards ingestion cache stats
+            pipeline = get_pipeline()
+            backend = SupabaseQueryEmbeddingBackend(EmbeddingCache(pipeline.supabase, pipeline.embedding_model))
+
+        _query_embedding_cache = QueryEmbeddingCache(
+            model=settings.openai_embedding_model,
+            max_bytes=settings.query_embedding_cache_max_bytes,
+            ttl_seconds=settings.query_embedding_cache_ttl_seconds,
+            backend=backend
+        )
+    return _query_embedding_cache
@@ -3,60 +3,127 @@ RAG ingestion pipeline for processing documents into vector embeddings.
 Handles idempotent batch processing of documents.
 """
 import logging
-from datetime import datetime, timezone
-from typing import Any
-from openai import OpenAI
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Callable, Iterator
+from openai import BadRequestError, OpenAI
+from postgrest.exceptions import APIError
 from supabase import Client, create_client
 
 from app.config import settings
+from app.core.embedding_cache import EmbeddingCache
+from app.core.pipeline_stages import Stage, run_stages
 from app.utils.markdown_parser import MarkdownParser, Chunk
 
 logger = logging.getLogger(__name__)
 
+# Raised by sync_document_chunks when the document's chunks changed after the plan was made
+STALE_PLAN_SQLSTATE = "40001"
+MAX_SYNC_ATTEMPTS = 3
+
+# Parser owned by each parse pool worker process (created once per process)
+_worker_parser: MarkdownParser | None = None
+
+
+def _init_parse_worker(target_tokens: int, max_tokens: int, overlap_tokens: int) -> None:
+    """Process pool initializer: build the parser and tiktoken encoder once per worker"""
+    global _worker_parser
+    _worker_parser = MarkdownParser(
+        target_tokens=target_tokens,
+        max_tokens=max_tokens,
+        overlap_tokens=overlap_tokens
+    )
+
+
+def _parse_in_worker(markdown_text: str, document_title: str) -> list[Chunk]:
+    """Parse and chunk one document inside a parse pool worker"""
+    return _worker_parser.parse_and_chunk(markdown_text, document_title)
+
 
 class RAGIngestionPipeline:
     """Pipeline for ingesting documents into vector database"""
 
     def __init__(self):
         """Initialize pipeline with clients and parser"""
-        self.openai_client = OpenAI(api_key=settings.openai_api_key)
+        # The client backs off and retries whole requests on rate limits, 5xx
+        # and connection errors; _embed_batch only handles rejected inputs
+        self.openai_client = OpenAI(api_key=settings.openai_api_key, max_retries=settings.openai_max_retries)
         self.supabase: Client = create_client(
             settings.supabase_url,
             settings.supabase_service_role_key  # Use service role for backend operations
         )
-        self.parser = MarkdownParser()
+        self.parser = MarkdownParser(
+            target_tokens=settings.rag_chunk_target_tokens,
+            max_tokens=settings.rag_chunk_max_tokens,
+            overlap_tokens=settings.rag_chunk_overlap_tokens
+        )
         self.embedding_model = settings.openai_embedding_model
+        self.embedding_cache = EmbeddingCache(self.supabase, self.embedding_model)
+        self._parse_pool: ProcessPoolExecutor | None = None
+        self._parse_pool_lock = threading.Lock()
+        self.last_stage_metrics: dict[str, dict[str, float]] = {}  # Per-stage metrics of the last full run
 
-    def get_documents_to_index(self) -> list[dict[str, Any]]:
+    def iter_stale_document_ids(self) -> Iterator[list[str]]:
         """
-        Fetch documents that need indexing.
-        Returns documents where indexed_at is NULL or updated_at > indexed_at.
+        Yield pages of IDs of documents that need indexing.
+
+        Staleness (indexed_at is NULL or updated_at > indexed_at) is evaluated in the
+        database via the get_documents_to_index RPC, which is served by the partial
+        index idx_documents_needs_indexing, so an idle cycle transfers no content.
+        Pages are keyset-paginated on (updated_at, id).
+        """
+        after_updated_at = None
+        after_id = None
+
+        while True:
+            try:
+                response = self.supabase.rpc(
+                    "get_documents_to_index",
+                    {
+                        "page_size": settings.rag_ingestion_page_size,
+                        "after_updated_at": after_updated_at,
+                        "after_id": after_id
+                    }
+                ).execute()
+
+            except Exception as e:
+                logger.error(f"Error fetching documents to index: {e}")
+                return
+
+            rows = response.data
+            if not rows:
+                return
+
+            yield [row["id"] for row in rows]
+
+            if len(rows) < settings.rag_ingestion_page_size:
+                return
+
+            after_updated_at = rows[-1]["updated_at"]
+            after_id = rows[-1]["id"]
+
+    def fetch_documents(self, document_ids: list[str]) -> list[dict[str, Any]]:
+        """
+        Fetch the content of a batch of documents.
+
+        Args:
+            document_ids: UUIDs of the documents
+
+        Returns:
+            Documents that still exist (deleted ones are omitted)
         """
         try:
-            # Fetch all documents with indexing status
-            # Filter in Python since Supabase doesn't support column comparisons
             response = self.supabase.table("documents") \
                 .select("id, title, content, updated_at, indexed_at") \
+                .in_("id", document_ids) \
                 .execute()
-
-            # Filter documents that need indexing
-            documents = []
-            for doc in response.data:
-                # Index if never indexed OR updated after last index
-                if doc.get("indexed_at") is None:
-                    documents.append(doc)
-                elif doc.get("updated_at") and doc.get("indexed_at"):
-                    # Compare timestamps
-                    updated = datetime.fromisoformat(doc["updated_at"].replace('Z', '+00:00'))
-                    indexed = datetime.fromisoformat(doc["indexed_at"].replace('Z', '+00:00'))
-                    if updated > indexed:
-                        documents.append(doc)
-
-            logger.info(f"Found {len(documents)} documents to index")
-            return documents
+            return response.data
 
         except Exception as e:
-            logger.error(f"Error fetching documents to index: {e}")
+            logger.error(f"Error fetching documents {document_ids}: {e}")
             return []
 
     def generate_embedding(self, text: str) -> list[float]:
@@ -80,140 +147,408 @@ class RAGIngestionPipeline:
             logger.error(f"Error generating embedding: {e}")
             raise
 
-    def delete_existing_chunks(self, document_id: str) -> None:
+    def generate_embeddings(self, texts: list[str], token_counts: list[int]) -> list[list[float]]:
         """
-        Delete existing chunks for a document (for re-indexing).
+        Generate embeddings for many texts using as few OpenAI requests as possible.
+
+        Texts are packed into sub-batches that stay under the configured per-request
+        item and token budgets. If a sub-batch is rejected as a bad request, it is
+        split in half and each half retried, so one bad input never forces the whole
+        document to be re-sent. Transient errors are retried by the OpenAI client and
+        then propagate; splitting would only multiply requests against a rate limit.
 
         Args:
-            document_id: UUID of the document
+            texts: Texts to embed
+            token_counts: Token count of each text (same order as texts)
+
+        Returns:
+            Embedding vectors in the same order as texts
         """
-        try:
-            self.supabase.table("document_chunks") \
-                .delete() \
-                .eq("document_id", document_id) \
-                .execute()
+        embeddings: list[list[float] | None] = [None] * len(texts)
 
-            logger.debug(f"Deleted existing chunks for document {document_id}")
+        for batch in self._build_embedding_batches(token_counts):
+            self._embed_batch(texts, batch, embeddings)
 
-        except Exception as e:
-            logger.error(f"Error deleting chunks for document {document_id}: {e}")
-            raise
+        return embeddings  # type: ignore[return-value]
+
+    def _build_embedding_batches(self, token_counts: list[int]) -> list[list[int]]:
+        """
+        Pack text indices into sub-batches under the item and token budgets.
+
+        Args:
+            token_counts: Token count of each text
+
+        Returns:
+            List of sub-batches, each a list of indices into the original texts
+        """
+        max_items = settings.openai_embedding_batch_max_items
+        max_tokens = settings.openai_embedding_batch_max_tokens
+
+        batches: list[list[int]] = []
+        current: list[int] = []
+        current_tokens = 0
+
+        for index, tokens in enumerate(token_counts):
+            if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+
+            current.append(index)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+
+        return batches
 
-    def store_chunks(
+    def _embed_batch(
         self,
-        document_id: str,
-        document_title: str,
-        chunks: list[Chunk],
-        metadata: dict[str, Any]
+        texts: list[str],
+        indices: list[int],
+        embeddings: list[list[float] | None]
     ) -> None:
         """
-        Generate embeddings and store chunks in database.
+        Embed one sub-batch and write the vectors into their original positions.
+
+        Args:
+            texts: All texts being embedded
+            indices: Indices of the texts in this sub-batch
+            embeddings: Output list, filled in place
+
+        Raises:
+            BadRequestError: If a single text is rejected
+            OpenAIError: On rate limits, server or connection errors that
+                outlasted the client's retries
+        """
+        try:
+            response = self.openai_client.embeddings.create(
+                model=self.embedding_model,
+                input=[texts[i] for i in indices]
+            )
+            # response.data[n].index refers to the position within this request
+            for item in response.data:
+                embeddings[indices[item.index]] = item.embedding
+
+        except BadRequestError as e:
+            if len(indices) == 1:
+                logger.error(f"Error generating embedding: {e}")
+                raise
+
+            # Retry only the rejected sub-batch, halving it to isolate bad inputs
+            logger.warning(f"Embedding batch of {len(indices)} texts rejected, retrying in halves: {e}")
+            middle = len(indices) // 2
+            self._embed_batch(texts, indices[:middle], embeddings)
+            self._embed_batch(texts, indices[middle:], embeddings)
+
+    def prepare_embedding_texts(
+        self,
+        document_title: str,
+        chunks: list[Chunk]
+    ) -> tuple[list[str], list[int]]:
+        """
+        Create augmented embedding texts for chunks and estimate their token counts.
+
+        Token counts come from each chunk's token_count plus the (per-heading)
+        context prefix, so no chunk text is tokenized twice.
 
         Args:
-            document_id: UUID of the document
             document_title: Title of the document
             chunks: List of parsed chunks
-            metadata: Additional metadata to store with each chunk
+
+        Returns:
+            Tuple of (embedding_texts, token_counts) in chunk order
         """
-        try:
-            chunk_records = []
-
-            for chunk in chunks:
-                # Create augmented text for embedding
-                embedding_text = self.parser.create_embedding_text(
-                    chunk["text"],
-                    document_title,
-                    chunk["section_heading"]
+        embedding_texts = []
+        token_counts = []
+        prefix_tokens: dict[str | None, int] = {}
+
+        for chunk in chunks:
+            heading = chunk["section_heading"]
+            embedding_texts.append(
+                self.parser.create_embedding_text(chunk["text"], document_title, heading)
+            )
+            if heading not in prefix_tokens:
+                prefix_tokens[heading] = self.parser.count_tokens(
+                    self.parser.create_embedding_text("", document_title, heading)
                 )
+            token_counts.append(chunk["token_count"] + prefix_tokens[heading])
 
-                # Generate embedding
-                embedding = self.generate_embedding(embedding_text)
-
-                # Prepare chunk record
-                chunk_record = {
-                    "document_id": document_id,
-                    "chunk_index": chunk["chunk_index"],
-                    "content": chunk["text"],  # Store original text
-                    "section_heading": chunk["section_heading"],
-                    "embedding": embedding,
-                    "metadata": {
-                        **metadata,
-                        "token_count": chunk["token_count"],
-                        "document_title": document_title
-                    }
-                }
-                chunk_records.append(chunk_record)
+        return embedding_texts, token_counts
 
-            # Batch insert chunks
-            if chunk_records:
-                self.supabase.table("document_chunks").insert(chunk_records).execute()
-                logger.info(f"Stored {len(chunk_records)} chunks for document {document_id}")
+    def embed_texts(
+        self,
+        texts: list[str],
+        token_counts: list[int],
+        hashes: list[str]
+    ) -> list[list[float]]:
+        """
+        Get embeddings for texts, reusing cached vectors where possible.
+        Only new or changed texts are sent to OpenAI.
 
-        except Exception as e:
-            logger.error(f"Error storing chunks for document {document_id}: {e}")
-            raise
+        Args:
+            texts: Embedding texts
+            token_counts: Token count of each text
+            hashes: Embedding cache key of each text
+
+        Returns:
+            Embedding vectors in the same order as texts
+        """
+        cached = self.embedding_cache.get_many(hashes)
+        missing = [i for i, content_hash in enumerate(hashes) if content_hash not in cached]
+
+        if missing:
+            # Generate embeddings in as few requests as possible
+            new_embeddings = self.generate_embeddings(
+                [texts[i] for i in missing],
+                [token_counts[i] for i in missing]
+            )
+            fresh = {hashes[i]: embedding for i, embedding in zip(missing, new_embeddings)}
+            self.embedding_cache.put_many(fresh)
+            cached.update(fresh)
+
+        return [cached[content_hash] for content_hash in hashes]
 
-    def update_indexed_at(self, document_id: str) -> None:
+    def get_existing_chunks(self, document_id: str) -> list[dict[str, Any]]:
         """
-        Update indexed_at timestamp for a document.
+        Fetch the currently indexed chunks of a document (without embeddings).
 
         Args:
             document_id: UUID of the document
+
+        Returns:
+            List of rows with id, chunk_index and content_hash
         """
         try:
-            self.supabase.table("documents") \
-                .update({"indexed_at": datetime.now(timezone.utc).isoformat()}) \
-                .eq("id", document_id) \
+            response = self.supabase.table("document_chunks") \
+                .select("id, chunk_index, content_hash") \
+                .eq("document_id", document_id) \
                 .execute()
-
-            logger.debug(f"Updated indexed_at for document {document_id}")
+            return response.data
 
         except Exception as e:
-            logger.error(f"Error updating indexed_at for document {document_id}: {e}")
+            logger.error(f"Error fetching chunks for document {document_id}: {e}")
             raise
 
-    def process_document(self, document: dict[str, Any]) -> bool:
+    @staticmethod
+    def diff_chunks(
+        existing: list[dict[str, Any]],
+        hashes: list[str]
+    ) -> tuple[list[dict[str, Any]], list[str], list[int]]:
         """
-        Process a single document: parse, chunk, embed, and store.
+        Match new chunks against existing rows by content hash.
+
+        Args:
+            existing: Existing rows from get_existing_chunks()
+            hashes: Content hash of each new chunk, in chunk order
+
+        Returns:
+            Tuple of (moves, delete_ids, new_positions)
+            - moves: [{id, chunk_index}] for kept rows whose position changed
+            - delete_ids: Rows with no matching new chunk
+            - new_positions: Indices of new chunks that need inserting
+        """
+        # Pool existing rows by hash, in document order, so duplicate
+        # paragraphs are matched one-to-one
+        pool: dict[str, list[dict[str, Any]]] = {}
+        for row in sorted(existing, key=lambda r: r["chunk_index"]):
+            if row.get("content_hash"):
+                pool.setdefault(row["content_hash"], []).append(row)
+
+        matched: set[str] = set()
+        moves = []
+        new_positions = []
+
+        for position, content_hash in enumerate(hashes):
+            candidates = pool.get(content_hash)
+            if candidates:
+                row = candidates.pop(0)
+                matched.add(row["id"])
+                if row["chunk_index"] != position:
+                    moves.append({"id": row["id"], "chunk_index": position})
+            else:
+                new_positions.append(position)
+
+        delete_ids = [row["id"] for row in existing if row["id"] not in matched]
+
+        return moves, delete_ids, new_positions
+
+    def plan_chunk_sync(
+        self,
+        document: dict[str, Any],
+        chunks: list[Chunk]
+    ) -> dict[str, Any]:
+        """
+        Diff a document's chunks against its indexed rows and embed what changed.
+
+        Unchanged chunks keep their rows (and HNSW entries); moved chunks keep
+        their embeddings and only get a new chunk_index, though the index update
+        still re-inserts their rows into HNSW; new chunks are embedded; removed
+        chunks are deleted.
 
         Args:
             document: Document data from database
+            chunks: List of parsed chunks (may be empty)
 
         Returns:
-            True if successful, False otherwise
+            Sync plan (delete_ids, moves, inserts, kept, expected) for apply_chunk_sync
         """
-        document_id = document["id"]
         document_title = document["title"]
 
-        try:
-            logger.info(f"Processing document: {document_title} ({document_id})")
+        embedding_texts, token_counts = self.prepare_embedding_texts(document_title, chunks)
+        hashes = [self.embedding_cache.hash_text(text) for text in embedding_texts]
 
-            # Parse markdown text
-            markdown_text = document["content"]
-            if not markdown_text or not isinstance(markdown_text, str):
-                logger.warning(f"Document {document_id} has invalid content format")
-                return False
+        existing = self.get_existing_chunks(document["id"])
+        moves, delete_ids, new_positions = self.diff_chunks(existing, hashes)
 
-            # Parse and chunk
-            chunks = self.parser.parse_and_chunk(markdown_text, document_title)
+        embeddings = self.embed_texts(
+            [embedding_texts[i] for i in new_positions],
+            [token_counts[i] for i in new_positions],
+            [hashes[i] for i in new_positions]
+        )
 
-            if not chunks:
-                logger.warning(f"No chunks generated for document {document_id}")
-                # Still mark as indexed to avoid reprocessing
-                self.update_indexed_at(document_id)
-                return True
+        chunk_records = []
+
+        for position, embedding in zip(new_positions, embeddings):
+            chunk = chunks[position]
+            # Prepare chunk record
+            chunk_records.append({
+                "chunk_index": position,
+                "content": chunk["text"],  # Store original text
+                "section_heading": chunk["section_heading"],
+                "embedding": embedding,
+                "content_hash": hashes[position],
+                "metadata": {
+                    "updated_at": document.get("updated_at"),
+                    "token_count": chunk["token_count"],
+                    "document_title": document_title
+                }
+            })
+
+        return {
+            "delete_ids": delete_ids,
+            "moves": moves,
+            "inserts": chunk_records,
+            "kept": len(chunks) - len(new_positions),
+            # Rows the diff was computed against; the RPC rejects the plan if they changed
+            "expected": [{"id": row["id"], "chunk_index": row["chunk_index"]} for row in existing]
+        }
+
+    def apply_chunk_sync(self, document: dict[str, Any], plan: dict[str, Any]) -> None:
+        """
+        Apply a sync plan in one transaction, including indexed_at.
 
-            # Delete existing chunks (for re-indexing)
-            self.delete_existing_chunks(document_id)
+        Args:
+            document: Document data from database
+            plan: Plan returned by plan_chunk_sync
 
-            # Store chunks with embeddings
-            metadata = {
-                "updated_at": document.get("updated_at")
+        Raises:
+            APIError: With code STALE_PLAN_SQLSTATE if another sync changed the
+                document's chunks after the plan was made
+        """
+        self.supabase.rpc(
+            "sync_document_chunks",
+            {
+                "p_document_id": document["id"],
+                "p_delete_ids": plan["delete_ids"],
+                "p_moves": plan["moves"],
+                "p_inserts": plan["inserts"],
+                "p_source_updated_at": document.get("updated_at"),
+                "p_expected": plan["expected"]
             }
-            self.store_chunks(document_id, document_title, chunks, metadata)
+        ).execute()
+
+        logger.info(
+            f"Synced chunks for document {document['id']}: "
+            f"{plan['kept']} kept ({len(plan['moves'])} moved), "
+            f"{len(plan['inserts'])} inserted, {len(plan['delete_ids'])} deleted"
+        )
+
+    def sync_chunks(
+        self,
+        document: dict[str, Any],
+        chunks: list[Chunk],
+        plan: dict[str, Any] | None = None
+    ) -> None:
+        """
+        Plan and apply a chunk sync, re-planning if the plan went stale.
+
+        Full and targeted runs can both pick up a recently edited document. Each
+        plans outside the database transaction, so the second one to apply finds
+        rows it didn't diff against; its plan is rejected and rebuilt from the
+        current rows. Re-planning only embeds chunks missing from the embedding
+        cache, which the first sync has already filled.
+
+        Args:
+            document: Document data from database
+            chunks: List of parsed chunks (may be empty)
+            plan: Plan already built by plan_chunk_sync, if any
+        """
+        for attempt in range(1, MAX_SYNC_ATTEMPTS + 1):
+            if plan is None:
+                plan = self.plan_chunk_sync(document, chunks)
+            try:
+                self.apply_chunk_sync(document, plan)
+                return
+            except APIError as e:
+                if e.code != STALE_PLAN_SQLSTATE or attempt == MAX_SYNC_ATTEMPTS:
+                    raise
+                logger.info(f"Chunks of document {document['id']} changed during sync, re-planning")
+                plan = None
+
+    def parse_document(self, document: dict[str, Any], use_parse_pool: bool = False) -> list[Chunk]:
+        """
+        Parse and chunk a document's markdown (the parse stage).
+
+        Args:
+            document: Document data from database
+            use_parse_pool: Parse in the process pool instead of inline
+
+        Returns:
+            Parsed chunks (may be empty)
+
+        Raises:
+            ValueError: If the document's content isn't text
+        """
+        logger.info(f"Processing document: {document['title']} ({document['id']})")
+        if not isinstance(document["content"], str):
+            raise ValueError(f"Document {document['id']} has invalid content format")
+
+        if use_parse_pool:
+            chunks = self._parse_in_pool(document["content"], document["title"])
+        else:
+            chunks = self.parser.parse_and_chunk(document["content"], document["title"])
 
-            # Update indexed_at
-            self.update_indexed_at(document_id)
+        if not chunks:
+            # Still sync so stale chunks are removed and the document is marked indexed
+            logger.warning(f"No chunks generated for document {document['id']}")
+        return chunks
+
+    def process_document(
+        self,
+        document: dict[str, Any],
+        chunks: list[Chunk] | None = None
+    ) -> bool:
+        """
+        Process a single document: parse, chunk, embed, and store.
+        Runs the same stage methods as the streaming pipeline in run(), one after another.
+
+        Args:
+            document: Document data from database
+            chunks: Chunks already parsed elsewhere (e.g. in the parse process pool);
+                parsed here when None
+
+        Returns:
+            True if successful, False otherwise
+        """
+        document_id = document["id"]
+
+        try:
+            if chunks is None:
+                chunks = self.parse_document(document)
+
+            # Diff against indexed chunks, embed what changed and apply atomically
+            self.sync_chunks(document, chunks)
 
             logger.info(f"Successfully processed document {document_id} ({len(chunks)} chunks)")
             return True
@@ -222,39 +557,216 @@ class RAGIngestionPipeline:
             logger.error(f"Failed to process document {document_id}: {e}", exc_info=True)
             return False
 
-    def run(self) -> dict[str, int]:
+    def _process_documents(
+        self,
+        executor: ThreadPoolExecutor,
+        documents: list[dict[str, Any]],
+        stats: dict[str, int]
+    ) -> None:
+        """Process a batch of documents on the executor and tally results into stats"""
+        for success in executor.map(self.process_document, documents):
+            if success:
+                stats["processed"] += 1
+            else:
+                stats["failed"] += 1
+
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        """Get or create the process pool used to parse documents during full runs"""
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                self._parse_pool = ProcessPoolExecutor(
+                    max_workers=settings.rag_parse_processes,
+                    # Forking a process that runs the scheduler, search pool and HTTP
+                    # client threads can copy held locks into the child; spawn starts clean
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_parse_worker,
+                    initargs=(
+                        settings.rag_chunk_target_tokens,
+                        settings.rag_chunk_max_tokens,
+                        settings.rag_chunk_overlap_tokens
+                    )
+                )
+            return self._parse_pool
+
+    def _parse_in_pool(self, markdown_text: str, document_title: str) -> list[Chunk]:
+        """
+        Parse a document in the parse pool.
+
+        A worker dying (e.g. out of memory on a huge document) breaks the whole
+        pool; it is dropped so the next parse starts a fresh one, and the error
+        propagates so this document is retried on a later run.
+        """
+        pool = self._get_parse_pool()
+        try:
+            return pool.submit(_parse_in_worker, markdown_text, document_title).result()
+        except BrokenProcessPool:
+            with self._parse_pool_lock:
+                if self._parse_pool is pool:
+                    self._parse_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            logger.error("Parse pool broke (worker died); it will be recreated")
+            raise
+
+    def shutdown(self) -> None:
+        """Stop the parse pool's worker processes"""
+        with self._parse_pool_lock:
+            pool, self._parse_pool = self._parse_pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def run_documents(self, document_ids: list[str]) -> dict[str, int]:
+        """
+        Index specific documents, e.g. right after they were created or edited.
+        Documents that are already up to date (or were deleted) are skipped.
+
+        Args:
+            document_ids: UUIDs of the documents that changed
+
+        Returns:
+            Statistics about the run (processed, failed, skipped, cache_hits, cache_misses)
+        """
+        logger.info(f"Starting targeted RAG ingestion for {len(document_ids)} documents")
+        cache_hits, cache_misses = self.embedding_cache.snapshot_stats()
+
+        stats = {"processed": 0, "failed": 0, "skipped": 0}
+        documents = [doc for doc in self.fetch_documents(document_ids) if self._needs_indexing(doc)]
+        stats["skipped"] = len(document_ids) - len(documents)
+
+        if documents:
+            workers = max(1, min(settings.rag_ingestion_workers, len(documents)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rag-ingest") as executor:
+                self._process_documents(executor, documents, stats)
+
+        hits, misses = self.embedding_cache.snapshot_stats()
+        stats["cache_hits"] = hits - cache_hits
+        stats["cache_misses"] = misses - cache_misses
+
+        logger.info(
+            f"Targeted RAG ingestion completed: "
+            f"{stats['processed']} processed, "
+            f"{stats['failed']} failed, "
+            f"{stats['skipped']} skipped"
+        )
+
+        return stats
+
+    @staticmethod
+    def _needs_indexing(document: dict[str, Any]) -> bool:
+        """Check whether a document was never indexed or was updated after its last index"""
+        if document.get("indexed_at") is None:
+            return True
+        if not document.get("updated_at"):
+            return False
+
+        updated = datetime.fromisoformat(document["updated_at"].replace('Z', '+00:00'))
+        indexed = datetime.fromisoformat(document["indexed_at"].replace('Z', '+00:00'))
+        return updated > indexed
+
+    def iter_stale_documents(
+        self,
+        stats: dict[str, int],
+        stats_lock: threading.Lock,
+        stop: threading.Event | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Yield documents that need indexing, fetching content one page at a time.
+
+        Args:
+            stats: Run statistics; documents deleted since the scan count as skipped
+            stats_lock: Lock guarding stats
+            stop: When set, no further pages are fetched
+        """
+        for document_ids in self.iter_stale_document_ids():
+            if stop is not None and stop.is_set():
+                return
+            documents = self.fetch_documents(document_ids)
+            with stats_lock:
+                stats["skipped"] += len(document_ids) - len(documents)
+            yield from documents
+
+    def run(self, stop: threading.Event | None = None) -> dict[str, int]:
         """
         Run the ingestion pipeline.
-        Processes all documents that need indexing.
+        Processes all documents that need indexing as a stream of stages
+        (fetch -> parse -> embed -> store) connected by bounded queues, so
+        parsing, embedding and database writes overlap and only a few pages of
+        documents are held in memory at once. With RAG_PARSE_PROCESSES > 0,
+        CPU-bound parsing and chunking is fanned out to a process pool.
+
+        Args:
+            stop: When set (e.g. the caller lost its ingestion lease), no more
+                documents are fetched or written; in-flight writes finish
 
         Returns:
-            Statistics about the run (processed, failed, skipped)
+            Statistics about the run (processed, failed, skipped, cache_hits, cache_misses)
         """
         logger.info("Starting RAG ingestion pipeline")
+        cache_hits, cache_misses = self.embedding_cache.snapshot_stats()
 
-        # Get documents to process
-        documents = self.get_documents_to_index()
-
-        if not documents:
-            logger.info("No documents to process")
-            return {"processed": 0, "failed": 0, "skipped": 0}
-
-        # Process each document
         stats = {"processed": 0, "failed": 0, "skipped": 0}
-
-        for document in documents:
-            success = self.process_document(document)
-            if success:
+        stats_lock = threading.Lock()
+        use_parse_pool = settings.rag_parse_processes > 0
+
+        def failed(stage: str) -> Callable[[Any, Exception], None]:
+            """Error hook for a stage: every stage's item is the document or a tuple starting with it"""
+            def on_error(item: Any, error: Exception) -> None:
+                document = item if isinstance(item, dict) else item[0]
+                logger.error(f"Failed to {stage} document {document['id']}: {error}", exc_info=error)
+                with stats_lock:
+                    stats["failed"] += 1
+            return on_error
+
+        def parse(document: dict[str, Any]) -> tuple[dict[str, Any], list[Chunk]]:
+            return document, self.parse_document(document, use_parse_pool)
+
+        def embed(item: tuple[dict[str, Any], list[Chunk]]) -> tuple[dict[str, Any], list[Chunk], dict[str, Any]]:
+            document, chunks = item
+            return document, chunks, self.plan_chunk_sync(document, chunks)
+
+        def store(item: tuple[dict[str, Any], list[Chunk], dict[str, Any]]) -> None:
+            document, chunks, plan = item
+            if stop is not None and stop.is_set():
+                # Left stale, so whichever worker holds the lease now picks it up
+                with stats_lock:
+                    stats["skipped"] += 1
+                return
+            self.sync_chunks(document, chunks, plan)
+            with stats_lock:
                 stats["processed"] += 1
-            else:
-                stats["failed"] += 1
+
+        # The embed and store stages are almost entirely network wait, so they
+        # get RAG_INGESTION_WORKERS threads each; parsing is CPU-bound.
+        workers = max(1, settings.rag_ingestion_workers)
+        queue_size = settings.rag_pipeline_queue_size
+        self.last_stage_metrics = run_stages(
+            "fetch",
+            self.iter_stale_documents(stats, stats_lock, stop),
+            [
+                Stage("parse", parse, workers=max(1, settings.rag_parse_processes), queue_size=queue_size,
+                      on_error=failed("parse")),
+                Stage("embed", embed, workers=workers, queue_size=queue_size, on_error=failed("embed")),
+                Stage("store", store, workers=workers, queue_size=queue_size, on_error=failed("store")),
+            ]
+        )
+
+        hits, misses = self.embedding_cache.snapshot_stats()
+        stats["cache_hits"] = hits - cache_hits
+        stats["cache_misses"] = misses - cache_misses
 
         logger.info(
             f"RAG ingestion pipeline completed: "
             f"{stats['processed']} processed, "
             f"{stats['failed']} failed, "
-            f"{stats['skipped']} skipped"
+            f"{stats['skipped']} skipped, "
+            f"embedding cache {stats['cache_hits']} hits / {stats['cache_misses']} misses"
         )
+        for name, stage_stats in self.last_stage_metrics.items():
+            logger.info(
+                f"Stage {name}: {stage_stats['items']} items, "
+                f"{stage_stats['items_per_second']}/s, "
+                f"utilization {stage_stats['utilization']}, "
+                f"queue depth avg {stage_stats['avg_queue_depth']} / max {stage_stats['max_queue_depth']}"
+            )
 
         return stats
 
@@ -0,0 +1,94 @@
+"""
+Second-stage re-ranking for document search.
+Search over-fetches candidates from the first stage (vector or hybrid RPC) and
+re-scores them here with BM25 computed over the candidate pool, blended with
+the first-stage similarity. Scoring runs against a hard deadline; when the
+deadline passes the caller keeps first-stage order, so p99 stays bounded.
+"""
+import logging
+import math
+import re
+import time
+from collections import Counter
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; identifiers split on punctuation like the tsvector parser"""
+    return _TOKEN.findall(text.lower())
+
+
+def candidate_text(row: dict[str, Any]) -> str:
+    """Text a candidate is scored on: title, section heading and content (or snippet)"""
+    return " ".join(filter(None, [row.get("document_title"), row.get("section_heading"), row.get("content")]))
+
+
+def rerank(
+    query: str,
+    rows: list[dict[str, Any]],
+    limit: int,
+    deadline: float,
+    lexical_weight: float = 0.3
+) -> list[dict[str, Any]] | None:
+    """
+    Re-rank first-stage candidates.
+
+    Each candidate's final score is its first-stage similarity plus
+    lexical_weight times its BM25 score normalized to [0, 1] within the pool.
+
+    Args:
+        query: Search query
+        rows: First-stage rows in first-stage order
+        limit: Number of rows to return
+        deadline: time.monotonic() value after which scoring gives up
+        lexical_weight: Weight of the lexical score relative to similarity
+
+    Returns:
+        The best `limit` rows, or None if the deadline passed before scoring finished
+    """
+    query_terms = set(tokenize(query))
+    if not query_terms or not rows:
+        return rows[:limit]
+
+    documents = []
+    for row in rows:
+        if time.monotonic() > deadline:
+            return None
+        documents.append(Counter(tokenize(candidate_text(row))))
+
+    average_length = sum(sum(doc.values()) for doc in documents) / len(documents) or 1.0
+    document_frequency = {term: sum(1 for doc in documents if term in doc) for term in query_terms}
+    idf = {
+        term: math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+        for term, df in document_frequency.items()
+    }
+
+    lexical_scores = []
+    for doc in documents:
+        if time.monotonic() > deadline:
+            return None
+        length = sum(doc.values())
+        score = 0.0
+        for term in query_terms:
+            frequency = doc.get(term, 0)
+            if frequency:
+                score += idf[term] * frequency * (BM25_K1 + 1) / (
+                    frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                )
+        lexical_scores.append(score)
+
+    best_lexical = max(lexical_scores) or 1.0
+    ranked = sorted(
+        zip(rows, lexical_scores),
+        key=lambda pair: pair[0]["similarity"] + lexical_weight * pair[1] / best_lexical,
+        reverse=True
+    )
+    return [row for row, _ in ranked[:limit]]
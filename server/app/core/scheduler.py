@@ -6,7 +6,7 @@ import asyncio
 import logging
 from datetime import datetime
 
-from app.core.rag_ingestion import get_pipeline
+from app.core.ingestion_coordinator import get_coordinator
 
 logger = logging.getLogger(__name__)
 
@@ -26,15 +26,16 @@ class RAGScheduler:
         self.running = False
 
     async def _run_ingestion(self) -> None:
-        """Run the ingestion pipeline (blocking operation in thread pool)"""
+        """Run the ingestion pipeline through the single-flight coordinator"""
         try:
             logger.info("Running scheduled RAG ingestion")
             start_time = datetime.now()
 
-            # Run in thread pool since it's sync code
-            loop = asyncio.get_event_loop()
-            pipeline = get_pipeline()
-            stats = await loop.run_in_executor(None, pipeline.run)
+            # Single-flight: attaches to any run already in progress
+            stats = await get_coordinator().run()
+            if stats is None:
+                logger.info("Skipping scheduled RAG ingestion: another worker is running it")
+                return
 
             duration = (datetime.now() - start_time).total_seconds()
             logger.info(
@@ -0,0 +1,55 @@
+"""
+Bounded thread pool for blocking calls made by the search endpoints.
+The OpenAI and Supabase clients used for search are synchronous; running them
+here keeps the event loop (and every WebSocket chat stream on this worker)
+responsive while searches wait on the network.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Created lazily so the pool size can come from settings
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_search_executor() -> ThreadPoolExecutor:
+    """Get or create the search thread pool"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.search_io_threads),
+            thread_name_prefix="rag-search"
+        )
+    return _executor
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking call on the search thread pool and await its result.
+
+    When every thread is busy, further calls queue instead of spawning threads,
+    so a burst of searches can't exhaust the process.
+
+    Args:
+        fn: Blocking callable
+        *args: Positional arguments for fn
+        **kwargs: Keyword arguments for fn
+
+    Returns:
+        fn's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_search_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_search_executor() -> None:
+    """Stop the search thread pool (called on application shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
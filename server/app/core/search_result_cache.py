@@ -0,0 +1,174 @@
+"""
+In-process cache of search responses.
+Entries are keyed by user, normalized query and every option that changes the
+results, and stamped with the user's corpus version (see migration
+20251223000009). Any change to the user's chunks bumps the version in the
+database, and entries stored under an older version are treated as misses.
+Reading the version is a PostgREST round trip, so each user's version is reused
+for version_ttl_seconds (about a second) before it is read again: a hit within
+that window costs no network call, and results are at most that stale after a
+re-index.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+from postgrest import SyncPostgrestClient
+from pydantic import BaseModel
+
+from app.config import settings
+from app.core.query_embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# corpus_versions row for chunks without an owner, which every user can see
+SHARED_CORPUS_OWNER = "00000000-0000-0000-0000-000000000000"
+
+CorpusVersion = tuple[int, int]  # (user's version, shared version)
+
+
+def fetch_corpus_version(client: SyncPostgrestClient, user_id: str) -> CorpusVersion:
+    """
+    Read the corpus version a user's search results depend on.
+
+    Args:
+        client: User-scoped PostgREST client
+        user_id: Searching user's ID
+
+    Returns:
+        (user's version, shared version); 0 for owners that never had chunks
+    """
+    response = client.table("corpus_versions") \
+        .select("user_id, version") \
+        .in_("user_id", [user_id, SHARED_CORPUS_OWNER]) \
+        .execute()
+
+    versions = {row["user_id"]: row["version"] for row in response.data}
+    return versions.get(user_id, 0), versions.get(SHARED_CORPUS_OWNER, 0)
+
+
+class SearchResultCache:
+    """LRU + TTL cache of search responses, validated against the corpus version"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int, version_ttl_seconds: float = 1.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_ttl_seconds = version_ttl_seconds
+        # user_id -> (expires_at, corpus version); LRU-bounded like the entries
+        self._versions: OrderedDict[str, tuple[float, CorpusVersion]] = OrderedDict()
+        # key -> (expires_at, corpus version, response)
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, CorpusVersion, BaseModel]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(user_id: str, query: str, options: dict[str, Any]) -> tuple[str, str, str]:
+        """
+        Build a cache key.
+
+        Args:
+            user_id: Searching user's ID
+            query: Raw search query
+            options: Every other request option that affects the results
+
+        Returns:
+            Hashable cache key
+        """
+        return user_id, normalize_query(query), repr(sorted(options.items()))
+
+    def get_version(self, user_id: str, fetch: Callable[[], CorpusVersion]) -> CorpusVersion:
+        """
+        Return the user's corpus version, reading it with fetch once version_ttl_seconds has passed.
+
+        Args:
+            user_id: Searching user's ID
+            fetch: Reads the version from the database
+
+        Returns:
+            The user's corpus version
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._versions.move_to_end(user_id)
+                return entry[1]
+
+        version = fetch()
+        with self._lock:
+            self._versions[user_id] = (now + self.version_ttl_seconds, version)
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_entries:
+                self._versions.popitem(last=False)
+        return version
+
+    def get(self, key: tuple[str, str, str], version: CorpusVersion) -> BaseModel | None:
+        """Return the cached response for key if it was stored under version and hasn't expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic() or entry[1] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: tuple[str, str, str], version: CorpusVersion, response: BaseModel) -> None:
+        """
+        Store a response.
+
+        Args:
+            key: Cache key from make_key
+            version: Corpus version read before the search ran, so results
+                racing with a re-index are stored under the older version
+            response: Response to cache; treated as immutable once stored
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, version, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """Current size and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+# Singleton instance
+_search_result_cache: SearchResultCache | None = None
+
+
+def get_search_result_cache() -> SearchResultCache:
+    """Get or create the search result cache instance"""
+    global _search_result_cache
+    if _search_result_cache is None:
+        _search_result_cache = SearchResultCache(
+            max_entries=settings.search_result_cache_size,
+            ttl_seconds=settings.search_result_cache_ttl_seconds,
+            version_ttl_seconds=settings.search_corpus_version_ttl_ms / 1000
+        )
+    return _search_result_cache
@@ -1,29 +1,116 @@
 """
 Session management for WebSocket-based persistent conversations.
 
-Maintains long-lived ClaudeSDKClient instances, one per WebSocket connection.
+Maintains long-lived ClaudeSDKClient instances, one per chat session. Each
+client owns a CLI subprocess, so live clients are bounded: sessions idle for
+longer than the TTL are disconnected by a background reaper, and past the
+session cap the least recently used idle session is evicted. Sessions in the
+middle of a turn (mark_active) are never evicted. An evicted conversation is
+resumed from its sdk_session_id on the next join or message.
 """
 import asyncio
+import re
+import time
+from collections import OrderedDict
 from typing import Dict, Optional, Callable
 import logging
 from claude_agent_sdk import ClaudeSDKClient, ClaudeAgentOptions, HookMatcher
+from app.config import settings
 from app.constants import DOCUMENT_MUTATION_TOOLS
+from app.core.indexing_queue import get_indexing_queue
 
 logger = logging.getLogger(__name__)
 
+# Matches the "(ID: <uuid>)" the document tools include in their responses
+DOCUMENT_ID_PATTERN = re.compile(r'ID: ([a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12})')
+
+
+def extract_document_id(input_data: dict) -> Optional[str]:
+    """
+    Find the ID of the document a create/update tool call touched.
+
+    Args:
+        input_data: PostToolUse hook input
+
+    Returns:
+        Document ID if it could be determined, None otherwise
+    """
+    tool_input = input_data.get('tool_input') or {}
+    if isinstance(tool_input, dict) and tool_input.get('id'):
+        return tool_input['id']
+
+    match = DOCUMENT_ID_PATTERN.search(str(input_data.get('tool_response', '')))
+    return match.group(1) if match else None
+
 
 class SessionManager:
     """
     Manages long-lived ClaudeSDKClient instances for WebSocket connections.
 
-    Each WebSocket connection gets one ClaudeSDKClient that persists for
-    the lifetime of the connection, enabling true conversational continuity.
+    Each chat session gets one ClaudeSDKClient that outlives WebSocket
+    reconnections, enabling true conversational continuity, until it is
+    evicted for being idle or least recently used.
     """
 
-    def __init__(self):
-        self._clients: Dict[str, ClaudeSDKClient] = {}
+    def __init__(
+        self,
+        idle_ttl_seconds: float = 1800,
+        max_sessions: int = 100,
+        reap_interval_seconds: float = 60
+    ):
+        """
+        Initialize session manager.
+
+        Args:
+            idle_ttl_seconds: Disconnect clients unused for this long
+            max_sessions: Live clients kept before evicting the least recently used idle one
+            reap_interval_seconds: How often the reaper looks for idle clients
+        """
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_sessions = max_sessions
+        self.reap_interval_seconds = reap_interval_seconds
+        # Least recently used first
+        self._clients: OrderedDict[str, ClaudeSDKClient] = OrderedDict()
         self._cache_queues: Dict[str, asyncio.Queue] = {}  # Persist queues with clients
+        self._last_used: Dict[str, float] = {}
+        self._active: Dict[str, int] = {}  # Turns in progress per session; pinned while > 0
         self._lock = asyncio.Lock()
+        self._reaper: asyncio.Task | None = None
+
+    def _touch(self, session_id: str) -> None:
+        """Mark a session as just used (caller holds the lock)"""
+        if session_id in self._clients:
+            self._clients.move_to_end(session_id)
+            self._last_used[session_id] = time.monotonic()
+
+    def _pop(self, session_id: str) -> ClaudeSDKClient:
+        """Drop a session's state and return its client for disconnecting (caller holds the lock)"""
+        self._cache_queues.pop(session_id, None)
+        self._last_used.pop(session_id, None)
+        return self._clients.pop(session_id)
+
+    def _evict_over_capacity(self, keep: str) -> list[tuple[str, ClaudeSDKClient]]:
+        """Pop least recently used idle sessions beyond max_sessions (caller holds the lock)"""
+        evicted = []
+        for session_id in list(self._clients):
+            if len(self._clients) <= self.max_sessions:
+                break
+            if session_id == keep or self._active.get(session_id):
+                continue
+            evicted.append((session_id, self._pop(session_id)))
+
+        if len(self._clients) > self.max_sessions:
+            logger.warning(f"{len(self._clients)} live sessions exceed the cap of {self.max_sessions}; all others are active")
+        return evicted
+
+    @staticmethod
+    async def _disconnect(session_id: str, client: ClaudeSDKClient, reason: str) -> None:
+        """Disconnect an evicted client outside the lock"""
+        try:
+            await client.disconnect()
+        except Exception as e:
+            logger.error(f"Error disconnecting client for session {session_id}: {e}")
+        logger.info(f"Evicted client for session {session_id} ({reason})")
 
     async def get_or_create_client(
         self,
@@ -50,6 +137,7 @@ class SessionManager:
         async with self._lock:
             if session_id in self._clients:
                 logger.info(f"Returning existing client for session: {session_id}")
+                self._touch(session_id)
                 cache_queue = self._cache_queues[session_id]
                 return self._clients[session_id], False, cache_queue
 
@@ -78,6 +166,13 @@ class SessionManager:
                         'tool_response': tool_response
                     })
                     logger.debug(f"[POST TOOL USE HOOK] Event queued. Queue size: {cache_queue.qsize()}")
+
+                    # Re-index the document right away instead of waiting for polling
+                    document_id = extract_document_id(input_data)
+                    if document_id:
+                        get_indexing_queue().notify(document_id)
+                    else:
+                        logger.warning(f"Could not determine document ID for {tool_name}; relying on polling")
                 else:
                     logger.debug(f"[POST TOOL USE HOOK] Tool {tool_name} is not a document operation")
 
@@ -100,10 +195,19 @@ class SessionManager:
 
             # Create new client
             client = ClaudeSDKClient(options=options)
-            await client.connect()
+            try:
+                await client.connect()
+            except Exception:
+                del self._cache_queues[session_id]
+                raise
             self._clients[session_id] = client
+            self._touch(session_id)
             logger.info(f"Created new client for session: {session_id}")
-            return client, True, cache_queue
+            evicted = self._evict_over_capacity(keep=session_id)
+
+        for evicted_id, evicted_client in evicted:
+            await self._disconnect(evicted_id, evicted_client, "over session cap")
+        return client, True, cache_queue
 
     async def get_client(self, session_id: str) -> Optional[ClaudeSDKClient]:
         """
@@ -116,6 +220,7 @@ class SessionManager:
             ClaudeSDKClient if exists, None otherwise
         """
         async with self._lock:
+            self._touch(session_id)
             return self._clients.get(session_id)
 
     async def get_cache_queue(self, session_id: str) -> Optional[asyncio.Queue]:
@@ -145,12 +250,95 @@ class SessionManager:
                     await client.disconnect()
                 except Exception as e:
                     logger.error(f"Error disconnecting client for session {session_id}: {e}")
-                del self._clients[session_id]
                 # Also clean up the cache queue
-                if session_id in self._cache_queues:
-                    del self._cache_queues[session_id]
+                self._pop(session_id)
                 logger.info(f"Removed client for session: {session_id}")
 
+    async def mark_active(self, session_id: str) -> None:
+        """
+        Pin a session while a turn is in progress so it can't be evicted.
+        May be called before the session's client exists (e.g. before recreating it).
+
+        Args:
+            session_id: Session identifier
+        """
+        async with self._lock:
+            self._active[session_id] = self._active.get(session_id, 0) + 1
+            self._touch(session_id)
+
+    async def mark_inactive(self, session_id: str) -> None:
+        """
+        Release a mark_active pin; the idle TTL counts from now.
+
+        Args:
+            session_id: Session identifier
+        """
+        async with self._lock:
+            remaining = self._active.get(session_id, 0) - 1
+            if remaining > 0:
+                self._active[session_id] = remaining
+            else:
+                self._active.pop(session_id, None)
+            self._touch(session_id)
+
+    async def evict_idle(self) -> int:
+        """
+        Disconnect sessions idle for longer than the TTL.
+
+        Returns:
+            Number of sessions evicted
+        """
+        deadline = time.monotonic() - self.idle_ttl_seconds
+        async with self._lock:
+            evicted = [
+                (session_id, self._pop(session_id))
+                for session_id in list(self._clients)
+                if self._last_used.get(session_id, 0) < deadline and not self._active.get(session_id)
+            ]
+
+        for session_id, client in evicted:
+            await self._disconnect(session_id, client, "idle")
+        return len(evicted)
+
+    async def _reap_loop(self) -> None:
+        """Background loop evicting idle sessions"""
+        logger.info(
+            f"Session reaper started (idle TTL: {self.idle_ttl_seconds}s, max sessions: {self.max_sessions})"
+        )
+        while True:
+            try:
+                await asyncio.sleep(self.reap_interval_seconds)
+                evicted = await self.evict_idle()
+                if evicted:
+                    logger.info(f"Reaped {evicted} idle sessions, {len(self._clients)} live")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in session reaper: {e}", exc_info=True)
+
+    def start(self) -> None:
+        """Start the background reaper"""
+        if self._reaper is not None:
+            logger.warning("Session reaper already running")
+            return
+        self._reaper = asyncio.create_task(self._reap_loop())
+
+    async def stop(self) -> None:
+        """Stop the reaper and disconnect every client"""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+        async with self._lock:
+            evicted = [(session_id, self._pop(session_id)) for session_id in list(self._clients)]
+
+        for session_id, client in evicted:
+            await self._disconnect(session_id, client, "shutdown")
+
     async def interrupt_session(self, session_id: str) -> None:
         """
         Interrupt active processing in a session.
@@ -176,4 +364,8 @@ class SessionManager:
 
 
 # Singleton instance
-session_manager = SessionManager()
+session_manager = SessionManager(
+    idle_ttl_seconds=settings.chat_session_idle_ttl_seconds,
+    max_sessions=settings.chat_max_sessions,
+    reap_interval_seconds=settings.chat_session_reap_interval_seconds
+)
@@ -7,6 +7,12 @@ from app.config import settings
 from app.routes import health, chat, rag
 from app.core.middleware import RequestLoggingMiddleware
 from app.core.scheduler import get_scheduler
+from app.core.indexing_queue import get_indexing_queue
+from app.core.search_executor import shutdown_search_executor
+from app.core.dependencies import close_user_http_client
+from app.core.session_manager import session_manager
+from app.core.rag_ingestion import get_pipeline
+from mcp_servers.punypage_internal.db.supabase import set_supabase_client
 
 # Configure logging
 logging.basicConfig(
@@ -23,15 +29,30 @@ async def lifespan(app: FastAPI):
     logger.info(f"Environment: {settings.environment}")
     logger.info(f"Frontend URL: {settings.frontend_url}")
 
-    # Start RAG ingestion scheduler
-    scheduler = get_scheduler(interval_seconds=60)  # 1 minute
+    # Chat document tools run in-process and share the service role client
+    set_supabase_client(get_pipeline().supabase)
+
+    # Start event-driven indexing queue (documents changed by the agent)
+    indexing_queue = get_indexing_queue()
+    indexing_queue.start()
+
+    # Start RAG ingestion scheduler as a low-frequency safety net
+    scheduler = get_scheduler(interval_seconds=settings.rag_poll_interval_seconds)
     scheduler.start()
     logger.info("RAG ingestion scheduler started")
 
+    # Evict idle chat sessions so live CLI subprocesses stay bounded
+    session_manager.start()
+
     yield
 
-    # Stop scheduler on shutdown
+    # Disconnect chat sessions and stop background indexing on shutdown
+    await session_manager.stop()
     await scheduler.stop()
+    await indexing_queue.stop()
+    shutdown_search_executor()
+    get_pipeline().shutdown()
+    close_user_http_client()
     logger.info("Shutting down server")
 
 
@@ -11,6 +11,7 @@ from app.core.session_manager import session_manager
 from app.core.auth import validate_websocket_token
 from app.constants import DOCUMENT_MUTATION_TOOLS, MCP_TOOL_CREATE_DOCUMENT, MCP_TOOL_UPDATE_DOCUMENT
 from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+from mcp_servers.punypage_internal.sdk_server import SERVER_NAME, create_punypage_server
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -19,6 +20,66 @@ logger = logging.getLogger(__name__)
 SESSION_ID_PATTERN = re.compile(r'^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$')
 
 
+def build_agent_options(user_id: str, resume: Optional[str] = None) -> ClaudeAgentOptions:
+    """
+    Build ClaudeSDKClient options for a chat session.
+
+    The document tools run in-process, bound to the session's user; the server
+    key keeps tool names as mcp__punypage_internal__<tool>.
+
+    Args:
+        user_id: Authenticated user the session acts as
+        resume: Claude SDK session ID to resume, if any
+
+    Returns:
+        Client options
+    """
+    return ClaudeAgentOptions(
+        resume=resume,
+        permission_mode='bypassPermissions',
+        include_partial_messages=True,
+        mcp_servers={
+            SERVER_NAME: create_punypage_server(user_id)
+        }
+    )
+
+
+async def open_session(
+    room_id: str,
+    user_id: str,
+    sdk_session_id: Optional[str]
+) -> tuple[ClaudeSDKClient, asyncio.Queue]:
+    """
+    Create the session's ClaudeSDKClient, resuming the conversation when possible.
+
+    Args:
+        room_id: Chat session ID
+        user_id: Authenticated user the session acts as
+        sdk_session_id: Claude SDK session ID to resume, if known
+
+    Returns:
+        Tuple of (client, cache invalidation queue)
+    """
+    if sdk_session_id:
+        # Try to resume existing Claude conversation
+        logger.info(f"Attempting to resume with sdk_session_id: {sdk_session_id}")
+        try:
+            client, _, cache_queue = await session_manager.get_or_create_client(
+                room_id, build_agent_options(user_id, resume=sdk_session_id)
+            )
+            logger.info(f"✅ Successfully resumed session for room: {room_id}")
+            return client, cache_queue
+        except Exception as resume_error:
+            # Resume failed - fall back to new session
+            logger.warning(f"⚠️  Resume failed, creating new session: {resume_error}")
+
+    # New Claude conversation
+    logger.info(f"Creating new client for room: {room_id}")
+    client, _, cache_queue = await session_manager.get_or_create_client(room_id, build_agent_options(user_id))
+    logger.info(f"✅ Created new client for room: {room_id}")
+    return client, cache_queue
+
+
 async def drain_cache_queue(cache_queue: Optional[asyncio.Queue], websocket: WebSocket) -> None:
     """
     Drain all cache invalidation events from queue and send to WebSocket.
@@ -103,7 +164,8 @@ async def chat_websocket(websocket: WebSocket):
            - Otherwise: create new Claude conversation
         5. Client can send multiple messages over same connection
         6. After first message, server sends sdk_session_id to client for persistence
-        7. On disconnect, ClaudeSDKClient stays alive for reconnection
+        7. On disconnect, ClaudeSDKClient stays alive for reconnection until it is evicted
+           for being idle; a later join or message resumes it from the sdk_session_id
 
     Client → Server Messages:
         {
@@ -144,7 +206,7 @@ async def chat_websocket(websocket: WebSocket):
     # Validate auth token from query params
     token = websocket.query_params.get('token')
     try:
-        user_id = validate_websocket_token(token)
+        user_id = await validate_websocket_token(token)
         logger.info(f"🔌 WebSocket connection from authenticated user: {user_id}")
     except HTTPException as e:
         logger.error(f"WebSocket auth failed: {e.detail}")
@@ -157,6 +219,7 @@ async def chat_websocket(websocket: WebSocket):
     logger.info("✅ WebSocket ACCEPTED - waiting for messages")
 
     current_room_id: Optional[str] = None
+    current_sdk_session_id: Optional[str] = None  # Resumes the conversation if the client is evicted
     client: Optional[ClaudeSDKClient] = None
     cache_invalidate_queue: Optional[asyncio.Queue] = None
 
@@ -194,71 +257,11 @@ async def chat_websocket(websocket: WebSocket):
                         cache_invalidate_queue = await session_manager.get_cache_queue(room_id)
                         logger.info(f"Rejoined existing in-memory client for room: {room_id}, queue: {cache_invalidate_queue is not None}")
                     else:
-                        # Client not in memory - create new ClaudeSDKClient
-                        if sdk_session_id:
-                            # Try to resume existing Claude conversation
-                            logger.info(f"Attempting to resume with sdk_session_id: {sdk_session_id}")
-                            try:
-                                options = ClaudeAgentOptions(
-                                    resume=sdk_session_id,
-                                    permission_mode='bypassPermissions',
-                                    include_partial_messages=True,
-                                    mcp_servers={
-                                        'punypage_internal': {
-                                            'command': 'python',
-                                            'args': ['-m', 'mcp_servers.punypage_internal.server'],
-                                            'env': {
-                                                'PUNYPAGE_USER_ID': user_id
-                                            }
-                                        }
-                                    }
-                                )
-                                client, was_created, cache_invalidate_queue = await session_manager.get_or_create_client(
-                                    room_id, options
-                                )
-                                logger.info(f"✅ Successfully resumed session for room: {room_id}")
-                            except Exception as resume_error:
-                                # Resume failed - fall back to new session
-                                logger.warning(f"⚠️  Resume failed, creating new session: {resume_error}")
-                                options = ClaudeAgentOptions(
-                                    permission_mode='bypassPermissions',
-                                    include_partial_messages=True,
-                                    mcp_servers={
-                                        'punypage_internal': {
-                                            'command': 'python',
-                                            'args': ['-m', 'mcp_servers.punypage_internal.server'],
-                                            'env': {
-                                                'PUNYPAGE_USER_ID': user_id
-                                            }
-                                        }
-                                    }
-                                )
-                                client, was_created, cache_invalidate_queue = await session_manager.get_or_create_client(
-                                    room_id, options
-                                )
-                                logger.info(f"✅ Created new session (resume fallback) for room: {room_id}")
-                        else:
-                            # New Claude conversation
-                            options = ClaudeAgentOptions(
-                                permission_mode='bypassPermissions',
-                                include_partial_messages=True,
-                                mcp_servers={
-                                    'punypage_internal': {
-                                        'command': 'python',
-                                        'args': ['-m', 'mcp_servers.punypage_internal.server'],
-                                        'env': {
-                                            'PUNYPAGE_USER_ID': user_id
-                                        }
-                                    }
-                                }
-                            )
-                            logger.info(f"Creating new client for room: {room_id}")
-                            client, was_created, cache_invalidate_queue = await session_manager.get_or_create_client(
-                                room_id, options
-                            )
-                            logger.info(f"✅ Created new client for room: {room_id}")
+                        # Client not in memory (new room, server restart or evicted) - create it
+                        client, cache_invalidate_queue = await open_session(room_id, user_id, sdk_session_id)
 
                     current_room_id = room_id
+                    current_sdk_session_id = sdk_session_id
 
                     # Confirm successful join
                     await websocket.send_json({
@@ -287,7 +290,16 @@ async def chat_websocket(websocket: WebSocket):
                 user_message = data.get('content', '')
                 logger.info(f"Received message on room {current_room_id}: {user_message[:50]}")
 
+                # Pin the session for the turn so the reaper can't evict it mid-response
+                await session_manager.mark_active(current_room_id)
                 try:
+                    # Idle sessions may have been evicted since the last message; resume transparently
+                    if await session_manager.get_client(current_room_id) is not client:
+                        logger.info(f"Client for room {current_room_id} was evicted, resuming")
+                        client, cache_invalidate_queue = await open_session(
+                            current_room_id, user_id, current_sdk_session_id
+                        )
+
                     # Send to SAME Claude client (maintains conversation context)
                     await client.query(user_message)
 
@@ -335,6 +347,7 @@ async def chat_websocket(websocket: WebSocket):
 
                     # Send SDK session ID if we got one (for frontend to persist)
                     if sdk_session_id_to_send:
+                        current_sdk_session_id = sdk_session_id_to_send
                         await websocket.send_json({
                             'type': 'sdk_session_id',
                             'sdk_session_id': sdk_session_id_to_send
@@ -351,11 +364,14 @@ async def chat_websocket(websocket: WebSocket):
                         'type': 'error',
                         'error': str(e)
                     })
+                finally:
+                    await session_manager.mark_inactive(current_room_id)
 
             elif message_type == 'leave':
                 # Client explicitly leaving room (optional)
                 logger.info(f"Client leaving room: {current_room_id}")
                 current_room_id = None
+                current_sdk_session_id = None
                 client = None
 
             else:
@@ -363,6 +379,6 @@ async def chat_websocket(websocket: WebSocket):
 
     except WebSocketDisconnect as e:
         logger.warning(f"❌ WebSocket DISCONNECTED - room: {current_room_id}, reason: {e}")
-        # NOTE: Don't destroy ClaudeSDKClient - it stays alive for reconnection!
+        # NOTE: Don't destroy ClaudeSDKClient - it stays alive for reconnection until the reaper evicts it
     except Exception as e:
         logger.error(f"💥 WebSocket EXCEPTION - room {current_room_id}: {type(e).__name__}: {e}", exc_info=True)
@@ -2,20 +2,30 @@
 Document search and RAG ingestion API endpoints.
 
 Routes:
-- POST /api/v1/documents/search - Vector similarity search
+- POST /api/v1/documents/search - Hybrid (full-text + vector) or vector similarity search
+- POST /api/v1/documents/search/batch - Several searches with one embedding call
 - POST /api/v1/documents/ingest - Manual ingestion trigger
 - GET /api/v1/documents/health - RAG system health check
 """
 import asyncio
 import logging
-from typing import Any
+import time
+from typing import Any, Literal
+from uuid import UUID
 from fastapi import APIRouter, HTTPException, Depends, status
-from pydantic import BaseModel, Field
+from postgrest import SyncPostgrestClient
+from pydantic import BaseModel, Field, model_validator
 from supabase import Client, create_client
 
 from app.config import settings
 from app.core.dependencies import RequireAuth, get_user_supabase_client
 from app.core.rag_ingestion import get_pipeline
+from app.core.ingestion_coordinator import get_coordinator
+from app.core.indexing_queue import get_indexing_queue
+from app.core.query_embedding_cache import get_query_embedding_cache
+from app.core.search_executor import run_blocking
+from app.core.reranker import rerank
+from app.core.search_result_cache import CorpusVersion, SearchResultCache, fetch_corpus_version, get_search_result_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -27,10 +37,56 @@ service_supabase: Client = create_client(
 )
 
 
+# HNSW ef_search per accuracy/latency profile (candidate list size per query).
+# "fast" is pgvector's default; the larger values are unmeasured starting points,
+# to be tuned with scripts/bench_ann_recall.py on a real corpus
+SEARCH_PROFILES: dict[str, int] = {
+    "fast": 40,
+    "balanced": 100,
+    "accurate": 400,
+}
+
+
 class SearchRequest(BaseModel):
     """Request model for vector search"""
     query: str = Field(..., min_length=1, max_length=1000, description="Search query")
     limit: int = Field(10, ge=1, le=50, description="Number of top-k results to return")
+    mode: Literal["vector", "hybrid"] = Field(
+        "vector",
+        description="'vector' (default) ranks by cosine similarity; 'hybrid' opts in to fusing full-text and vector ranks (RRF)"
+    )
+    path_prefix: str | None = Field(
+        None,
+        max_length=1000,
+        description="Only search documents whose path starts with this prefix (e.g. '/projects/')"
+    )
+    profile: Literal["fast", "balanced", "accurate"] = Field(
+        "fast",
+        description="ANN accuracy/latency trade-off; higher profiles search more of the index (default matches pgvector's ef_search=40)"
+    )
+    fields: list[Literal["content", "metadata"]] = Field(
+        ["content", "metadata"],
+        description="Heavy per-result fields to return; omitted fields are not read from the database"
+    )
+    snippet_words: int | None = Field(
+        None,
+        ge=5,
+        le=100,
+        description="Return a highlight window of about this many words around the best match instead of the whole chunk"
+    )
+    rerank: bool = Field(
+        False,
+        description="Over-fetch candidates and re-rank them lexically; falls back to first-stage order past the latency budget"
+    )
+
+    @model_validator(mode="after")
+    def validate_rerank_snippets(self) -> "SearchRequest":
+        """Reject re-ranking on snippets, which are already centered on the query terms"""
+        if self.rerank and self.snippet_words is not None:
+            # BM25 over query-centered windows would favor whatever the snippet happened to
+            # catch rather than the whole chunk, so the two options can't be combined
+            raise ValueError("rerank cannot be combined with snippet_words")
+        return self
 
 
 class SearchResult(BaseModel):
@@ -40,30 +96,211 @@ class SearchResult(BaseModel):
     document_title: str
     document_path: str
     section_heading: str | None
-    content: str
+    content: str | None = None  # Whole chunk, or a snippet when snippet_words is set
     similarity_score: float
-    metadata: dict[str, Any]
+    rrf_score: float | None = None  # Fused rank score (hybrid mode only)
+    metadata: dict[str, Any] | None = None
 
 
 class SearchResponse(BaseModel):
     """Response model for vector search"""
     query: str
+    mode: str
+    reranked: bool = False  # False when re-ranking was off or ran out of budget
     results: list[SearchResult]
     count: int
 
 
+class BatchSearchRequest(BaseModel):
+    """Request model for batch search"""
+    searches: list[SearchRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=20,
+        description="Searches to run; each takes the same options as /search"
+    )
+
+
+class BatchSearchResponse(BaseModel):
+    """Response model for batch search, one response per search in request order"""
+    results: list[SearchResponse]
+    count: int
+
+
 class IngestionResponse(BaseModel):
     """Response model for manual ingestion trigger"""
     success: bool
     message: str
     stats: dict[str, int]
+    stages: dict[str, dict[str, float]] = {}  # Per-stage throughput and queue depth
+
+
+async def rerank_rows(query: str, rows: list[dict[str, Any]], limit: int) -> tuple[list[dict[str, Any]], bool]:
+    """
+    Re-rank over-fetched candidates within the latency budget.
+
+    Args:
+        query: Search query
+        rows: First-stage rows in first-stage order
+        limit: Number of rows to return
+
+    Returns:
+        (rows, reranked); first-stage order if scoring failed or ran out of budget
+    """
+    budget = settings.search_rerank_budget_ms / 1000
+    deadline = time.monotonic() + budget
+    try:
+        # The scorer checks the deadline itself; wait_for also bounds time spent queued
+        ranked = await asyncio.wait_for(
+            run_blocking(rerank, query, rows, limit, deadline, settings.search_rerank_lexical_weight),
+            timeout=budget
+        )
+    except asyncio.TimeoutError:
+        ranked = None
+    except Exception as e:
+        logger.error(f"Re-ranking failed, using first-stage order: {e}")
+        ranked = None
+
+    if ranked is None:
+        logger.info(f"Re-ranking exceeded {settings.search_rerank_budget_ms}ms budget, using first-stage order")
+        return rows[:limit], False
+    return ranked, True
+
+
+def search_cache_key(request: SearchRequest, user: dict) -> tuple[str, str, str]:
+    """Result cache key: user, normalized query and every option that shapes the results"""
+    return SearchResultCache.make_key(user.get("sub"), request.query, request.model_dump(exclude={"query"}))
+
+
+def is_cacheable(request: SearchRequest, response: SearchResponse) -> bool:
+    """First-stage fallbacks of re-ranked searches aren't cached, so the next attempt can re-rank"""
+    return response.reranked or not request.rerank
+
+
+async def read_corpus_version(user_supabase: SyncPostgrestClient, user: dict) -> CorpusVersion | None:
+    """
+    Read the user's corpus version for result cache lookups.
+
+    Costs a PostgREST round trip only when the version cached in this process
+    is older than SEARCH_CORPUS_VERSION_TTL_MS.
+
+    Returns:
+        Corpus version, or None if the cache is disabled or the version couldn't be read
+    """
+    cache = get_search_result_cache()
+    if not cache.enabled:
+        return None
+    user_id = user.get("sub")
+    try:
+        return await run_blocking(cache.get_version, user_id, lambda: fetch_corpus_version(user_supabase, user_id))
+    except Exception as e:
+        logger.warning(f"Failed to read corpus version, bypassing search result cache: {e}")
+        return None
+
+
+def embed_queries(texts: list[str]) -> list[list[float]]:
+    """Embed query texts in one OpenAI call, returned in input order"""
+    embedding_response = get_pipeline().openai_client.embeddings.create(
+        model=settings.openai_embedding_model,
+        input=texts
+    )
+    return [item.embedding for item in sorted(embedding_response.data, key=lambda item: item.index)]
 
 
-@router.post("/search", response_model=SearchResponse)
+async def run_search(
+    request: SearchRequest,
+    query_embedding: list[float],
+    user: dict,
+    user_supabase: SyncPostgrestClient
+) -> SearchResponse:
+    """
+    Run the search RPC for one embedded query and build its response.
+
+    Args:
+        request: Search request
+        query_embedding: Embedding of request.query
+        user: Authenticated user claims
+        user_supabase: User-scoped PostgREST client
+
+    Returns:
+        Search response for the request
+    """
+    # Search using user-scoped client (pass user_id explicitly since auth.uid() doesn't work via RPC)
+    # Using top-k retrieval (no threshold filtering)
+    # Re-ranking needs a larger candidate pool and the text to score it on
+    match_count = request.limit * settings.search_rerank_overfetch if request.rerank else request.limit
+    params = {
+        "query_embedding": query_embedding,
+        "match_count": match_count,
+        "filter_user_id": user.get("sub"),  # Pass user ID from JWT
+        "path_prefix": request.path_prefix,  # Filtered inside the index scan
+        "ef_search": SEARCH_PROFILES[request.profile],
+        "ann_index": settings.rag_ann_index,
+        "rerank_factor": settings.rag_ann_rerank_factor,
+        # Projection: the database only ships the columns the caller asked for
+        "query_text": request.query,
+        "include_content": "content" in request.fields or request.rerank,
+        "include_metadata": "metadata" in request.fields,
+        "snippet_words": request.snippet_words
+    }
+    if request.mode == "hybrid":
+        # Lexical and vector retrieval fused in the same round trip
+        function_name = "hybrid_search_document_chunks"
+    else:
+        function_name = "search_document_chunks"
+
+    logger.info(f"Calling {function_name} with limit={match_count}, user_id={user.get('sub')}")
+    response = await run_blocking(user_supabase.rpc(function_name, params).execute)
+
+    rows = response.data[:request.limit]
+    reranked = False
+    if request.rerank:
+        rows, reranked = await rerank_rows(request.query, response.data, request.limit)
+
+    logger.info(f"SQL function returned {len(response.data)} rows")
+    if len(response.data) > 0:
+        first = response.data[0]
+        logger.info(f"Top result: {first.get('document_title') or 'Unknown'} - similarity: {first.get('similarity', 'N/A')}")
+        if len(response.data) > 1:
+            second = response.data[1]
+            logger.info(f"2nd result: {second.get('document_title') or 'Unknown'} - similarity: {second.get('similarity', 'N/A')}")
+
+    # Parse results; fields that weren't requested are left unset and omitted
+    results = []
+    include_content = "content" in request.fields or request.snippet_words is not None
+    for row in rows:
+        result = SearchResult(
+            chunk_id=row["id"],
+            document_id=row["document_id"],
+            document_title=row["document_title"] or "Untitled",
+            document_path=row["document_path"],
+            section_heading=row["section_heading"],
+            similarity_score=row["similarity"]
+        )
+        if include_content and row.get("content") is not None:
+            result.content = row["content"]
+        if row.get("metadata") is not None:
+            result.metadata = row["metadata"]
+        if row.get("rrf_score") is not None:
+            result.rrf_score = row["rrf_score"]
+        results.append(result)
+
+    logger.info(f"Found {len(results)} results for query")
+
+    return SearchResponse(
+        query=request.query,
+        mode=request.mode,
+        reranked=reranked,
+        results=results,
+        count=len(results)
+    )
+
+
+@router.post("/search", response_model=SearchResponse, response_model_exclude_unset=True)
 async def search_documents(
     request: SearchRequest,
     user: dict = RequireAuth,
-    user_supabase: Client = Depends(get_user_supabase_client)
+    user_supabase: SyncPostgrestClient = Depends(get_user_supabase_client)
 ) -> SearchResponse:
     """
     Search documents using vector similarity.
@@ -72,70 +309,90 @@ async def search_documents(
     Results are filtered by user access via RLS policies enforced by auth.uid().
     """
     try:
-        # Get OpenAI client from pipeline (shared instance)
-        pipeline = get_pipeline()
-        openai_client = pipeline.openai_client
-
         # Debug: Log user info
         logger.info(f"Search request from user: {user.get('id', 'unknown')}")
         logger.info(f"Full user object: {user}")
 
-        # Generate embedding for query
+        # Repeat searches are answered from the result cache until the user's chunks change
+        cache = get_search_result_cache()
+        corpus_version = await read_corpus_version(user_supabase, user)
+        cache_key = search_cache_key(request, user)
+        if corpus_version is not None:
+            cached = cache.get(cache_key, corpus_version)
+            if cached is not None:
+                logger.info(f"Search result cache hit for query: {request.query[:50]}")
+                return cached.model_copy(update={"query": request.query})
+
+        # Generate embedding for query (repeat queries are served from the cache)
         logger.info(f"Generating embedding for query: {request.query[:50]}...")
-        embedding_response = openai_client.embeddings.create(
-            model=settings.openai_embedding_model,
-            input=request.query
-        )
-        query_embedding = embedding_response.data[0].embedding
-        logger.info(f"Generated embedding with {len(query_embedding)} dimensions")
-
-        # Search using user-scoped client (pass user_id explicitly since auth.uid() doesn't work via RPC)
-        # Using top-k retrieval (no threshold filtering)
-        logger.info(f"Calling search_document_chunks with limit={request.limit}, user_id={user.get('sub')}")
-        response = user_supabase.rpc(
-            "search_document_chunks",
-            {
-                "query_embedding": query_embedding,
-                "match_count": request.limit,
-                "filter_user_id": user.get("sub")  # Pass user ID from JWT
-            }
-        ).execute()
-
-        logger.info(f"SQL function returned {len(response.data)} rows")
-        if len(response.data) > 0:
-            first = response.data[0]
-            logger.info(f"Top result: {first.get('metadata', {}).get('document_title', 'Unknown')} - similarity: {first.get('similarity', 'N/A')}")
-            if len(response.data) > 1:
-                second = response.data[1]
-                logger.info(f"2nd result: {second.get('metadata', {}).get('document_title', 'Unknown')} - similarity: {second.get('similarity', 'N/A')}")
-
-        # Parse results
-        results = []
-        for row in response.data:
-            results.append(SearchResult(
-                chunk_id=row["id"],
-                document_id=row["document_id"],
-                document_title=row["metadata"].get("document_title", "Untitled"),
-                document_path=row["document_path"],
-                section_heading=row["section_heading"],
-                content=row["content"],
-                similarity_score=row["similarity"],
-                metadata=row["metadata"]
-            ))
-
-        logger.info(f"Found {len(results)} results for query")
-
-        return SearchResponse(
-            query=request.query,
-            results=results,
-            count=len(results)
+
+        # Blocking client calls run on the search pool so the event loop stays free
+        query_embedding = await run_blocking(
+            get_query_embedding_cache().get_embedding, request.query, lambda text: embed_queries([text])[0]
         )
+        logger.info(f"Got embedding with {len(query_embedding)} dimensions")
+
+        response = await run_search(request, query_embedding, user, user_supabase)
+        if corpus_version is not None and is_cacheable(request, response):
+            cache.put(cache_key, corpus_version, response)
+        return response
 
     except Exception as e:
         logger.error(f"Error in vector search: {e}", exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Search failed: {str(e)}")
 
 
+@router.post("/search/batch", response_model=BatchSearchResponse, response_model_exclude_unset=True)
+async def batch_search_documents(
+    request: BatchSearchRequest,
+    user: dict = RequireAuth,
+    user_supabase: SyncPostgrestClient = Depends(get_user_supabase_client)
+) -> BatchSearchResponse:
+    """
+    Run several searches in one request.
+
+    All queries that miss the embedding cache are embedded in a single OpenAI
+    call and the search RPCs run concurrently, so N queries cost about one
+    round trip. Searches in the result cache skip both. Responses are
+    returned in request order.
+    """
+    try:
+        logger.info(f"Batch search request with {len(request.searches)} queries from user: {user.get('sub')}")
+
+        cache = get_search_result_cache()
+        corpus_version = await read_corpus_version(user_supabase, user)
+        cache_keys = [search_cache_key(search, user) for search in request.searches]
+        responses: list[SearchResponse | None] = [None] * len(request.searches)
+        if corpus_version is not None:
+            for i, (search, cache_key) in enumerate(zip(request.searches, cache_keys)):
+                cached = cache.get(cache_key, corpus_version)
+                if cached is not None:
+                    responses[i] = cached.model_copy(update={"query": search.query})
+
+        pending = [i for i, response in enumerate(responses) if response is None]
+        if pending:
+            query_embeddings = await run_blocking(
+                get_query_embedding_cache().get_embeddings,
+                [request.searches[i].query for i in pending],
+                embed_queries
+            )
+
+            searched = await asyncio.gather(*[
+                run_search(request.searches[i], query_embedding, user, user_supabase)
+                for i, query_embedding in zip(pending, query_embeddings)
+            ])
+            for i, response in zip(pending, searched):
+                responses[i] = response
+                if corpus_version is not None and is_cacheable(request.searches[i], response):
+                    cache.put(cache_keys[i], corpus_version, response)
+
+        return BatchSearchResponse(results=list(responses), count=len(responses))
+
+    except Exception as e:
+        logger.error(f"Error in batch search: {e}", exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Batch search failed: {str(e)}")
+
+
 @router.post("/ingest", response_model=IngestionResponse)
 async def trigger_ingestion(user: dict = RequireAuth) -> IngestionResponse:
     """
@@ -146,18 +403,25 @@ async def trigger_ingestion(user: dict = RequireAuth) -> IngestionResponse:
     """
     try:
         logger.info("Manual ingestion triggered")
-        pipeline = get_pipeline()
 
-        # Run blocking operation in executor to avoid blocking event loop
-        loop = asyncio.get_event_loop()
-        stats = await loop.run_in_executor(None, pipeline.run)
+        # Single-flight: attaches to a scheduled run if one is already in progress
+        stats = await get_coordinator().run()
+
+        if stats is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Ingestion is already running in another worker"
+            )
 
         return IngestionResponse(
             success=True,
             message=f"Ingestion completed: {stats['processed']} processed, {stats['failed']} failed",
-            stats=stats
+            stats=stats,
+            stages=get_pipeline().last_stage_metrics
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in manual ingestion: {e}", exc_info=True)
         raise HTTPException(
@@ -166,6 +430,30 @@ async def trigger_ingestion(user: dict = RequireAuth) -> IngestionResponse:
         )
 
 
+@router.post("/{document_id}/changed", status_code=status.HTTP_202_ACCEPTED)
+async def document_changed(
+    document_id: UUID,
+    user: dict = RequireAuth,
+    user_supabase: SyncPostgrestClient = Depends(get_user_supabase_client)
+) -> dict[str, bool]:
+    """
+    Queue a document for indexing after the editor saved it.
+
+    The editor writes documents straight to Supabase, so it calls this after
+    each create or update to get the same seconds-level indexing as agent edits
+    instead of waiting for the polling safety net.
+    """
+    # RLS: only documents the caller can see are queued
+    response = await run_blocking(
+        user_supabase.table("documents").select("id").eq("id", str(document_id)).limit(1).execute
+    )
+    if not response.data:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+    get_indexing_queue().notify(str(document_id))
+    return {"queued": True}
+
+
 @router.get("/health")
 async def rag_health() -> dict[str, str]:
     """Health check endpoint for RAG system"""
@@ -175,10 +463,10 @@ async def rag_health() -> dict[str, str]:
         openai_client = pipeline.openai_client
 
         # Test OpenAI connection
-        openai_client.models.list()
+        await run_blocking(openai_client.models.list)
 
         # Test Supabase connection
-        service_supabase.table("documents").select("id").limit(1).execute()
+        await run_blocking(service_supabase.table("documents").select("id").limit(1).execute)
 
         return {"status": "healthy", "message": "RAG system operational"}
 
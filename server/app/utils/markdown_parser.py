@@ -2,10 +2,20 @@
 Markdown parser and chunker for RAG indexing.
 Parses markdown format, extracts text with heading context, and chunks for embedding.
 """
+import os
+import re
 import tiktoken
 import mistune
 from typing import Any, TypedDict
 
+# Whitespace that follows sentence-ending punctuation
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+
+# Below this many texts (or on a single core), inline encoding beats
+# tiktoken's threaded batch encoder
+BATCH_ENCODE_MIN_TEXTS = 32
+BATCH_ENCODE_THREADS = min(8, os.cpu_count() or 1)
+
 
 class Chunk(TypedDict):
     """Represents a parsed chunk of content"""
@@ -19,23 +29,71 @@ class MarkdownParser:
     """
     Parser for Markdown documents.
 
-    Uses paragraph-level chunking where each paragraph becomes a separate chunk
-    with heading context preserved for better semantic retrieval.
+    Uses token-aware chunking: adjacent small paragraphs/lists/blockquotes under the
+    same section heading are merged up to a target token budget, and oversized ones
+    are split at sentence boundaries, with heading context preserved for better
+    semantic retrieval.
     """
 
-    def __init__(self, encoding_name: str = "cl100k_base"):
+    def __init__(
+        self,
+        encoding_name: str = "cl100k_base",
+        target_tokens: int = 400,
+        max_tokens: int = 1000,
+        overlap_tokens: int = 0
+    ):
         """
         Initialize parser.
 
         Args:
             encoding_name: Tiktoken encoding to use for token counting (default: cl100k_base)
+            target_tokens: Token budget that small adjacent nodes are merged up to
+            max_tokens: Hard cap on chunk size, overlap included; nodes larger
+                than this are split at sentence boundaries, and target_tokens
+                is clamped to it
+            overlap_tokens: Tokens from the end of the previous chunk in the same
+                section to repeat at the start of the next one (0 disables overlap)
         """
         self.encoder = tiktoken.get_encoding(encoding_name)
         self.markdown_parser = mistune.create_markdown(renderer='ast')
+        self.target_tokens = target_tokens
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self._separator_ids = self.encoder.encode_ordinary("\n\n")  # Between merged pieces
+        self._space_ids = self.encoder.encode_ordinary(" ")  # Between sentences and after overlap
+
+    @property
+    def size_limit(self) -> int:
+        """Largest piece size that still fits max_tokens once overlap (and a separator) is prepended"""
+        overhead = self.overlap_tokens + 1 if self.overlap_tokens else 0
+        return max(1, self.max_tokens - overhead)
+
+    @property
+    def pack_limit(self) -> int:
+        """Size pieces are packed up to: target_tokens, but never past what fits max_tokens"""
+        return min(self.target_tokens, self.size_limit)
 
     def count_tokens(self, text: str) -> int:
         """Count tokens in text using tiktoken"""
-        return len(self.encoder.encode(text))
+        return len(self.encoder.encode_ordinary(text))
+
+    def encode_many(self, texts: list[str]) -> list[list[int]]:
+        """
+        Tokenize many texts in one call.
+
+        Large batches go through tiktoken's parallel batch encoder (the Rust core
+        releases the GIL); small ones, or any batch on a single core, are encoded
+        inline, where the batch encoder's thread pool would cost more than it saves.
+
+        Args:
+            texts: Texts to tokenize
+
+        Returns:
+            Token IDs for each text, in order
+        """
+        if BATCH_ENCODE_THREADS > 1 and len(texts) >= BATCH_ENCODE_MIN_TEXTS:
+            return self.encoder.encode_ordinary_batch(texts, num_threads=BATCH_ENCODE_THREADS)
+        return [self.encoder.encode_ordinary(text) for text in texts]
 
     def extract_text_from_token(self, token: dict[str, Any]) -> str:
         """
@@ -47,18 +105,25 @@ class MarkdownParser:
         Returns:
             Extracted text content
         """
+        parts: list[str] = []
+        self._collect_text(token, parts)
+        return " ".join(parts)
+
+    def _collect_text(self, token: dict[str, Any], parts: list[str]) -> None:
+        """Append the non-empty text leaves under token to parts, in document order"""
         token_type = token.get("type", "")
 
-        # Text token - return raw text
+        # Text token - collect raw text
         if token_type == "text":
-            return token.get("raw", "")
+            raw = token.get("raw", "")
+            if raw:
+                parts.append(raw)
+            return
 
-        # For tokens with children, recursively extract
+        # For tokens with children, recursively collect
         if "children" in token and isinstance(token["children"], list):
-            texts = [self.extract_text_from_token(child) for child in token["children"]]
-            return " ".join(filter(None, texts))
-
-        return ""
+            for child in token["children"]:
+                self._collect_text(child, parts)
 
     def parse_tokens(self, markdown_text: str) -> list[dict[str, Any]]:
         """
@@ -117,10 +182,88 @@ class MarkdownParser:
 
         return nodes
 
+    def split_text(self, text: str) -> list[tuple[str, list[int]]]:
+        """
+        Split text that exceeds the chunk size limit at sentence boundaries.
+        Sentences are packed up to pack_limit; a single sentence over the limit
+        is cut into limit-sized token windows as a last resort.
+
+        Args:
+            text: Text to split
+
+        Returns:
+            List of (piece_text, token_ids) where token_ids concatenates the
+            sentences' IDs and separators, so decoding them gives piece_text
+        """
+        sentences = SENTENCE_BOUNDARY.split(text)
+        pieces: list[tuple[str, list[int]]] = []
+        current: list[str] = []
+        current_ids: list[int] = []
+
+        for sentence, sentence_ids in zip(sentences, self.encode_many(sentences)):
+            separator = self._space_ids if current else []
+            if current and len(current_ids) + len(separator) + len(sentence_ids) > self.pack_limit:
+                pieces.append((" ".join(current), current_ids))
+                current = []
+                current_ids = []
+                separator = []
+
+            if len(sentence_ids) > self.size_limit:
+                for start in range(0, len(sentence_ids), self.size_limit):
+                    window = sentence_ids[start:start + self.size_limit]
+                    pieces.append((self.encoder.decode(window), window))
+                continue
+
+            current.append(sentence)
+            current_ids.extend(separator)
+            current_ids.extend(sentence_ids)
+
+        if current:
+            pieces.append((" ".join(current), current_ids))
+
+        return pieces
+
+    def merge_pieces(self, pieces: list[tuple[str, list[int]]]) -> list[tuple[str, list[int]]]:
+        """
+        Merge adjacent pieces of one section up to pack_limit.
+
+        Args:
+            pieces: List of (text, token_ids) in document order
+
+        Returns:
+            List of (merged_text, token_ids) where token_ids concatenates the pieces'
+            IDs and separators, so no merged text needs to be re-tokenized
+        """
+        merged: list[tuple[str, list[int]]] = []
+        current: list[str] = []
+        current_ids: list[int] = []
+
+        for text, ids in pieces:
+            separator = self._separator_ids if current else []
+            if current and len(current_ids) + len(separator) + len(ids) > self.pack_limit:
+                merged.append(("\n\n".join(current), current_ids))
+                current = []
+                current_ids = []
+                separator = []
+
+            current.append(text)
+            current_ids.extend(separator)
+            current_ids.extend(ids)
+
+        if current:
+            merged.append(("\n\n".join(current), current_ids))
+
+        return merged
+
     def chunk_nodes(self, nodes: list[dict[str, Any]]) -> list[Chunk]:
         """
-        Chunk parsed nodes by paragraph.
-        Each paragraph becomes a separate chunk with heading context.
+        Chunk parsed nodes into token-bounded chunks with heading context.
+
+        Consecutive paragraphs/lists/blockquotes under the same section heading are
+        merged up to target_tokens; nodes that would exceed max_tokens are split first.
+        All node texts are tokenized in one batch and their token IDs reused for
+        sizing, splitting, overlap and the final token counts, so no text is
+        tokenized twice.
 
         Args:
             nodes: List of parsed nodes from parse_tokens()
@@ -128,9 +271,10 @@ class MarkdownParser:
         Returns:
             List of chunks with text, heading context, and metadata
         """
-        chunks: list[Chunk] = []
+        # Group content nodes into runs that share a section heading
+        sections: list[tuple[str | None, list[str]]] = []
         current_heading: str | None = None
-        chunk_index = 0
+        node_texts: list[str] = []
 
         for node in nodes:
             # Update heading context
@@ -140,17 +284,42 @@ class MarkdownParser:
                     current_heading = node["text"]
                 continue
 
-            # Each paragraph/list/blockquote becomes its own chunk
-            text = node["text"]
-            text_tokens = self.count_tokens(text)
-
-            chunks.append({
-                "text": text,
-                "section_heading": current_heading,
-                "chunk_index": chunk_index,
-                "token_count": text_tokens
-            })
-            chunk_index += 1
+            if not sections or sections[-1][0] != current_heading:
+                sections.append((current_heading, []))
+            sections[-1][1].append(node["text"])
+            node_texts.append(node["text"])
+
+        node_ids = iter(self.encode_many(node_texts))
+
+        chunks: list[Chunk] = []
+        chunk_index = 0
+
+        for heading, texts in sections:
+            pieces: list[tuple[str, list[int]]] = []
+            for text in texts:
+                ids = next(node_ids)
+                if len(ids) > self.size_limit:
+                    pieces.extend(self.split_text(text))
+                else:
+                    pieces.append((text, ids))
+
+            previous_ids: list[int] | None = None
+            for text, ids in self.merge_pieces(pieces):
+                chunk_text = text
+                token_count = len(ids)
+                if self.overlap_tokens and previous_ids:
+                    tail_ids = previous_ids[-self.overlap_tokens:]
+                    chunk_text = f"{self.encoder.decode(tail_ids).strip()} {text}"
+                    token_count += len(tail_ids) + len(self._space_ids)
+                previous_ids = ids
+
+                chunks.append({
+                    "text": chunk_text,
+                    "section_heading": heading,
+                    "chunk_index": chunk_index,
+                    "token_count": token_count
+                })
+                chunk_index += 1
 
         return chunks
 
@@ -29,6 +29,16 @@ def get_supabase_client() -> Client:
     return _supabase_client
 
 
+def set_supabase_client(client: Client) -> None:
+    """
+    Use an existing service role client.
+    Lets the in-process server share the API server's client instead of
+    building its own from environment variables.
+    """
+    global _supabase_client
+    _supabase_client = client
+
+
 def get_user_id() -> str:
     """
     Get user_id from environment variable.
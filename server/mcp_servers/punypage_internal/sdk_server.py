@@ -0,0 +1,39 @@
+"""In-process Punypage Internal MCP server
+
+Serves the document tools from inside the API server process through the
+Claude Agent SDK, so chat sessions don't each spawn a Python subprocess. The
+server object is cheap; imports and the Supabase client are shared by every
+session. Each session gets its own instance with the acting user bound in, so
+the model never supplies (or overrides) a user ID.
+"""
+from typing import Any
+from claude_agent_sdk import McpSdkServerConfig, SdkMcpTool, create_sdk_mcp_server
+
+from .tools.registry import TOOL_DEFINITIONS, run_tool
+
+SERVER_NAME = "punypage_internal"
+
+
+def _make_tool(name: str, description: str, input_schema: dict[str, Any], user_id: str) -> SdkMcpTool[Any]:
+    async def handler(arguments: dict[str, Any]) -> dict[str, Any]:
+        text = await run_tool(name, arguments, user_id)
+        return {"content": [{"type": "text", "text": text}]}
+
+    return SdkMcpTool(name=name, description=description, input_schema=input_schema, handler=handler)
+
+
+def create_punypage_server(user_id: str) -> McpSdkServerConfig:
+    """
+    Create the document tools server for one user's chat session.
+
+    Args:
+        user_id: User every tool call acts as
+
+    Returns:
+        Server config for ClaudeAgentOptions.mcp_servers[SERVER_NAME]
+    """
+    tools = [
+        _make_tool(name, description, input_model.model_json_schema(), user_id)
+        for name, (description, input_model) in TOOL_DEFINITIONS.items()
+    ]
+    return create_sdk_mcp_server(name=SERVER_NAME, tools=tools)
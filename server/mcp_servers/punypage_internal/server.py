@@ -1,7 +1,9 @@
 """Punypage Internal MCP Server
 
 Provides document CRUD operations for Claude Agent.
-Runs as a subprocess spawned by the chat agent.
+The chat agent serves these tools in-process (see sdk_server.py); this stdio
+entry point runs them as a standalone server, with the acting user taken from
+PUNYPAGE_USER_ID.
 """
 import asyncio
 import logging
@@ -9,20 +11,7 @@ from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
-from .tools.schemas import (
-    CreateDocumentInput,
-    UpdateDocumentInput,
-    ReadDocumentInput,
-    DeleteDocumentInput,
-    ListDocumentsInput,
-)
-from .tools.documents import (
-    create_document,
-    update_document,
-    read_document,
-    delete_document,
-    list_documents,
-)
+from .tools.registry import TOOL_DEFINITIONS, run_tool
 
 # Configure logging
 logging.basicConfig(
@@ -38,99 +27,17 @@ server = Server("punypage_internal")
 @server.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools"""
-    logger.info("list_tools() called - returning 5 document tools")
+    logger.info(f"list_tools() called - returning {len(TOOL_DEFINITIONS)} document tools")
     return [
-        Tool(
-            name="create_document",
-            description="Create a new document, article, post, report, note, or any written content with markdown formatting. Use this when the user asks to: create, write, draft, compose, author, or start a new document/article/post/report/blog/essay/note. The content will be stored and displayed in the document editor.",
-            inputSchema=CreateDocumentInput.model_json_schema(),
-        ),
-        Tool(
-            name="update_document",
-            description="Update, edit, modify, revise, or change an existing document/article/post/report. Use this when the user asks to edit, modify, update, revise, change, or improve existing content. Provide only the fields that need to be changed.",
-            inputSchema=UpdateDocumentInput.model_json_schema(),
-        ),
-        Tool(
-            name="read_document",
-            description="Read a document by ID. Use this to retrieve document content before editing or when the user asks to view a document.",
-            inputSchema=ReadDocumentInput.model_json_schema(),
-        ),
-        Tool(
-            name="delete_document",
-            description="Delete a document by ID. Use this when the user asks to delete or remove a document.",
-            inputSchema=DeleteDocumentInput.model_json_schema(),
-        ),
-        Tool(
-            name="list_documents",
-            description="List documents with optional filters. Use this when the user asks to see their documents, browse a folder, or find documents in a specific location.",
-            inputSchema=ListDocumentsInput.model_json_schema(),
-        ),
+        Tool(name=name, description=description, inputSchema=input_model.model_json_schema())
+        for name, (description, input_model) in TOOL_DEFINITIONS.items()
     ]
 
 
 @server.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Handle tool calls"""
-    logger.info(f"Tool called: {name} with arguments: {arguments}")
-
-    try:
-        if name == "create_document":
-            input_data = CreateDocumentInput(**arguments)
-            result = await create_document(input_data)
-            return [TextContent(
-                type="text",
-                text=f"Successfully created document '{result.title}' (ID: {result.id}) at path '{result.path}'. Content length: {len(result.content_md)} characters."
-            )]
-
-        elif name == "update_document":
-            input_data = UpdateDocumentInput(**arguments)
-            result = await update_document(input_data)
-            return [TextContent(
-                type="text",
-                text=f"Successfully updated document '{result.title}' (ID: {result.id}). Content length: {len(result.content_md)} characters."
-            )]
-
-        elif name == "read_document":
-            input_data = ReadDocumentInput(**arguments)
-            result = await read_document(input_data)
-            return [TextContent(
-                type="text",
-                text=f"Document: {result.title}\nPath: {result.path}\nStatus: {result.status}\n\nContent:\n{result.content_md}"
-            )]
-
-        elif name == "delete_document":
-            input_data = DeleteDocumentInput(**arguments)
-            result = await delete_document(input_data)
-            return [TextContent(
-                type="text",
-                text=f"Successfully deleted document with ID: {result.deleted_id}"
-            )]
-
-        elif name == "list_documents":
-            input_data = ListDocumentsInput(**arguments)
-            results = await list_documents(input_data)
-
-            if not results:
-                return [TextContent(type="text", text="No documents found.")]
-
-            # Format as table
-            lines = ["Documents:\n"]
-            for doc in results:
-                doc_type = "📁" if doc.is_folder else "📄"
-                lines.append(f"{doc_type} {doc.title} (ID: {doc.id})")
-                lines.append(f"   Path: {doc.path} | Status: {doc.status}")
-
-            return [TextContent(type="text", text="\n".join(lines))]
-
-        else:
-            raise ValueError(f"Unknown tool: {name}")
-
-    except Exception as e:
-        logger.error(f"Tool execution failed: {e}", exc_info=True)
-        return [TextContent(
-            type="text",
-            text=f"Error: {str(e)}"
-        )]
+    return [TextContent(type="text", text=await run_tool(name, arguments))]
 
 
 async def main():
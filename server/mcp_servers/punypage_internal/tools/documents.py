@@ -1,6 +1,7 @@
 """Document CRUD tool implementations"""
+import asyncio
 import logging
-from typing import Any
+from typing import Any, Optional
 from .schemas import (
     CreateDocumentInput,
     UpdateDocumentInput,
@@ -16,12 +17,13 @@ from ..db.supabase import get_supabase_client, get_user_id
 logger = logging.getLogger(__name__)
 
 
-async def create_document(input_data: CreateDocumentInput) -> DocumentOutput:
+async def create_document(input_data: CreateDocumentInput, user_id: Optional[str] = None) -> DocumentOutput:
     """
     Create a new document.
 
     Args:
         input_data: Document creation parameters
+        user_id: Acting user; defaults to PUNYPAGE_USER_ID (stdio server)
 
     Returns:
         Created document with all fields
@@ -30,11 +32,11 @@ async def create_document(input_data: CreateDocumentInput) -> DocumentOutput:
         Exception: If document creation fails
     """
     client = get_supabase_client()
-    user_id = get_user_id()
+    user_id = user_id or get_user_id()
 
     try:
         # Insert document into Supabase
-        result = client.table('documents').insert({
+        result = await asyncio.to_thread(client.table('documents').insert({
             'title': input_data.title,
             'content': input_data.content_md,  # Store markdown as TEXT
             'path': input_data.path,
@@ -42,7 +44,7 @@ async def create_document(input_data: CreateDocumentInput) -> DocumentOutput:
             'user_id': user_id,
             'status': input_data.status,
             'metadata': input_data.metadata,
-        }).execute()
+        }).execute)
 
         if not result.data:
             raise Exception("Failed to create document: no data returned")
@@ -68,12 +70,13 @@ async def create_document(input_data: CreateDocumentInput) -> DocumentOutput:
         raise Exception(f"Failed to create document: {str(e)}")
 
 
-async def update_document(input_data: UpdateDocumentInput) -> DocumentOutput:
+async def update_document(input_data: UpdateDocumentInput, user_id: Optional[str] = None) -> DocumentOutput:
     """
     Update an existing document.
 
     Args:
         input_data: Document update parameters
+        user_id: Acting user; defaults to PUNYPAGE_USER_ID (stdio server)
 
     Returns:
         Updated document with all fields
@@ -82,7 +85,7 @@ async def update_document(input_data: UpdateDocumentInput) -> DocumentOutput:
         Exception: If document update fails or not found
     """
     client = get_supabase_client()
-    user_id = get_user_id()
+    user_id = user_id or get_user_id()
 
     try:
         # Build update payload (only include provided fields)
@@ -104,7 +107,7 @@ async def update_document(input_data: UpdateDocumentInput) -> DocumentOutput:
             raise Exception("No fields provided for update")
 
         # Update document (RLS will ensure user owns it)
-        result = client.table('documents').update(update_data).eq('id', input_data.id).eq('user_id', user_id).execute()
+        result = await asyncio.to_thread(client.table('documents').update(update_data).eq('id', input_data.id).eq('user_id', user_id).execute)
 
         if not result.data:
             raise Exception(f"Document not found or unauthorized: {input_data.id}")
@@ -130,12 +133,13 @@ async def update_document(input_data: UpdateDocumentInput) -> DocumentOutput:
         raise Exception(f"Failed to update document: {str(e)}")
 
 
-async def read_document(input_data: ReadDocumentInput) -> DocumentOutput:
+async def read_document(input_data: ReadDocumentInput, user_id: Optional[str] = None) -> DocumentOutput:
     """
     Read a document by ID.
 
     Args:
         input_data: Document ID to read
+        user_id: Acting user; defaults to PUNYPAGE_USER_ID (stdio server)
 
     Returns:
         Document with all fields
@@ -144,11 +148,11 @@ async def read_document(input_data: ReadDocumentInput) -> DocumentOutput:
         Exception: If document not found or unauthorized
     """
     client = get_supabase_client()
-    user_id = get_user_id()
+    user_id = user_id or get_user_id()
 
     try:
         # Read document (RLS will ensure user owns it)
-        result = client.table('documents').select('*').eq('id', input_data.id).eq('user_id', user_id).execute()
+        result = await asyncio.to_thread(client.table('documents').select('*').eq('id', input_data.id).eq('user_id', user_id).execute)
 
         if not result.data:
             raise Exception(f"Document not found or unauthorized: {input_data.id}")
@@ -174,12 +178,13 @@ async def read_document(input_data: ReadDocumentInput) -> DocumentOutput:
         raise Exception(f"Failed to read document: {str(e)}")
 
 
-async def delete_document(input_data: DeleteDocumentInput) -> DeleteDocumentOutput:
+async def delete_document(input_data: DeleteDocumentInput, user_id: Optional[str] = None) -> DeleteDocumentOutput:
     """
     Delete a document by ID.
 
     Args:
         input_data: Document ID to delete
+        user_id: Acting user; defaults to PUNYPAGE_USER_ID (stdio server)
 
     Returns:
         Deletion confirmation
@@ -188,11 +193,11 @@ async def delete_document(input_data: DeleteDocumentInput) -> DeleteDocumentOutp
         Exception: If document deletion fails or not found
     """
     client = get_supabase_client()
-    user_id = get_user_id()
+    user_id = user_id or get_user_id()
 
     try:
         # Delete document (RLS will ensure user owns it)
-        result = client.table('documents').delete().eq('id', input_data.id).eq('user_id', user_id).execute()
+        result = await asyncio.to_thread(client.table('documents').delete().eq('id', input_data.id).eq('user_id', user_id).execute)
 
         if not result.data:
             raise Exception(f"Document not found or unauthorized: {input_data.id}")
@@ -209,12 +214,13 @@ async def delete_document(input_data: DeleteDocumentInput) -> DeleteDocumentOutp
         raise Exception(f"Failed to delete document: {str(e)}")
 
 
-async def list_documents(input_data: ListDocumentsInput) -> list[DocumentListItem]:
+async def list_documents(input_data: ListDocumentsInput, user_id: Optional[str] = None) -> list[DocumentListItem]:
     """
     List documents with optional filters.
 
     Args:
         input_data: List filters (path, is_folder)
+        user_id: Acting user; defaults to PUNYPAGE_USER_ID (stdio server)
 
     Returns:
         List of documents (minimal info)
@@ -223,7 +229,7 @@ async def list_documents(input_data: ListDocumentsInput) -> list[DocumentListIte
         Exception: If listing fails
     """
     client = get_supabase_client()
-    user_id = get_user_id()
+    user_id = user_id or get_user_id()
 
     try:
         # Build query
@@ -235,8 +241,8 @@ async def list_documents(input_data: ListDocumentsInput) -> list[DocumentListIte
         if input_data.is_folder is not None:
             query = query.eq('is_folder', input_data.is_folder)
 
-        # Execute query
-        result = query.order('created_at', desc=True).execute()
+        # Execute query off the event loop (the in-process server shares it with the app)
+        result = await asyncio.to_thread(query.order('created_at', desc=True).execute)
 
         logger.info(f"Listed {len(result.data)} documents")
 
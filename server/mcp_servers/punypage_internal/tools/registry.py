@@ -0,0 +1,103 @@
+"""Tool registry shared by the stdio server and the in-process SDK server"""
+import logging
+from typing import Optional
+from pydantic import BaseModel
+from .schemas import (
+    CreateDocumentInput,
+    UpdateDocumentInput,
+    ReadDocumentInput,
+    DeleteDocumentInput,
+    ListDocumentsInput,
+)
+from .documents import (
+    create_document,
+    update_document,
+    read_document,
+    delete_document,
+    list_documents,
+)
+
+logger = logging.getLogger(__name__)
+
+# Tool name -> (description, input schema)
+TOOL_DEFINITIONS: dict[str, tuple[str, type[BaseModel]]] = {
+    "create_document": (
+        "Create a new document, article, post, report, note, or any written content with markdown formatting. Use this when the user asks to: create, write, draft, compose, author, or start a new document/article/post/report/blog/essay/note. The content will be stored and displayed in the document editor.",
+        CreateDocumentInput,
+    ),
+    "update_document": (
+        "Update, edit, modify, revise, or change an existing document/article/post/report. Use this when the user asks to edit, modify, update, revise, change, or improve existing content. Provide only the fields that need to be changed.",
+        UpdateDocumentInput,
+    ),
+    "read_document": (
+        "Read a document by ID. Use this to retrieve document content before editing or when the user asks to view a document.",
+        ReadDocumentInput,
+    ),
+    "delete_document": (
+        "Delete a document by ID. Use this when the user asks to delete or remove a document.",
+        DeleteDocumentInput,
+    ),
+    "list_documents": (
+        "List documents with optional filters. Use this when the user asks to see their documents, browse a folder, or find documents in a specific location.",
+        ListDocumentsInput,
+    ),
+}
+
+
+async def run_tool(name: str, arguments: dict, user_id: Optional[str] = None) -> str:
+    """
+    Execute a tool and format its result as text for the model.
+
+    Args:
+        name: Tool name (key of TOOL_DEFINITIONS)
+        arguments: Tool arguments from the model
+        user_id: Acting user; defaults to PUNYPAGE_USER_ID (stdio server)
+
+    Returns:
+        Result text, or an error message if the tool failed
+    """
+    logger.info(f"Tool called: {name} with arguments: {arguments}")
+
+    try:
+        if name == "create_document":
+            input_data = CreateDocumentInput(**arguments)
+            result = await create_document(input_data, user_id)
+            return f"Successfully created document '{result.title}' (ID: {result.id}) at path '{result.path}'. Content length: {len(result.content_md)} characters."
+
+        elif name == "update_document":
+            input_data = UpdateDocumentInput(**arguments)
+            result = await update_document(input_data, user_id)
+            return f"Successfully updated document '{result.title}' (ID: {result.id}). Content length: {len(result.content_md)} characters."
+
+        elif name == "read_document":
+            input_data = ReadDocumentInput(**arguments)
+            result = await read_document(input_data, user_id)
+            return f"Document: {result.title}\nPath: {result.path}\nStatus: {result.status}\n\nContent:\n{result.content_md}"
+
+        elif name == "delete_document":
+            input_data = DeleteDocumentInput(**arguments)
+            result = await delete_document(input_data, user_id)
+            return f"Successfully deleted document with ID: {result.deleted_id}"
+
+        elif name == "list_documents":
+            input_data = ListDocumentsInput(**arguments)
+            results = await list_documents(input_data, user_id)
+
+            if not results:
+                return "No documents found."
+
+            # Format as table
+            lines = ["Documents:\n"]
+            for doc in results:
+                doc_type = "📁" if doc.is_folder else "📄"
+                lines.append(f"{doc_type} {doc.title} (ID: {doc.id})")
+                lines.append(f"   Path: {doc.path} | Status: {doc.status}")
+
+            return "\n".join(lines)
+
+        else:
+            raise ValueError(f"Unknown tool: {name}")
+
+    except Exception as e:
+        logger.error(f"Tool execution failed: {e}", exc_info=True)
+        return f"Error: {str(e)}"
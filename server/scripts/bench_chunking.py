@@ -0,0 +1,103 @@
+"""
+Micro-benchmark for markdown chunking on a large synthetic corpus.
+
+Compares per-node tokenization (one encoder call per node, as chunk_nodes used
+to do) against the batched path in MarkdownParser.encode_many, and reports
+end-to-end parse_and_chunk throughput.
+
+Usage (from server/):
+    uv run python -m scripts.bench_chunking --documents 200 --paragraphs 300
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Callable
+
+from app.utils.markdown_parser import MarkdownParser
+
+WORDS = (
+    "vector index chunk embedding latency recall query document section heading "
+    "token budget paragraph sentence cache worker pipeline search result score"
+).split()
+
+
+def make_sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(6, 18))
+    return " ".join(words).capitalize() + "."
+
+
+def make_document(rng: random.Random, paragraphs: int) -> str:
+    """Build one markdown document with headings, lists, quotes and long paragraphs"""
+    lines = ["# Synthetic document", ""]
+    for i in range(paragraphs):
+        if i % 25 == 0:
+            lines += [f"## Section {i // 25}", ""]
+        kind = rng.random()
+        if kind < 0.1:
+            lines += [f"- {make_sentence(rng)}" for _ in range(rng.randint(3, 8))]
+        elif kind < 0.15:
+            lines.append(f"> {make_sentence(rng)}")
+        elif kind < 0.2:
+            # Oversized paragraph that has to be split
+            lines.append(" ".join(make_sentence(rng) for _ in range(150)))
+        else:
+            lines.append(" ".join(make_sentence(rng) for _ in range(rng.randint(1, 5))))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def legacy_extract_text(token: dict[str, Any]) -> str:
+    """Recursive join-at-every-level text extraction (previous implementation)"""
+    if token.get("type", "") == "text":
+        return token.get("raw", "")
+    if "children" in token and isinstance(token["children"], list):
+        texts = [legacy_extract_text(child) for child in token["children"]]
+        return " ".join(filter(None, texts))
+    return ""
+
+
+def best_of(repeat: int, fn: Callable[[], Any]) -> float:
+    """Median wall time of fn over repeat runs, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser_args = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser_args.add_argument("--documents", type=int, default=100)
+    parser_args.add_argument("--paragraphs", type=int, default=300)
+    parser_args.add_argument("--repeat", type=int, default=5)
+    parser_args.add_argument("--seed", type=int, default=7)
+    args = parser_args.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [make_document(rng, args.paragraphs) for _ in range(args.documents)]
+    parser = MarkdownParser()
+
+    asts = [parser.markdown_parser(markdown) for markdown in corpus]
+    blocks = [token for ast in asts for token in ast if token.get("type") != "blank_line"]
+    node_texts = [parser.extract_text_from_token(token) for token in blocks]
+
+    total_mb = sum(len(markdown) for markdown in corpus) / 1e6
+    print(f"Corpus: {args.documents} documents, {len(node_texts)} nodes, {total_mb:.1f} MB")
+
+    results = [
+        ("text extraction: recursive join", best_of(args.repeat, lambda: [legacy_extract_text(t) for t in blocks])),
+        ("text extraction: single join", best_of(args.repeat, lambda: [parser.extract_text_from_token(t) for t in blocks])),
+        ("tokenize: per-node encode", best_of(args.repeat, lambda: [len(parser.encoder.encode(t)) for t in node_texts])),
+        ("tokenize: encode_many (batch)", best_of(args.repeat, lambda: parser.encode_many(node_texts))),
+        ("parse_and_chunk: full corpus", best_of(args.repeat, lambda: [parser.parse_and_chunk(m, "Doc") for m in corpus])),
+    ]
+
+    width = max(len(name) for name, _ in results)
+    for name, seconds in results:
+        print(f"{name:<{width}}  {seconds * 1000:9.1f} ms  ({total_mb / seconds:6.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Load test: does document search stall other work on the same worker?
+
+Runs a latency probe against the server twice, first idle and then while
+--concurrency clients hammer POST /api/v1/documents/search. If search blocks
+the event loop, probe latency under load climbs to roughly the search latency;
+when search is non-blocking it stays flat.
+
+The default probe is GET /api/health, which is served by the same event loop
+as the chat WebSocket and so sees exactly the same stalls. With --chat-room the
+probe is a real chat stream instead: one message is sent per phase and the gaps
+between streamed frames are measured (this calls the agent, so it costs tokens).
+
+Usage (from server/, against a running single-worker server):
+    uv run python -m scripts.load_test_search --token "$JWT" --concurrency 32 --duration 15
+    uv run python -m scripts.load_test_search --token "$JWT" --chat-room <uuid>
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+import websockets
+
+PROBE_INTERVAL_SECONDS = 0.02
+QUERIES = [
+    "how do I configure the scheduler",
+    "vector search recall",
+    "meeting notes from last week",
+    "deployment checklist",
+    "embedding cache",
+]
+
+
+def summarize(label: str, samples: list[float]) -> None:
+    """Print latency percentiles in milliseconds"""
+    if not samples:
+        print(f"{label:<28} no samples")
+        return
+    ordered = sorted(samples)
+    pct = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+    print(
+        f"{label:<28} n={len(samples):<6} p50={pct(0.50):7.1f}ms  p95={pct(0.95):7.1f}ms  "
+        f"p99={pct(0.99):7.1f}ms  max={ordered[-1] * 1000:7.1f}ms"
+    )
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    """Measure /api/health round trips until stop is set"""
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/health")
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(PROBE_INTERVAL_SECONDS)
+    return samples
+
+
+async def probe_chat(ws_url: str, token: str, room_id: str, message: str) -> list[float]:
+    """Send one chat message and measure the gaps between streamed frames"""
+    gaps = []
+    async with websockets.connect(f"{ws_url}/api/chat/ws?token={token}") as ws:
+        await ws.send(json.dumps({"type": "join", "room_id": room_id}))
+        joined = json.loads(await ws.recv())
+        if joined.get("type") != "joined":
+            raise RuntimeError(f"Join failed: {joined}")
+
+        await ws.send(json.dumps({"type": "message", "content": message}))
+        last = time.perf_counter()
+        while True:
+            frame = json.loads(await ws.recv())
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+            if frame.get("type") in ("done", "error"):
+                break
+    return gaps
+
+
+async def search_worker(
+    client: httpx.AsyncClient,
+    worker: int,
+    stop: asyncio.Event,
+    latencies: list[float],
+    errors: list[str]
+) -> None:
+    """Issue searches back to back until stop is set"""
+    i = worker
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.post(
+            "/api/v1/documents/search",
+            json={"query": QUERIES[i % len(QUERIES)], "limit": 10}
+        )
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors.append(f"{response.status_code}: {response.text[:100]}")
+        i += 1
+
+
+async def run_phase(args: argparse.Namespace, concurrency: int) -> tuple[list[float], list[float], list[str]]:
+    """Run the probe for one phase, with concurrency search clients in the background"""
+    headers = {"Authorization": f"Bearer {args.token}"}
+    limits = httpx.Limits(max_connections=concurrency + 2)
+    stop = asyncio.Event()
+    search_latencies: list[float] = []
+    errors: list[str] = []
+
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=60, limits=limits) as client:
+        searches = [
+            asyncio.create_task(search_worker(client, worker, stop, search_latencies, errors))
+            for worker in range(concurrency)
+        ]
+
+        if args.chat_room:
+            ws_url = args.base_url.replace("http", "ws", 1)
+            probe_samples = await probe_chat(ws_url, args.token, args.chat_room, args.chat_message)
+            stop.set()
+        else:
+            probe = asyncio.create_task(probe_health(client, stop))
+            await asyncio.sleep(args.duration)
+            stop.set()
+            probe_samples = await probe
+
+        await asyncio.gather(*searches)
+
+    return probe_samples, search_latencies, errors
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    probe_name = "chat frame gap" if args.chat_room else "health latency"
+
+    print(f"Phase 1: idle ({probe_name})")
+    idle_probe, _, _ = await run_phase(args, concurrency=0)
+
+    print(f"Phase 2: {args.concurrency} concurrent searches ({probe_name})")
+    loaded_probe, search_latencies, errors = await run_phase(args, concurrency=args.concurrency)
+
+    print()
+    summarize(f"{probe_name} (idle)", idle_probe)
+    summarize(f"{probe_name} (under search)", loaded_probe)
+    summarize("search latency", search_latencies)
+    if search_latencies and not args.chat_room:
+        print(f"{'search throughput':<28} {len(search_latencies) / args.duration:.1f} req/s")
+    if errors:
+        print(f"{len(errors)} search errors, e.g. {errors[0]}")
+
+    if idle_probe and loaded_probe:
+        ratio = statistics.median(loaded_probe) / statistics.median(idle_probe)
+        print(f"\n{probe_name} p50 under load is {ratio:.1f}x idle")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=os.environ.get("API_URL", "http://localhost:8000"))
+    parser.add_argument("--token", default=os.environ.get("SUPABASE_JWT"), help="User JWT (or SUPABASE_JWT)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent search clients")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per phase (health probe)")
+    parser.add_argument("--chat-room", help="Chat session UUID; probes a real chat stream instead of /api/health")
+    parser.add_argument("--chat-message", default="Write three short paragraphs about search latency.")
+    args = parser.parse_args()
+
+    if not args.token:
+        parser.error("--token or SUPABASE_JWT is required")
+
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Tests for incremental chunk diffing"""
+import pytest
+
+from app.core.rag_ingestion import RAGIngestionPipeline
+from app.utils.markdown_parser import Chunk
+
+diff_chunks = RAGIngestionPipeline.diff_chunks
+
+
+def rows(*hashes: str | None) -> list[dict]:
+    return [{"id": f"row-{i}", "chunk_index": i, "content_hash": h} for i, h in enumerate(hashes)]
+
+
+def chunk(text: str, index: int) -> Chunk:
+    return {"text": text, "section_heading": "Intro", "chunk_index": index, "token_count": 3}
+
+
+def test_unchanged_document_is_a_no_op():
+    assert diff_chunks(rows("a", "b", "c"), ["a", "b", "c"]) == ([], [], [])
+
+
+def test_inserted_paragraph_moves_the_rest():
+    moves, delete_ids, new_positions = diff_chunks(rows("a", "b"), ["new", "a", "b"])
+
+    assert moves == [{"id": "row-0", "chunk_index": 1}, {"id": "row-1", "chunk_index": 2}]
+    assert delete_ids == []
+    assert new_positions == [0]
+
+
+def test_edited_paragraph_replaces_its_row():
+    moves, delete_ids, new_positions = diff_chunks(rows("a", "b", "c"), ["a", "b2", "c"])
+
+    assert moves == []
+    assert delete_ids == ["row-1"]
+    assert new_positions == [1]
+
+
+def test_duplicate_paragraphs_match_one_to_one():
+    moves, delete_ids, new_positions = diff_chunks(rows("x", "y", "x"), ["x", "x", "x"])
+
+    assert moves == [{"id": "row-2", "chunk_index": 1}]
+    assert delete_ids == ["row-1"]
+    assert new_positions == [2]
+
+
+def test_rows_without_hash_are_replaced():
+    moves, delete_ids, new_positions = diff_chunks(rows(None, "b"), ["a", "b"])
+
+    assert moves == []
+    assert delete_ids == ["row-0"]
+    assert new_positions == [0]
+
+
+def test_emptied_document_deletes_every_row():
+    assert diff_chunks(rows("a", "b"), []) == ([], ["row-0", "row-1"], [])
+
+
+@pytest.fixture
+def pipeline() -> RAGIngestionPipeline:
+    return RAGIngestionPipeline()
+
+
+def test_plan_embeds_only_new_chunks(pipeline: RAGIngestionPipeline, monkeypatch: pytest.MonkeyPatch):
+    document = {"id": "doc", "title": "Doc", "updated_at": "2025-01-01T00:00:00Z"}
+    chunks = [chunk("kept", 0), chunk("added", 1)]
+    texts, _ = pipeline.prepare_embedding_texts("Doc", chunks)
+    kept_hash = pipeline.embedding_cache.hash_text(texts[0])
+    existing = [
+        {"id": "old-kept", "chunk_index": 3, "content_hash": kept_hash},
+        {"id": "old-gone", "chunk_index": 0, "content_hash": "stale"},
+    ]
+    embedded: list[str] = []
+
+    def embed_texts(texts: list[str], token_counts: list[int], hashes: list[str]) -> list[list[float]]:
+        embedded.extend(texts)
+        return [[0.0]] * len(texts)
+
+    monkeypatch.setattr(pipeline, "get_existing_chunks", lambda document_id: existing)
+    monkeypatch.setattr(pipeline, "embed_texts", embed_texts)
+
+    plan = pipeline.plan_chunk_sync(document, chunks)
+
+    assert embedded == [texts[1]]
+    assert plan["moves"] == [{"id": "old-kept", "chunk_index": 0}]
+    assert plan["delete_ids"] == ["old-gone"]
+    assert [record["chunk_index"] for record in plan["inserts"]] == [1]
+    assert plan["inserts"][0]["content"] == "added"
+    assert plan["kept"] == 1
+    assert plan["expected"] == [{"id": "old-kept", "chunk_index": 3}, {"id": "old-gone", "chunk_index": 0}]
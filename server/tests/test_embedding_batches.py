@@ -0,0 +1,80 @@
+"""Tests for embedding request batching and bad-input bisection"""
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import BadRequestError, InternalServerError
+
+from app.config import settings
+from app.core.rag_ingestion import RAGIngestionPipeline
+
+
+class FakeEmbeddings:
+    """Stands in for openai_client.embeddings; rejects requests containing a bad input"""
+
+    def __init__(self, bad: set[str] = frozenset(), error: type[Exception] = BadRequestError):
+        self.bad = bad
+        self.error = error
+        self.requests: list[list[str]] = []
+
+    def create(self, model: str, input: list[str]):
+        self.requests.append(list(input))
+        if self.bad.intersection(input):
+            request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+            raise self.error("rejected", response=httpx.Response(400, request=request), body=None)
+        # Reverse order: callers must place vectors by item.index, not response position
+        data = [
+            SimpleNamespace(index=i, embedding=[float(len(text))])
+            for i, text in reversed(list(enumerate(input)))
+        ]
+        return SimpleNamespace(data=data)
+
+
+@pytest.fixture
+def pipeline() -> RAGIngestionPipeline:
+    pipeline = RAGIngestionPipeline()
+    pipeline.openai_client = SimpleNamespace(embeddings=FakeEmbeddings())
+    return pipeline
+
+
+def test_batches_respect_item_and_token_budgets(pipeline: RAGIngestionPipeline, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "openai_embedding_batch_max_items", 3)
+    monkeypatch.setattr(settings, "openai_embedding_batch_max_tokens", 100)
+
+    batches = pipeline._build_embedding_batches([10, 10, 10, 10, 60, 50, 200, 5])
+
+    assert batches == [[0, 1, 2], [3, 4], [5], [6], [7]]
+
+
+def test_embeddings_keep_input_order(pipeline: RAGIngestionPipeline, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "openai_embedding_batch_max_items", 2)
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    embeddings = pipeline.generate_embeddings(texts, [1] * len(texts))
+
+    assert embeddings == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert len(pipeline.openai_client.embeddings.requests) == 3
+
+
+def test_rejected_batch_is_bisected_down_to_the_bad_input(pipeline: RAGIngestionPipeline):
+    fake = FakeEmbeddings(bad={"bad"})
+    pipeline.openai_client = SimpleNamespace(embeddings=fake)
+    texts = ["a", "b", "bad", "d"]
+    embeddings: list[list[float] | None] = [None] * len(texts)
+
+    with pytest.raises(BadRequestError):
+        pipeline._embed_batch(texts, [0, 1, 2, 3], embeddings)
+
+    # Halves that don't contain the bad input are embedded exactly once
+    assert fake.requests == [["a", "b", "bad", "d"], ["a", "b"], ["bad", "d"], ["bad"]]
+    assert embeddings[:2] == [[1.0], [1.0]]
+
+
+def test_transient_errors_are_not_bisected(pipeline: RAGIngestionPipeline):
+    fake = FakeEmbeddings(bad={"a"}, error=InternalServerError)
+    pipeline.openai_client = SimpleNamespace(embeddings=fake)
+
+    with pytest.raises(InternalServerError):
+        pipeline._embed_batch(["a", "b"], [0, 1], [None, None])
+
+    assert len(fake.requests) == 1
@@ -0,0 +1,99 @@
+"""Tests for the persistent embedding cache"""
+from types import SimpleNamespace
+from typing import Any
+
+from app.core.embedding_cache import LOOKUP_PAGE_SIZE, EmbeddingCache, hash_embedding_text
+
+
+class FakeQuery:
+    """Records one supabase-py query chain against an in-memory table"""
+
+    def __init__(self, client: "FakeSupabase"):
+        self.client = client
+        self.filter_values: list[str] = []
+        self.upserted: list[dict[str, Any]] | None = None
+
+    def select(self, columns: str) -> "FakeQuery":
+        return self
+
+    def in_(self, column: str, values: list[str]) -> "FakeQuery":
+        self.filter_values = values
+        return self
+
+    def upsert(self, records: list[dict[str, Any]], **kwargs: Any) -> "FakeQuery":
+        self.upserted = records
+        self.client.upsert_kwargs.append(kwargs)
+        return self
+
+    def execute(self) -> SimpleNamespace:
+        if self.client.fail:
+            raise RuntimeError("database unavailable")
+        if self.upserted is not None:
+            for record in self.upserted:
+                self.client.rows.setdefault(record["content_hash"], record["embedding"])
+            return SimpleNamespace(data=[])
+        self.client.lookups.append(self.filter_values)
+        return SimpleNamespace(data=[
+            # PostgREST returns vectors as '[...]' strings
+            {"content_hash": h, "embedding": str(self.client.rows[h])}
+            for h in self.filter_values if h in self.client.rows
+        ])
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.rows: dict[str, list[float]] = {}
+        self.lookups: list[list[str]] = []
+        self.upsert_kwargs: list[dict[str, Any]] = []
+        self.fail = False
+
+    def table(self, name: str) -> FakeQuery:
+        assert name == "embedding_cache"
+        return FakeQuery(self)
+
+
+def test_keys_depend_on_model():
+    assert hash_embedding_text("text", "model-a") != hash_embedding_text("text", "model-b")
+    assert EmbeddingCache(FakeSupabase(), "model-a").hash_text("text") == hash_embedding_text("text", "model-a")
+
+
+def test_round_trip_counts_hits_and_misses():
+    cache = EmbeddingCache(FakeSupabase(), "model")
+    cache.put_many({"a": [0.5, 1.0]})
+
+    found = cache.get_many(["a", "b", "a"])
+
+    assert found == {"a": [0.5, 1.0]}
+    assert cache.snapshot_stats() == (2, 1)
+
+
+def test_lookups_are_deduplicated_and_paged():
+    supabase = FakeSupabase()
+    cache = EmbeddingCache(supabase, "model")
+    hashes = [f"h{i}" for i in range(LOOKUP_PAGE_SIZE + 1)]
+
+    cache.get_many(hashes + hashes)
+
+    assert [len(page) for page in supabase.lookups] == [LOOKUP_PAGE_SIZE, 1]
+
+
+def test_writes_never_overwrite_existing_vectors():
+    supabase = FakeSupabase()
+    cache = EmbeddingCache(supabase, "model")
+
+    cache.put_many({"a": [1.0]})
+    cache.put_many({})
+
+    assert len(supabase.upsert_kwargs) == 1
+    assert supabase.upsert_kwargs[0]["ignore_duplicates"] is True
+
+
+def test_database_failures_degrade_to_misses():
+    supabase = FakeSupabase()
+    cache = EmbeddingCache(supabase, "model")
+    supabase.fail = True
+
+    cache.put_many({"a": [1.0]})
+
+    assert cache.get_many(["a"]) == {}
+    assert cache.snapshot_stats() == (0, 1)
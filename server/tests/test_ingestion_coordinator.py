@@ -0,0 +1,99 @@
+"""Tests for single-flight ingestion coordination"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import ingestion_coordinator as coordinator_module
+from app.core.ingestion_coordinator import IngestionCoordinator
+
+
+class FakePipeline:
+    """Pipeline whose runs take a moment and whose lease RPCs are recorded"""
+
+    def __init__(self, lease_available: bool = True):
+        self.lease_available = lease_available
+        self.rpcs: list[str] = []
+        self.runs = 0
+        self.targeted_in_flight = 0
+        self.max_targeted_in_flight = 0
+        self._lock = threading.Lock()
+        self.supabase = SimpleNamespace(rpc=self.rpc)
+
+    def rpc(self, name: str, params: dict) -> SimpleNamespace:
+        self.rpcs.append(name)
+        return SimpleNamespace(execute=lambda: SimpleNamespace(data=self.lease_available))
+
+    def run(self, stop: threading.Event) -> dict[str, int]:
+        with self._lock:
+            self.runs += 1
+        time.sleep(0.05)
+        return {"processed": self.runs}
+
+    def run_documents(self, document_ids: list[str]) -> dict[str, int]:
+        with self._lock:
+            self.targeted_in_flight += 1
+            self.max_targeted_in_flight = max(self.max_targeted_in_flight, self.targeted_in_flight)
+        time.sleep(0.02)
+        with self._lock:
+            self.targeted_in_flight -= 1
+        return {"processed": len(document_ids)}
+
+
+@pytest.fixture
+def pipeline(monkeypatch: pytest.MonkeyPatch) -> FakePipeline:
+    pipeline = FakePipeline()
+    monkeypatch.setattr(coordinator_module, "get_pipeline", lambda: pipeline)
+    return pipeline
+
+
+def test_concurrent_triggers_share_one_run(pipeline: FakePipeline):
+    async def scenario():
+        coordinator = IngestionCoordinator()
+        return await asyncio.gather(*(coordinator.run() for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert results == [{"processed": 1}] * 5
+    assert pipeline.runs == 1
+    assert pipeline.rpcs == ["try_acquire_ingestion_lease", "release_ingestion_lease"]
+
+
+def test_later_triggers_start_a_new_run(pipeline: FakePipeline):
+    async def scenario():
+        coordinator = IngestionCoordinator()
+        return [await coordinator.run(), await coordinator.run()]
+
+    assert asyncio.run(scenario()) == [{"processed": 1}, {"processed": 2}]
+
+
+def test_run_is_skipped_while_another_worker_holds_the_lease(pipeline: FakePipeline):
+    pipeline.lease_available = False
+
+    assert asyncio.run(IngestionCoordinator().run()) is None
+    assert pipeline.runs == 0
+    assert pipeline.rpcs == ["try_acquire_ingestion_lease"]
+
+
+def test_cancelled_caller_does_not_cancel_the_run(pipeline: FakePipeline):
+    async def scenario():
+        coordinator = IngestionCoordinator()
+        impatient = asyncio.create_task(coordinator.run())
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await coordinator.run()
+
+    assert asyncio.run(scenario()) == {"processed": 1}
+    assert pipeline.runs == 1
+
+
+def test_targeted_runs_are_serialized(pipeline: FakePipeline):
+    async def scenario():
+        coordinator = IngestionCoordinator()
+        return await asyncio.gather(*(coordinator.run_documents([f"doc-{i}"]) for i in range(4)))
+
+    assert asyncio.run(scenario()) == [{"processed": 1}] * 4
+    assert pipeline.max_targeted_in_flight == 1
+    assert "try_acquire_ingestion_lease" not in pipeline.rpcs
@@ -0,0 +1,57 @@
+"""Tests for token accounting in the markdown chunker"""
+import pytest
+
+from app.utils.markdown_parser import MarkdownParser
+
+
+@pytest.fixture
+def parser() -> MarkdownParser:
+    return MarkdownParser(target_tokens=40, max_tokens=60, overlap_tokens=8)
+
+
+def long_paragraph(sentences: int = 60) -> str:
+    return " ".join(f"S{i} ok." for i in range(sentences))
+
+
+def test_split_text_ids_match_text(parser: MarkdownParser):
+    pieces = parser.split_text(long_paragraph())
+
+    assert len(pieces) > 1
+    for text, ids in pieces:
+        assert parser.encoder.decode(ids) == text
+        assert len(ids) <= parser.pack_limit
+
+
+def test_merge_pieces_ids_match_text():
+    parser = MarkdownParser(target_tokens=400)
+    texts = ["First short paragraph.", "Second one, also short.", "A third paragraph here."]
+    pieces = [(text, parser.encoder.encode_ordinary(text)) for text in texts]
+
+    merged = parser.merge_pieces(pieces)
+
+    assert len(merged) == 1
+    text, ids = merged[0]
+    assert text == "\n\n".join(texts)
+    assert parser.encoder.decode(ids) == text
+
+
+def test_chunk_token_counts_cover_chunk_text(parser: MarkdownParser):
+    chunks = parser.parse_and_chunk(f"## Section\n\n{long_paragraph()}\n", "Doc")
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        # Counts come from concatenated IDs, so they may only over-estimate
+        assert parser.count_tokens(chunk["text"]) <= chunk["token_count"] <= parser.max_tokens
+
+
+
+@pytest.mark.parametrize("overlap_tokens", [0, 8])
+def test_target_above_max_never_exceeds_max(overlap_tokens: int):
+    parser = MarkdownParser(target_tokens=1000, max_tokens=100, overlap_tokens=overlap_tokens)
+    paragraphs = "\n\n".join(f"Paragraph {i} is short." for i in range(80))
+
+    chunks = parser.parse_and_chunk(f"## Section\n\n{paragraphs}\n\n{long_paragraph(200)}\n", "Doc")
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk["token_count"] <= parser.max_tokens
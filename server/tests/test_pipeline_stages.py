@@ -0,0 +1,44 @@
+"""Tests for the staged pipeline runner"""
+from app.core.pipeline_stages import Stage, run_stages
+
+
+def test_items_flow_through_stages_in_full():
+    seen: list[int] = []
+
+    metrics = run_stages(
+        "source",
+        range(20),
+        [
+            Stage("double", lambda n: n * 2, workers=3, queue_size=2),
+            Stage("collect", seen.append, workers=2, queue_size=2),
+        ]
+    )
+
+    assert sorted(seen) == [n * 2 for n in range(20)]
+    assert metrics["source"]["items"] == 20
+    assert metrics["double"]["items"] == 20
+    assert metrics["collect"]["items"] == 20
+
+
+def test_failures_are_counted_and_reported_to_on_error():
+    failures: list[tuple[int, str]] = []
+    stored: list[int] = []
+
+    def check(n: int) -> int:
+        if n % 3 == 0:
+            raise ValueError(f"bad {n}")
+        return n
+
+    metrics = run_stages(
+        "source",
+        range(9),
+        [
+            Stage("check", check, workers=2, on_error=lambda item, error: failures.append((item, str(error)))),
+            Stage("store", stored.append),
+        ]
+    )
+
+    assert sorted(failures) == [(0, "bad 0"), (3, "bad 3"), (6, "bad 6")]
+    assert sorted(stored) == [1, 2, 4, 5, 7, 8]
+    assert metrics["check"]["errors"] == 3
+    assert metrics["store"]["errors"] == 0
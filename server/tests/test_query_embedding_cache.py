@@ -0,0 +1,113 @@
+"""Tests for the in-process query embedding cache"""
+from app.core.query_embedding_cache import QueryEmbeddingBackend, QueryEmbeddingCache, normalize_query
+
+# Entry size is the 64-char key plus 4 bytes per float32 component
+VECTOR = [0.5, 0.25]
+ENTRY_BYTES = 64 + 4 * len(VECTOR)
+
+
+class Embedder:
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def one(self, text: str) -> list[float]:
+        self.calls.append([text])
+        return VECTOR
+
+    def many(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [VECTOR for _ in texts]
+
+
+class MemoryBackend(QueryEmbeddingBackend):
+    def __init__(self, fail: bool = False):
+        self.entries: dict[str, list[float]] = {}
+        self.fail = fail
+
+    def get(self, key: str) -> list[float] | None:
+        if self.fail:
+            raise RuntimeError("backend down")
+        return self.entries.get(key)
+
+    def set(self, key: str, embedding: list[float]) -> None:
+        if self.fail:
+            raise RuntimeError("backend down")
+        self.entries[key] = embedding
+
+
+def test_normalized_spellings_share_an_entry():
+    cache = QueryEmbeddingCache("model")
+    embedder = Embedder()
+
+    cache.get_embedding("  vector   search ", embedder.one)
+    cache.get_embedding("vector search", embedder.one)
+
+    assert normalize_query("ﬁle\tnames\n") == "file names"
+    assert embedder.calls == [["vector search"]]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_entries_are_recomputed():
+    cache = QueryEmbeddingCache("model", ttl_seconds=0)
+    embedder = Embedder()
+
+    cache.get_embedding("query", embedder.one)
+    cache.get_embedding("query", embedder.one)
+
+    assert len(embedder.calls) == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_memory_bound_evicts_least_recently_used():
+    cache = QueryEmbeddingCache("model", max_bytes=2 * ENTRY_BYTES)
+    embedder = Embedder()
+
+    cache.get_embedding("a", embedder.one)
+    cache.get_embedding("b", embedder.one)
+    cache.get_embedding("a", embedder.one)  # b is now least recently used
+    cache.get_embedding("c", embedder.one)
+
+    assert cache.stats()["bytes"] == 2 * ENTRY_BYTES
+    cache.get_embedding("a", embedder.one)
+    cache.get_embedding("b", embedder.one)
+    assert embedder.calls == [["a"], ["b"], ["c"], ["b"]]
+
+
+def test_entries_larger_than_the_bound_are_not_cached():
+    cache = QueryEmbeddingCache("model", max_bytes=ENTRY_BYTES - 1)
+
+    cache.get_embedding("a", Embedder().one)
+
+    assert cache.stats() == {"entries": 0, "bytes": 0, "hits": 0, "misses": 1}
+
+
+def test_batch_embeds_unique_misses_in_one_call():
+    cache = QueryEmbeddingCache("model")
+    embedder = Embedder()
+    cache.get_embedding("cached", embedder.one)
+
+    embeddings = cache.get_embeddings(["new", "cached", " new ", "other"], embedder.many)
+
+    assert embeddings == [VECTOR] * 4
+    assert embedder.calls[1:] == [["new", "other"]]
+
+
+def test_shared_backend_fills_local_misses():
+    backend = MemoryBackend()
+    QueryEmbeddingCache("model", backend=backend).get_embedding("query", Embedder().one)
+    embedder = Embedder()
+    other_worker = QueryEmbeddingCache("model", backend=backend)
+
+    assert other_worker.get_embedding("query", embedder.one) == VECTOR
+    assert embedder.calls == []
+    assert other_worker.stats()["entries"] == 1
+
+
+def test_backend_failures_fall_back_to_embedding():
+    cache = QueryEmbeddingCache("model", backend=MemoryBackend(fail=True))
+    embedder = Embedder()
+
+    assert cache.get_embedding("query", embedder.one) == VECTOR
+    assert cache.get_embedding("query", embedder.one) == VECTOR
+    assert len(embedder.calls) == 1
@@ -0,0 +1,64 @@
+"""Tests for the lexical re-ranking stage and its latency budget"""
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.core.reranker import rerank
+from app.routes import rag
+from app.routes.rag import rerank_rows
+
+
+def row(content: str, similarity: float) -> dict:
+    return {"content": content, "similarity": similarity, "document_title": "Notes", "section_heading": None}
+
+
+# First-stage order puts the exact lexical match last
+ROWS = [
+    row("unrelated prose about gardens", 0.82),
+    row("more unrelated prose", 0.81),
+    row("configure the pgbouncer pool size", 0.80),
+]
+
+
+def test_lexical_matches_are_promoted():
+    ranked = rerank("pgbouncer pool", ROWS, limit=2, deadline=time.monotonic() + 1)
+
+    assert ranked[0] is ROWS[2]
+    assert len(ranked) == 2
+
+
+def test_scorer_gives_up_past_its_deadline():
+    assert rerank("pgbouncer", ROWS, limit=2, deadline=time.monotonic() - 1) is None
+
+
+def test_rerank_rows_returns_reranked_rows():
+    ranked, reranked = asyncio.run(rerank_rows("pgbouncer pool", ROWS, limit=2))
+
+    assert reranked is True
+    assert ranked[0] is ROWS[2]
+
+
+def test_rerank_rows_falls_back_to_first_stage_order_on_errors(monkeypatch: pytest.MonkeyPatch):
+    def broken(*args):
+        raise RuntimeError("scorer bug")
+
+    monkeypatch.setattr(rag, "rerank", broken)
+
+    assert asyncio.run(rerank_rows("pgbouncer", ROWS, limit=2)) == (ROWS[:2], False)
+
+
+def test_rerank_rows_falls_back_when_the_budget_runs_out(monkeypatch: pytest.MonkeyPatch):
+    def slow(*args):
+        time.sleep(0.2)
+        return list(reversed(ROWS))
+
+    monkeypatch.setattr(rag, "rerank", slow)
+    monkeypatch.setattr(settings, "search_rerank_budget_ms", 20)
+
+    started = time.monotonic()
+    result = asyncio.run(rerank_rows("pgbouncer", ROWS, limit=2))
+
+    assert result == (ROWS[:2], False)
+    assert time.monotonic() - started < 0.2
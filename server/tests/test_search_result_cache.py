@@ -0,0 +1,94 @@
+"""Tests for the corpus-versioned search result cache"""
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from app.core.search_result_cache import SHARED_CORPUS_OWNER, SearchResultCache, fetch_corpus_version
+
+
+class Response(BaseModel):
+    results: list[str]
+
+
+RESPONSE = Response(results=["chunk"])
+
+
+def key(query: str = "query", user_id: str = "user") -> tuple[str, str, str]:
+    return SearchResultCache.make_key(user_id, query, {"limit": 10})
+
+
+def test_hit_requires_the_same_corpus_version():
+    cache = SearchResultCache(max_entries=10, ttl_seconds=60)
+    cache.put(key(), (1, 0), RESPONSE)
+
+    assert cache.get(key(), (1, 0)) is RESPONSE
+    assert cache.get(key(), (1, 1)) is None  # Shared chunks changed
+    # The stale entry was dropped, so even the old version misses now
+    assert cache.get(key(), (1, 0)) is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 2}
+
+
+def test_keys_normalize_the_query_and_separate_users():
+    assert key("  Query\ttext ") == key("Query text")
+    assert key(user_id="a") != key(user_id="b")
+    assert SearchResultCache.make_key("user", "q", {"limit": 5}) != SearchResultCache.make_key("user", "q", {"limit": 10})
+
+
+def test_entries_expire_and_are_lru_bounded():
+    expired = SearchResultCache(max_entries=10, ttl_seconds=0)
+    expired.put(key(), (1, 0), RESPONSE)
+    assert expired.get(key(), (1, 0)) is None
+
+    cache = SearchResultCache(max_entries=2, ttl_seconds=60)
+    cache.put(key("a"), (1, 0), RESPONSE)
+    cache.put(key("b"), (1, 0), RESPONSE)
+    cache.get(key("a"), (1, 0))
+    cache.put(key("c"), (1, 0), RESPONSE)
+
+    assert cache.get(key("b"), (1, 0)) is None
+    assert cache.get(key("a"), (1, 0)) is RESPONSE
+
+
+def test_disabled_cache_stores_nothing():
+    cache = SearchResultCache(max_entries=0, ttl_seconds=60)
+    cache.put(key(), (1, 0), RESPONSE)
+
+    assert not cache.enabled
+    assert cache.stats()["entries"] == 0
+
+
+def test_versions_are_reused_within_their_ttl():
+    cache = SearchResultCache(max_entries=10, ttl_seconds=60, version_ttl_seconds=60)
+    reads = iter([(1, 0), (2, 0)])
+
+    assert cache.get_version("user", lambda: next(reads)) == (1, 0)
+    assert cache.get_version("user", lambda: next(reads)) == (1, 0)
+
+    cache.clear()
+    assert cache.get_version("user", lambda: next(reads)) == (2, 0)
+
+
+def test_versions_are_reread_once_expired():
+    cache = SearchResultCache(max_entries=10, ttl_seconds=60, version_ttl_seconds=0)
+    reads = iter([(1, 0), (2, 0)])
+
+    cache.get_version("user", lambda: next(reads))
+
+    assert cache.get_version("user", lambda: next(reads)) == (2, 0)
+
+
+def test_fetch_defaults_missing_owners_to_zero():
+    class Query:
+        def select(self, columns: str) -> "Query":
+            return self
+
+        def in_(self, column: str, values: list[str]) -> "Query":
+            assert values == ["user", SHARED_CORPUS_OWNER]
+            return self
+
+        def execute(self) -> SimpleNamespace:
+            return SimpleNamespace(data=[{"user_id": SHARED_CORPUS_OWNER, "version": 7}])
+
+    client = SimpleNamespace(table=lambda name: Query())
+
+    assert fetch_corpus_version(client, "user") == (0, 7)
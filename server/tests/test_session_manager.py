@@ -0,0 +1,114 @@
+"""Tests for chat session eviction"""
+import asyncio
+
+import pytest
+from claude_agent_sdk import ClaudeAgentOptions
+
+from app.core import session_manager as session_manager_module
+from app.core.session_manager import SessionManager
+
+
+class FakeClient:
+    """Stands in for ClaudeSDKClient without spawning the CLI"""
+
+    fail_connect = False
+    disconnected: list["FakeClient"] = []
+
+    def __init__(self, options: ClaudeAgentOptions):
+        self.options = options
+
+    async def connect(self) -> None:
+        if FakeClient.fail_connect:
+            raise RuntimeError("CLI failed to start")
+
+    async def disconnect(self) -> None:
+        FakeClient.disconnected.append(self)
+
+
+@pytest.fixture(autouse=True)
+def fake_client(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(session_manager_module, "ClaudeSDKClient", FakeClient)
+    FakeClient.fail_connect = False
+    FakeClient.disconnected = []
+
+
+async def create(manager: SessionManager, session_id: str) -> FakeClient:
+    client, _, _ = await manager.get_or_create_client(session_id, ClaudeAgentOptions())
+    return client
+
+
+def test_reconnecting_returns_the_same_client():
+    async def scenario():
+        manager = SessionManager()
+        first, created, queue = await manager.get_or_create_client("s", ClaudeAgentOptions())
+        second, created_again, same_queue = await manager.get_or_create_client("s", ClaudeAgentOptions())
+        return first is second, created, created_again, queue is same_queue
+
+    assert asyncio.run(scenario()) == (True, True, False, True)
+
+
+def test_over_capacity_evicts_least_recently_used():
+    async def scenario():
+        manager = SessionManager(max_sessions=2)
+        a = await create(manager, "a")
+        await create(manager, "b")
+        await manager.get_client("a")  # b is now least recently used
+        await create(manager, "c")
+        return manager, a
+
+    manager, a = asyncio.run(scenario())
+
+    assert list(manager._clients) == ["a", "c"]
+    assert len(FakeClient.disconnected) == 1
+    assert FakeClient.disconnected[0] is not a
+
+
+def test_active_sessions_are_never_evicted():
+    async def scenario():
+        manager = SessionManager(idle_ttl_seconds=60, max_sessions=1)
+        await create(manager, "busy")
+        await manager.mark_active("busy")
+        await create(manager, "new")  # Over the cap, but busy is pinned
+        over_cap = list(manager._clients)
+        for session_id in manager._last_used:
+            manager._last_used[session_id] -= 120
+        evicted = await manager.evict_idle()
+        await manager.mark_inactive("busy")
+        manager._last_used["busy"] -= 120
+        evicted += await manager.evict_idle()
+        return over_cap, evicted, list(manager._clients)
+
+    over_cap, evicted, remaining = asyncio.run(scenario())
+
+    assert over_cap == ["busy", "new"]
+    assert evicted == 2  # new once idle, busy after mark_inactive
+    assert remaining == []
+
+
+def test_idle_sessions_are_reaped():
+    async def scenario():
+        manager = SessionManager(idle_ttl_seconds=60)
+        await create(manager, "fresh")
+        manager._last_used["fresh"] -= 120
+        await create(manager, "recent")
+        return await manager.evict_idle(), list(manager._clients), manager._cache_queues.keys()
+
+    evicted, remaining, queues = asyncio.run(scenario())
+
+    assert evicted == 1
+    assert remaining == ["recent"]
+    assert list(queues) == ["recent"]
+
+
+def test_failed_connect_leaves_no_state():
+    async def scenario():
+        manager = SessionManager()
+        FakeClient.fail_connect = True
+        with pytest.raises(RuntimeError):
+            await create(manager, "s")
+        return manager
+
+    manager = asyncio.run(scenario())
+
+    assert manager._clients == {}
+    assert manager._cache_queues == {}
@@ -1,5 +1,6 @@
 import { useMutation, useQueryClient } from '@tanstack/react-query';
 import { supabase } from '@/lib/supabase';
+import { notifyDocumentChanged } from '@/lib/ragApi';
 import type { CreateDocumentInput, Document } from '../types';
 
 export function useCreateDocument() {
@@ -23,8 +24,12 @@ export function useCreateDocument() {
       if (error) throw error;
       return data as Document;
     },
-    onSuccess: () => {
+    onSuccess: (data) => {
       queryClient.invalidateQueries({ queryKey: ['documents'] });
+      // Best effort: the polling safety net indexes it later if this fails
+      notifyDocumentChanged(data.id).catch((error) => {
+        console.warn('Failed to queue document for indexing:', error);
+      });
     },
   });
 }
@@ -1,5 +1,6 @@
 import { useMutation, useQueryClient } from '@tanstack/react-query';
 import { supabase } from '@/lib/supabase';
+import { notifyDocumentChanged } from '@/lib/ragApi';
 import type { UpdateDocumentInput, Document } from '../types';
 
 export function useUpdateDocument() {
@@ -20,6 +21,10 @@ export function useUpdateDocument() {
     onSuccess: (data) => {
       queryClient.invalidateQueries({ queryKey: ['documents'] });
       queryClient.invalidateQueries({ queryKey: ['documents', data.id] });
+      // Best effort: the polling safety net indexes it later if this fails
+      notifyDocumentChanged(data.id).catch((error) => {
+        console.warn('Failed to queue document for indexing:', error);
+      });
     },
   });
 }
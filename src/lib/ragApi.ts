@@ -68,3 +68,26 @@ export async function searchDocuments(query: SearchQuery): Promise<SearchRespons
   const backendResponse: BackendSearchResponse = await response.json();
   return transformBackendResponse(backendResponse);
 }
+
+export async function notifyDocumentChanged(documentId: string): Promise<void> {
+  const {
+    data: { session },
+  } = await supabase.auth.getSession();
+
+  if (!session) {
+    throw new Error('Not authenticated');
+  }
+
+  // Editor saves go straight to Supabase; this queues the document for indexing within seconds
+  const response = await fetch(`${API_URL}/api/v1/documents/${documentId}/changed`, {
+    method: 'POST',
+    headers: {
+      Authorization: `Bearer ${session.access_token}`,
+    },
+  });
+
+  if (!response.ok) {
+    const error = await response.text();
+    throw new Error(`Failed to queue document for indexing: ${error}`);
+  }
+}
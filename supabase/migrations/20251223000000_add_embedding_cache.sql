@@ -0,0 +1,16 @@
+-- Persistent cache of embeddings keyed by a hash of the exact embedded text and model
+-- Lets re-indexing reuse vectors for unchanged chunks instead of calling OpenAI again
+CREATE TABLE embedding_cache (
+  content_hash TEXT PRIMARY KEY,  -- sha256 of model name + embedding text
+  model TEXT NOT NULL,
+  embedding vector(1536) NOT NULL,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Supports pruning entries for retired embedding models
+CREATE INDEX idx_embedding_cache_model ON embedding_cache(model);
+
+-- Only the backend (service role, which bypasses RLS) reads or writes the cache
+ALTER TABLE embedding_cache ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE embedding_cache IS 'Embedding vectors keyed by content hash, shared across documents and re-indexing runs';
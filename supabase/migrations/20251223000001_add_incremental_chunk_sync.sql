@@ -0,0 +1,101 @@
+-- Incremental re-indexing: chunks are matched by content hash so unchanged
+-- paragraphs keep their rows (and HNSW entries) instead of being deleted and
+-- re-inserted. Moved paragraphs keep their embeddings, but changing the indexed
+-- chunk_index is a non-HOT update, so their new row versions are inserted into
+-- every index, HNSW included; only chunks that stay in place avoid graph work.
+
+-- Hash of the embedded text + model (same key as embedding_cache.content_hash)
+ALTER TABLE document_chunks
+  ADD COLUMN content_hash TEXT;
+
+-- Apply a chunk diff for one document in a single transaction so search never
+-- sees a half-indexed document. The diff is computed outside the transaction, so
+-- the caller passes the rows it was computed against (p_expected) and the sync is
+-- rejected with SQLSTATE 40001 if another sync changed them in the meantime;
+-- the caller then re-plans against the current rows.
+CREATE OR REPLACE FUNCTION sync_document_chunks(
+  p_document_id uuid,
+  p_delete_ids uuid[] DEFAULT '{}',
+  p_moves jsonb DEFAULT '[]',      -- [{id, chunk_index}]
+  p_inserts jsonb DEFAULT '[]',    -- [{chunk_index, content, section_heading, embedding, content_hash, metadata}]
+  p_source_updated_at timestamptz DEFAULT NULL,
+  p_expected jsonb DEFAULT NULL    -- [{id, chunk_index}] the diff was based on; NULL skips the check
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+BEGIN
+  -- Serialize concurrent syncs of the same document
+  PERFORM pg_advisory_xact_lock(hashtext(p_document_id::text));
+
+  IF p_expected IS NOT NULL AND EXISTS (
+    (
+      SELECT id, chunk_index FROM document_chunks WHERE document_id = p_document_id
+      EXCEPT
+      SELECT id, chunk_index FROM jsonb_to_recordset(p_expected) AS expected(id uuid, chunk_index int)
+    )
+    UNION ALL
+    (
+      SELECT id, chunk_index FROM jsonb_to_recordset(p_expected) AS expected(id uuid, chunk_index int)
+      EXCEPT
+      SELECT id, chunk_index FROM document_chunks WHERE document_id = p_document_id
+    )
+  ) THEN
+    RAISE EXCEPTION 'Chunks of document % changed since the sync was planned', p_document_id
+      USING ERRCODE = 'serialization_failure';
+  END IF;
+
+  DELETE FROM document_chunks
+  WHERE document_id = p_document_id
+    AND id = ANY(p_delete_ids);
+
+  -- Park moved rows on negative indexes first so UNIQUE(document_id, chunk_index)
+  -- never collides while positions are being swapped. Both updates write new
+  -- row versions into the HNSW index; moves save embedding calls, not index work
+  UPDATE document_chunks
+  SET chunk_index = -1 - moves.chunk_index
+  FROM jsonb_to_recordset(p_moves) AS moves(id uuid, chunk_index int)
+  WHERE document_chunks.id = moves.id
+    AND document_chunks.document_id = p_document_id;
+
+  UPDATE document_chunks
+  SET chunk_index = -1 - chunk_index
+  WHERE document_id = p_document_id
+    AND chunk_index < 0;
+
+  INSERT INTO document_chunks (
+    document_id, chunk_index, content, section_heading, embedding, content_hash, metadata
+  )
+  SELECT
+    p_document_id,
+    inserts.chunk_index,
+    inserts.content,
+    inserts.section_heading,
+    inserts.embedding,
+    inserts.content_hash,
+    COALESCE(inserts.metadata, '{}')
+  FROM jsonb_to_recordset(p_inserts) AS inserts(
+    chunk_index int,
+    content text,
+    section_heading text,
+    embedding vector(1536),
+    content_hash text,
+    metadata jsonb
+  );
+
+  -- Mark indexed only if the document wasn't edited while we were processing it,
+  -- otherwise leave it stale so the next run picks up the newer content.
+  -- indexed_at is set in the same statement that fires update_updated_at_column(),
+  -- so both columns get the same NOW() and the row drops out of the stale set.
+  UPDATE documents
+  SET indexed_at = NOW()
+  WHERE id = p_document_id
+    AND (p_source_updated_at IS NULL OR updated_at = p_source_updated_at);
+END;
+$$;
+
+-- Only the backend ingestion pipeline (service role) syncs chunks
+REVOKE EXECUTE ON FUNCTION sync_document_chunks FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION sync_document_chunks TO service_role;
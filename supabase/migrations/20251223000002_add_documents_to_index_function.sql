@@ -0,0 +1,31 @@
+-- Return IDs of documents that need (re-)indexing, one keyset page at a time
+-- The WHERE clause matches the predicate of idx_documents_needs_indexing so the
+-- partial index serves the query; content is fetched separately per batch
+CREATE OR REPLACE FUNCTION get_documents_to_index(
+  page_size int DEFAULT 50,
+  after_updated_at timestamptz DEFAULT NULL,
+  after_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  updated_at timestamptz
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  SELECT documents.id, documents.updated_at
+  FROM documents
+  WHERE (documents.indexed_at IS NULL OR documents.updated_at > documents.indexed_at)
+    AND (
+      after_updated_at IS NULL
+      OR (documents.updated_at, documents.id) > (after_updated_at, after_id)
+    )
+  ORDER BY documents.updated_at, documents.id
+  LIMIT page_size;
+$$;
+
+-- Only the backend ingestion pipeline (service role) lists stale documents
+REVOKE EXECUTE ON FUNCTION get_documents_to_index FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_documents_to_index TO service_role;
@@ -0,0 +1,56 @@
+-- Cross-process lease so only one server worker runs full ingestion at a time
+CREATE TABLE ingestion_leases (
+  name TEXT PRIMARY KEY,
+  holder TEXT NOT NULL,
+  expires_at TIMESTAMPTZ NOT NULL
+);
+
+-- Only the backend (service role, which bypasses RLS) touches leases
+ALTER TABLE ingestion_leases ENABLE ROW LEVEL SECURITY;
+
+-- Acquire or renew a lease; succeeds if it is free, expired, or already ours
+CREATE OR REPLACE FUNCTION try_acquire_ingestion_lease(
+  p_name text,
+  p_holder text,
+  p_ttl_seconds int
+)
+RETURNS boolean
+LANGUAGE plpgsql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+DECLARE
+  acquired boolean;
+BEGIN
+  INSERT INTO ingestion_leases (name, holder, expires_at)
+  VALUES (p_name, p_holder, NOW() + make_interval(secs => p_ttl_seconds))
+  ON CONFLICT (name) DO UPDATE
+    SET holder = EXCLUDED.holder,
+        expires_at = EXCLUDED.expires_at
+    WHERE ingestion_leases.holder = EXCLUDED.holder
+       OR ingestion_leases.expires_at < NOW()
+  RETURNING true INTO acquired;
+
+  RETURN COALESCE(acquired, false);
+END;
+$$;
+
+-- Release a lease if we still hold it
+CREATE OR REPLACE FUNCTION release_ingestion_lease(
+  p_name text,
+  p_holder text
+)
+RETURNS void
+LANGUAGE sql
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  DELETE FROM ingestion_leases
+  WHERE name = p_name
+    AND holder = p_holder;
+$$;
+
+REVOKE EXECUTE ON FUNCTION try_acquire_ingestion_lease FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION release_ingestion_lease FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION try_acquire_ingestion_lease TO service_role;
+GRANT EXECUTE ON FUNCTION release_ingestion_lease TO service_role;
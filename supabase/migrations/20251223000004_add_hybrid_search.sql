@@ -0,0 +1,93 @@
+-- Full-text search over chunk content, so exact identifiers, names and code
+-- tokens that embeddings blur together can still be found
+ALTER TABLE document_chunks
+  ADD COLUMN content_tsv tsvector
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(section_heading, '')), 'A') ||
+    setweight(to_tsvector('english', content), 'B')
+  ) STORED;
+
+CREATE INDEX idx_chunks_content_tsv ON document_chunks USING gin (content_tsv);
+
+-- Hybrid search: lexical and vector retrieval in one round trip, fused with
+-- reciprocal rank fusion (score = sum of 1 / (rrf_k + rank) over both lists).
+-- Each leg fetches candidate_count candidates (default 4x match_count) through
+-- its own index; similarity is the cosine similarity of every returned chunk.
+CREATE OR REPLACE FUNCTION hybrid_search_document_chunks(
+  query_text text,
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  rrf_k int DEFAULT 60,
+  candidate_count int DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float,
+  rrf_score float
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+  WITH params AS (
+    -- OR the query terms together: ts_rank_cd still favors chunks matching more of them
+    SELECT nullif(replace(plainto_tsquery('english', query_text)::text, ' & ', ' | '), '')::tsquery AS tsq
+  ),
+  vector_candidates AS (
+    SELECT document_chunks.id, document_chunks.embedding <=> query_embedding AS distance
+    FROM document_chunks
+    INNER JOIN documents ON documents.id = document_chunks.document_id
+    WHERE (filter_user_id IS NULL OR documents.user_id = filter_user_id)
+    ORDER BY document_chunks.embedding <=> query_embedding
+    LIMIT coalesce(candidate_count, match_count * 4)
+  ),
+  vector_matches AS (
+    SELECT vector_candidates.id, row_number() OVER (ORDER BY vector_candidates.distance) AS rank
+    FROM vector_candidates
+  ),
+  lexical_matches AS (
+    SELECT
+      document_chunks.id,
+      row_number() OVER (ORDER BY ts_rank_cd(document_chunks.content_tsv, params.tsq) DESC) AS rank
+    FROM document_chunks
+    CROSS JOIN params
+    INNER JOIN documents ON documents.id = document_chunks.document_id
+    WHERE document_chunks.content_tsv @@ params.tsq
+      AND (filter_user_id IS NULL OR documents.user_id = filter_user_id)
+    ORDER BY rank
+    LIMIT coalesce(candidate_count, match_count * 4)
+  ),
+  fused AS (
+    SELECT
+      coalesce(vector_matches.id, lexical_matches.id) AS id,
+      coalesce(1.0 / (rrf_k + vector_matches.rank), 0.0)
+        + coalesce(1.0 / (rrf_k + lexical_matches.rank), 0.0) AS score
+    FROM vector_matches
+    FULL OUTER JOIN lexical_matches ON lexical_matches.id = vector_matches.id
+    ORDER BY score DESC
+    LIMIT match_count
+  )
+  SELECT
+    document_chunks.id,
+    document_chunks.document_id,
+    documents.path,
+    document_chunks.content,
+    document_chunks.section_heading,
+    document_chunks.metadata,
+    1 - (document_chunks.embedding <=> query_embedding) AS similarity,
+    fused.score::float AS rrf_score
+  FROM fused
+  INNER JOIN document_chunks ON document_chunks.id = fused.id
+  INNER JOIN documents ON documents.id = document_chunks.document_id
+  ORDER BY fused.score DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO anon;
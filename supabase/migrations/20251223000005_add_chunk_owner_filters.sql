@@ -0,0 +1,210 @@
+-- Denormalize document owner and path onto chunks so search can filter inside
+-- the HNSW scan instead of joining documents after the ANN LIMIT (which returns
+-- other users' candidates and short result lists for small accounts)
+
+-- Iterative index scans (hnsw.iterative_scan) need pgvector >= 0.8
+ALTER EXTENSION vector UPDATE;
+
+ALTER TABLE document_chunks
+  ADD COLUMN user_id UUID,
+  ADD COLUMN path TEXT NOT NULL DEFAULT '/';
+
+UPDATE document_chunks
+SET user_id = documents.user_id,
+    path = documents.path
+FROM documents
+WHERE documents.id = document_chunks.document_id;
+
+CREATE INDEX idx_chunks_user_path ON document_chunks(user_id, path text_pattern_ops);
+
+-- Owner and path are always copied from the chunk's document, on every insert
+-- and update, so a caller can never write their own values: a chunk whose
+-- user_id pointed at another user would show up in that user's searches.
+-- Trigger functions run as definer so the copy never depends on the caller's
+-- RLS view.
+CREATE OR REPLACE FUNCTION set_chunk_owner()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  SELECT documents.user_id, documents.path
+  INTO NEW.user_id, NEW.path
+  FROM documents
+  WHERE documents.id = NEW.document_id;
+  RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER set_document_chunks_owner
+  BEFORE INSERT OR UPDATE ON document_chunks
+  FOR EACH ROW
+  EXECUTE FUNCTION set_chunk_owner();
+
+-- Moving or re-assigning a document updates its chunks
+CREATE OR REPLACE FUNCTION sync_chunk_owner()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE document_chunks
+  SET user_id = NEW.user_id,
+      path = NEW.path
+  WHERE document_id = NEW.id;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER sync_documents_chunk_owner
+  AFTER UPDATE OF user_id, path ON documents
+  FOR EACH ROW
+  WHEN (OLD.user_id IS DISTINCT FROM NEW.user_id OR OLD.path IS DISTINCT FROM NEW.path)
+  EXECUTE FUNCTION sync_chunk_owner();
+
+-- Chunk visibility can now be checked without a per-row lookup into documents
+DROP POLICY "Users can view chunks from their documents" ON document_chunks;
+CREATE POLICY "Users can view chunks from their documents"
+  ON document_chunks FOR SELECT
+  USING (auth.uid() = user_id OR user_id IS NULL);
+
+-- Vector search filtered inside the index scan. With iterative scans the HNSW
+-- index keeps walking the graph until match_count rows pass the user/path
+-- filter; relaxed order is re-sorted by the materialized CTE.
+DROP FUNCTION IF EXISTS search_document_chunks(vector, int, uuid);
+
+CREATE OR REPLACE FUNCTION search_document_chunks(
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  path_prefix text DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+SET hnsw.iterative_scan = relaxed_order
+AS $$
+  WITH matches AS MATERIALIZED (
+    SELECT
+      document_chunks.id,
+      document_chunks.document_id,
+      document_chunks.path,
+      document_chunks.content,
+      document_chunks.section_heading,
+      document_chunks.metadata,
+      document_chunks.embedding <=> query_embedding AS distance
+    FROM document_chunks
+    WHERE (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+      AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+    ORDER BY document_chunks.embedding <=> query_embedding
+    LIMIT match_count
+  )
+  SELECT
+    matches.id,
+    matches.document_id,
+    matches.path,
+    matches.content,
+    matches.section_heading,
+    matches.metadata,
+    1 - matches.distance AS similarity
+  FROM matches
+  ORDER BY matches.distance;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION search_document_chunks TO anon;
+
+-- Hybrid search with the same in-scan filters on both legs
+DROP FUNCTION IF EXISTS hybrid_search_document_chunks(text, vector, int, uuid, int, int);
+
+CREATE OR REPLACE FUNCTION hybrid_search_document_chunks(
+  query_text text,
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  rrf_k int DEFAULT 60,
+  candidate_count int DEFAULT NULL,
+  path_prefix text DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float,
+  rrf_score float
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+SET hnsw.iterative_scan = relaxed_order
+AS $$
+  WITH params AS (
+    -- OR the query terms together: ts_rank_cd still favors chunks matching more of them
+    SELECT nullif(replace(plainto_tsquery('english', query_text)::text, ' & ', ' | '), '')::tsquery AS tsq
+  ),
+  vector_candidates AS MATERIALIZED (
+    SELECT document_chunks.id, document_chunks.embedding <=> query_embedding AS distance
+    FROM document_chunks
+    WHERE (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+      AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+    ORDER BY document_chunks.embedding <=> query_embedding
+    LIMIT coalesce(candidate_count, match_count * 4)
+  ),
+  vector_matches AS (
+    SELECT vector_candidates.id, row_number() OVER (ORDER BY vector_candidates.distance) AS rank
+    FROM vector_candidates
+  ),
+  lexical_matches AS (
+    SELECT
+      document_chunks.id,
+      row_number() OVER (ORDER BY ts_rank_cd(document_chunks.content_tsv, params.tsq) DESC) AS rank
+    FROM document_chunks
+    CROSS JOIN params
+    WHERE document_chunks.content_tsv @@ params.tsq
+      AND (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+      AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+    ORDER BY rank
+    LIMIT coalesce(candidate_count, match_count * 4)
+  ),
+  fused AS (
+    SELECT
+      coalesce(vector_matches.id, lexical_matches.id) AS id,
+      coalesce(1.0 / (rrf_k + vector_matches.rank), 0.0)
+        + coalesce(1.0 / (rrf_k + lexical_matches.rank), 0.0) AS score
+    FROM vector_matches
+    FULL OUTER JOIN lexical_matches ON lexical_matches.id = vector_matches.id
+    ORDER BY score DESC
+    LIMIT match_count
+  )
+  SELECT
+    document_chunks.id,
+    document_chunks.document_id,
+    document_chunks.path,
+    document_chunks.content,
+    document_chunks.section_heading,
+    document_chunks.metadata,
+    1 - (document_chunks.embedding <=> query_embedding) AS similarity,
+    fused.score::float AS rrf_score
+  FROM fused
+  INNER JOIN document_chunks ON document_chunks.id = fused.id
+  ORDER BY fused.score DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO anon;
@@ -0,0 +1,147 @@
+-- Per-request recall/latency trade-off for ANN search. ef_search is the size of
+-- the HNSW candidate list: higher values raise recall at the cost of latency.
+-- It is clamped to pgvector's 1..1000 range and only applies to this call.
+DROP FUNCTION IF EXISTS search_document_chunks(vector, int, uuid, text);
+
+CREATE OR REPLACE FUNCTION search_document_chunks(
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  path_prefix text DEFAULT NULL,
+  ef_search int DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE sql
+VOLATILE  -- set_config
+SECURITY INVOKER
+SET search_path = public
+SET hnsw.iterative_scan = relaxed_order
+SET hnsw.ef_search = 40
+AS $$
+  -- Scoped to this call by the function's own SET hnsw.ef_search clause
+  SELECT set_config('hnsw.ef_search', least(greatest(coalesce(ef_search, 40), 1), 1000)::text, true);
+
+  WITH matches AS MATERIALIZED (
+    SELECT
+      document_chunks.id,
+      document_chunks.document_id,
+      document_chunks.path,
+      document_chunks.content,
+      document_chunks.section_heading,
+      document_chunks.metadata,
+      document_chunks.embedding <=> query_embedding AS distance
+    FROM document_chunks
+    WHERE (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+      AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+    ORDER BY document_chunks.embedding <=> query_embedding
+    LIMIT match_count
+  )
+  SELECT
+    matches.id,
+    matches.document_id,
+    matches.path,
+    matches.content,
+    matches.section_heading,
+    matches.metadata,
+    1 - matches.distance AS similarity
+  FROM matches
+  ORDER BY matches.distance;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION search_document_chunks TO anon;
+
+DROP FUNCTION IF EXISTS hybrid_search_document_chunks(text, vector, int, uuid, int, int, text);
+
+CREATE OR REPLACE FUNCTION hybrid_search_document_chunks(
+  query_text text,
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  rrf_k int DEFAULT 60,
+  candidate_count int DEFAULT NULL,
+  path_prefix text DEFAULT NULL,
+  ef_search int DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float,
+  rrf_score float
+)
+LANGUAGE sql
+VOLATILE  -- set_config
+SECURITY INVOKER
+SET search_path = public
+SET hnsw.iterative_scan = relaxed_order
+SET hnsw.ef_search = 40
+AS $$
+  -- Scoped to this call by the function's own SET hnsw.ef_search clause
+  SELECT set_config('hnsw.ef_search', least(greatest(coalesce(ef_search, 40), 1), 1000)::text, true);
+
+  WITH params AS (
+    -- OR the query terms together: ts_rank_cd still favors chunks matching more of them
+    SELECT nullif(replace(plainto_tsquery('english', query_text)::text, ' & ', ' | '), '')::tsquery AS tsq
+  ),
+  vector_candidates AS MATERIALIZED (
+    SELECT document_chunks.id, document_chunks.embedding <=> query_embedding AS distance
+    FROM document_chunks
+    WHERE (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+      AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+    ORDER BY document_chunks.embedding <=> query_embedding
+    LIMIT coalesce(candidate_count, match_count * 4)
+  ),
+  vector_matches AS (
+    SELECT vector_candidates.id, row_number() OVER (ORDER BY vector_candidates.distance) AS rank
+    FROM vector_candidates
+  ),
+  lexical_matches AS (
+    SELECT
+      document_chunks.id,
+      row_number() OVER (ORDER BY ts_rank_cd(document_chunks.content_tsv, params.tsq) DESC) AS rank
+    FROM document_chunks
+    CROSS JOIN params
+    WHERE document_chunks.content_tsv @@ params.tsq
+      AND (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+      AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+    ORDER BY rank
+    LIMIT coalesce(candidate_count, match_count * 4)
+  ),
+  fused AS (
+    SELECT
+      coalesce(vector_matches.id, lexical_matches.id) AS id,
+      coalesce(1.0 / (rrf_k + vector_matches.rank), 0.0)
+        + coalesce(1.0 / (rrf_k + lexical_matches.rank), 0.0) AS score
+    FROM vector_matches
+    FULL OUTER JOIN lexical_matches ON lexical_matches.id = vector_matches.id
+    ORDER BY score DESC
+    LIMIT match_count
+  )
+  SELECT
+    document_chunks.id,
+    document_chunks.document_id,
+    document_chunks.path,
+    document_chunks.content,
+    document_chunks.section_heading,
+    document_chunks.metadata,
+    1 - (document_chunks.embedding <=> query_embedding) AS similarity,
+    fused.score::float AS rrf_score
+  FROM fused
+  INNER JOIN document_chunks ON document_chunks.id = fused.id
+  ORDER BY fused.score DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO anon;
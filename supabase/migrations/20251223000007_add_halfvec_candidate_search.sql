@@ -0,0 +1,209 @@
+-- Reduced-precision candidate search. The full-precision vector(1536) column
+-- stays the source of truth; in halfvec mode the graph search runs over a
+-- compact copy of each vector and candidates are re-ranked against the full ones.
+--
+--   halfvec: first 512 dimensions as halfvec (text-embedding-3 models are
+--            Matryoshka-trained, so a prefix is itself a usable embedding);
+--            1 KB per vector instead of 6 KB
+--
+-- Which path search uses is chosen by RAG_ANN_INDEX, which defaults to full.
+-- halfvec mode is experimental: its recall against full precision hasn't been
+-- measured, and no migration builds its HNSW index, so nobody pays for a second
+-- graph they don't use. To evaluate it, measure recall with
+-- scripts/bench_ann_recall.py --ann-index halfvec, then build the index with
+--   CREATE INDEX CONCURRENTLY idx_chunks_embedding_halfvec_512 ON document_chunks
+--     USING hnsw ((subvector(embedding, 1, 512)::halfvec(512)) halfvec_cosine_ops)
+--     WITH (m = 16, ef_construction = 64);
+-- before setting RAG_ANN_INDEX=halfvec. Without it halfvec mode falls back to a
+-- sequential scan.
+
+-- Nearest chunks for a query embedding through the selected ANN index.
+-- halfvec mode fetches candidate_count * rerank_factor rows from its index and
+-- keeps the candidate_count closest by full-precision cosine distance.
+-- rerank_factor comes from the caller, so it is clamped like ef_search.
+-- ORDER BY expressions must match the index expressions exactly.
+CREATE OR REPLACE FUNCTION match_chunk_candidates(
+  query_embedding vector(1536),
+  candidate_count int,
+  filter_user_id uuid DEFAULT NULL,
+  path_prefix text DEFAULT NULL,
+  ann_index text DEFAULT 'full',
+  rerank_factor int DEFAULT 4
+)
+RETURNS TABLE (
+  id uuid,
+  distance float
+)
+LANGUAGE plpgsql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+#variable_conflict use_column
+BEGIN
+  IF ann_index = 'halfvec' THEN
+    RETURN QUERY
+    SELECT candidates.id, (candidates.embedding <=> query_embedding)::float
+    FROM (
+      SELECT document_chunks.id, document_chunks.embedding
+      FROM document_chunks
+      WHERE (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+        AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+      ORDER BY subvector(document_chunks.embedding, 1, 512)::halfvec(512)
+        <=> subvector(query_embedding, 1, 512)::halfvec(512)
+      LIMIT candidate_count * least(greatest(coalesce(rerank_factor, 4), 1), 20)
+    ) AS candidates
+    ORDER BY 2
+    LIMIT candidate_count;
+
+  ELSE
+    -- Full precision; the outer sort restores strict order after relaxed iterative scans
+    RETURN QUERY
+    SELECT candidates.id, candidates.distance::float
+    FROM (
+      SELECT document_chunks.id, document_chunks.embedding <=> query_embedding AS distance
+      FROM document_chunks
+      WHERE (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+        AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+      ORDER BY document_chunks.embedding <=> query_embedding
+      LIMIT candidate_count
+    ) AS candidates
+    ORDER BY 2;
+  END IF;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION match_chunk_candidates TO authenticated;
+GRANT EXECUTE ON FUNCTION match_chunk_candidates TO anon;
+
+DROP FUNCTION IF EXISTS search_document_chunks(vector, int, uuid, text, int);
+
+CREATE OR REPLACE FUNCTION search_document_chunks(
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  path_prefix text DEFAULT NULL,
+  ef_search int DEFAULT NULL,
+  ann_index text DEFAULT 'full',
+  rerank_factor int DEFAULT 4
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE sql
+VOLATILE  -- set_config
+SECURITY INVOKER
+SET search_path = public
+SET hnsw.iterative_scan = relaxed_order
+SET hnsw.ef_search = 40
+AS $$
+  -- Scoped to this call by the function's own SET hnsw.ef_search clause
+  SELECT set_config('hnsw.ef_search', least(greatest(coalesce(ef_search, 40), 1), 1000)::text, true);
+
+  SELECT
+    document_chunks.id,
+    document_chunks.document_id,
+    document_chunks.path,
+    document_chunks.content,
+    document_chunks.section_heading,
+    document_chunks.metadata,
+    1 - matches.distance AS similarity
+  FROM match_chunk_candidates(
+    query_embedding, match_count, filter_user_id, path_prefix, ann_index, rerank_factor
+  ) AS matches
+  INNER JOIN document_chunks ON document_chunks.id = matches.id
+  ORDER BY matches.distance;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION search_document_chunks TO anon;
+
+DROP FUNCTION IF EXISTS hybrid_search_document_chunks(text, vector, int, uuid, int, int, text, int);
+
+CREATE OR REPLACE FUNCTION hybrid_search_document_chunks(
+  query_text text,
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  rrf_k int DEFAULT 60,
+  candidate_count int DEFAULT NULL,
+  path_prefix text DEFAULT NULL,
+  ef_search int DEFAULT NULL,
+  ann_index text DEFAULT 'full',
+  rerank_factor int DEFAULT 4
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float,
+  rrf_score float
+)
+LANGUAGE sql
+VOLATILE  -- set_config
+SECURITY INVOKER
+SET search_path = public
+SET hnsw.iterative_scan = relaxed_order
+SET hnsw.ef_search = 40
+AS $$
+  -- Scoped to this call by the function's own SET hnsw.ef_search clause
+  SELECT set_config('hnsw.ef_search', least(greatest(coalesce(ef_search, 40), 1), 1000)::text, true);
+
+  WITH params AS (
+    -- OR the query terms together: ts_rank_cd still favors chunks matching more of them
+    SELECT nullif(replace(plainto_tsquery('english', query_text)::text, ' & ', ' | '), '')::tsquery AS tsq
+  ),
+  vector_matches AS (
+    SELECT matches.id, row_number() OVER (ORDER BY matches.distance) AS rank
+    FROM match_chunk_candidates(
+      query_embedding, coalesce(candidate_count, match_count * 4),
+      filter_user_id, path_prefix, ann_index, rerank_factor
+    ) AS matches
+  ),
+  lexical_matches AS (
+    SELECT
+      document_chunks.id,
+      row_number() OVER (ORDER BY ts_rank_cd(document_chunks.content_tsv, params.tsq) DESC) AS rank
+    FROM document_chunks
+    CROSS JOIN params
+    WHERE document_chunks.content_tsv @@ params.tsq
+      AND (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+      AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+    ORDER BY rank
+    LIMIT coalesce(candidate_count, match_count * 4)
+  ),
+  fused AS (
+    SELECT
+      coalesce(vector_matches.id, lexical_matches.id) AS id,
+      coalesce(1.0 / (rrf_k + vector_matches.rank), 0.0)
+        + coalesce(1.0 / (rrf_k + lexical_matches.rank), 0.0) AS score
+    FROM vector_matches
+    FULL OUTER JOIN lexical_matches ON lexical_matches.id = vector_matches.id
+    ORDER BY score DESC
+    LIMIT match_count
+  )
+  SELECT
+    document_chunks.id,
+    document_chunks.document_id,
+    document_chunks.path,
+    document_chunks.content,
+    document_chunks.section_heading,
+    document_chunks.metadata,
+    1 - (document_chunks.embedding <=> query_embedding) AS similarity,
+    fused.score::float AS rrf_score
+  FROM fused
+  INNER JOIN document_chunks ON document_chunks.id = fused.id
+  ORDER BY fused.score DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO anon;
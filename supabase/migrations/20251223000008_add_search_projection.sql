@@ -0,0 +1,201 @@
+-- Slim search payloads: callers choose which heavy columns come back, and can
+-- ask for a bounded snippet (ts_headline around the best-matching span) instead
+-- of the whole chunk. document_title is returned directly so metadata isn't
+-- needed just to show a title. Snippets are only computed for the final rows.
+DROP FUNCTION IF EXISTS search_document_chunks(vector, int, uuid, text, int, text, int);
+
+CREATE OR REPLACE FUNCTION search_document_chunks(
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  path_prefix text DEFAULT NULL,
+  ef_search int DEFAULT NULL,
+  ann_index text DEFAULT 'full',
+  rerank_factor int DEFAULT 4,
+  query_text text DEFAULT NULL,
+  include_content boolean DEFAULT true,
+  include_metadata boolean DEFAULT true,
+  snippet_words int DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  document_title text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float
+)
+LANGUAGE sql
+VOLATILE  -- set_config
+SECURITY INVOKER
+SET search_path = public
+SET hnsw.iterative_scan = relaxed_order
+SET hnsw.ef_search = 40
+AS $$
+  -- Scoped to this call by the function's own SET hnsw.ef_search clause
+  SELECT set_config('hnsw.ef_search', least(greatest(coalesce(ef_search, 40), 1), 1000)::text, true);
+
+  SELECT
+    document_chunks.id,
+    document_chunks.document_id,
+    document_chunks.path,
+    document_chunks.metadata->>'document_title',
+    CASE
+      WHEN snippet_words IS NOT NULL THEN ts_headline(
+        'english',
+        document_chunks.content,
+        plainto_tsquery('english', coalesce(query_text, '')),
+        format(
+          'MaxWords=%s, MinWords=%s, ShortWord=3, MaxFragments=1, StartSel="**", StopSel="**"',
+          least(greatest(snippet_words, 5), 100),
+          least(greatest(snippet_words, 5), 100) / 2
+        )
+      )
+      WHEN include_content THEN document_chunks.content
+    END,
+    document_chunks.section_heading,
+    CASE WHEN include_metadata THEN document_chunks.metadata END,
+    1 - matches.distance AS similarity
+  FROM match_chunk_candidates(
+    query_embedding, match_count, filter_user_id, path_prefix, ann_index, rerank_factor
+  ) AS matches
+  INNER JOIN document_chunks ON document_chunks.id = matches.id
+  ORDER BY matches.distance;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION search_document_chunks TO anon;
+
+DROP FUNCTION IF EXISTS hybrid_search_document_chunks(text, vector, int, uuid, int, int, text, int, text, int);
+
+CREATE OR REPLACE FUNCTION hybrid_search_document_chunks(
+  query_text text,
+  query_embedding vector(1536),
+  match_count int DEFAULT 10,
+  filter_user_id uuid DEFAULT NULL,
+  rrf_k int DEFAULT 60,
+  candidate_count int DEFAULT NULL,
+  path_prefix text DEFAULT NULL,
+  ef_search int DEFAULT NULL,
+  ann_index text DEFAULT 'full',
+  rerank_factor int DEFAULT 4,
+  include_content boolean DEFAULT true,
+  include_metadata boolean DEFAULT true,
+  snippet_words int DEFAULT NULL
+)
+RETURNS TABLE (
+  id uuid,
+  document_id uuid,
+  document_path text,
+  document_title text,
+  content text,
+  section_heading text,
+  metadata jsonb,
+  similarity float,
+  rrf_score float
+)
+LANGUAGE sql
+VOLATILE  -- set_config
+SECURITY INVOKER
+SET search_path = public
+SET hnsw.iterative_scan = relaxed_order
+SET hnsw.ef_search = 40
+AS $$
+  -- Scoped to this call by the function's own SET hnsw.ef_search clause
+  SELECT set_config('hnsw.ef_search', least(greatest(coalesce(ef_search, 40), 1), 1000)::text, true);
+
+  WITH params AS (
+    SELECT
+      nullif(websearch_to_tsquery('english', query_text)::text, '')::tsquery AS all_terms,
+      -- Fallback: OR the query terms together; ts_rank_cd still favors chunks matching more of them
+      nullif(replace(plainto_tsquery('english', query_text)::text, ' & ', ' | '), '')::tsquery AS any_term
+  ),
+  vector_matches AS (
+    SELECT matches.id, row_number() OVER (ORDER BY matches.distance) AS rank
+    FROM match_chunk_candidates(
+      query_embedding, coalesce(candidate_count, match_count * 4),
+      filter_user_id, path_prefix, ann_index, rerank_factor
+    ) AS matches
+  ),
+  -- Lexical leg: chunks matching every term (AND), topped up with chunks matching
+  -- any term (OR) only when AND finds fewer than the candidate count. Each branch
+  -- ranks a bounded pool of GIN matches (10x the candidate count) instead of
+  -- every chunk that shares a common word, so ranking cost stays flat as the
+  -- corpus grows; past the pool, which matches get ranked is arbitrary.
+  all_term_matches AS (
+    SELECT pool.id, ts_rank_cd(pool.content_tsv, params.all_terms) AS score
+    FROM params
+    CROSS JOIN LATERAL (
+      SELECT document_chunks.id, document_chunks.content_tsv
+      FROM document_chunks
+      WHERE document_chunks.content_tsv @@ params.all_terms
+        AND (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+        AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+      LIMIT coalesce(candidate_count, match_count * 4) * 10
+    ) AS pool
+  ),
+  any_term_matches AS (
+    SELECT pool.id, ts_rank_cd(pool.content_tsv, params.any_term) AS score
+    FROM params
+    CROSS JOIN LATERAL (
+      SELECT document_chunks.id, document_chunks.content_tsv
+      FROM document_chunks
+      WHERE (SELECT count(*) FROM all_term_matches) < coalesce(candidate_count, match_count * 4)
+        AND document_chunks.content_tsv @@ params.any_term
+        AND (filter_user_id IS NULL OR document_chunks.user_id = filter_user_id)
+        AND (path_prefix IS NULL OR starts_with(document_chunks.path, path_prefix))
+        AND NOT EXISTS (SELECT 1 FROM all_term_matches WHERE all_term_matches.id = document_chunks.id)
+      LIMIT coalesce(candidate_count, match_count * 4) * 10
+    ) AS pool
+  ),
+  lexical_matches AS (
+    SELECT ranked.id, row_number() OVER (ORDER BY ranked.tier, ranked.score DESC) AS rank
+    FROM (
+      SELECT all_term_matches.id, all_term_matches.score, 0 AS tier FROM all_term_matches
+      UNION ALL
+      SELECT any_term_matches.id, any_term_matches.score, 1 AS tier FROM any_term_matches
+    ) AS ranked
+    ORDER BY rank
+    LIMIT coalesce(candidate_count, match_count * 4)
+  ),
+  fused AS (
+    SELECT
+      coalesce(vector_matches.id, lexical_matches.id) AS id,
+      coalesce(1.0 / (rrf_k + vector_matches.rank), 0.0)
+        + coalesce(1.0 / (rrf_k + lexical_matches.rank), 0.0) AS score
+    FROM vector_matches
+    FULL OUTER JOIN lexical_matches ON lexical_matches.id = vector_matches.id
+    ORDER BY score DESC
+    LIMIT match_count
+  )
+  SELECT
+    document_chunks.id,
+    document_chunks.document_id,
+    document_chunks.path,
+    document_chunks.metadata->>'document_title',
+    CASE
+      WHEN snippet_words IS NOT NULL THEN ts_headline(
+        'english',
+        document_chunks.content,
+        plainto_tsquery('english', query_text),
+        format(
+          'MaxWords=%s, MinWords=%s, ShortWord=3, MaxFragments=1, StartSel="**", StopSel="**"',
+          least(greatest(snippet_words, 5), 100),
+          least(greatest(snippet_words, 5), 100) / 2
+        )
+      )
+      WHEN include_content THEN document_chunks.content
+    END,
+    document_chunks.section_heading,
+    CASE WHEN include_metadata THEN document_chunks.metadata END,
+    1 - (document_chunks.embedding <=> query_embedding) AS similarity,
+    fused.score::float AS rrf_score
+  FROM fused
+  INNER JOIN document_chunks ON document_chunks.id = fused.id
+  ORDER BY fused.score DESC;
+$$;
+
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO authenticated;
+GRANT EXECUTE ON FUNCTION hybrid_search_document_chunks TO anon;
@@ -0,0 +1,97 @@
+-- Per-user corpus version for the search result cache. Every statement that
+-- changes document_chunks bumps the version of each owner it touched, so a
+-- cached result stored under an older version can never be served after a
+-- re-index, a document move or a delete, whichever worker made the change.
+CREATE TABLE corpus_versions (
+  user_id UUID PRIMARY KEY,  -- Nil UUID stands for chunks without an owner (visible to everyone)
+  version BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+ALTER TABLE corpus_versions ENABLE ROW LEVEL SECURITY;
+
+-- Users read their own version and the shared one; only triggers write
+CREATE POLICY "Users can view their corpus version"
+  ON corpus_versions FOR SELECT
+  USING (auth.uid() = user_id OR user_id = '00000000-0000-0000-0000-000000000000');
+
+-- Statement-level so a sync of hundreds of chunks costs one upsert per owner.
+-- Transition tables only exist for the events they were declared on; plpgsql
+-- plans each statement on first use, so the unused branches never touch them.
+--
+-- The upsert row-locks each owner's version until the writing transaction
+-- commits, so chunk writes are serialized per owner: concurrent syncs of one
+-- user's documents queue behind each other. Owners are locked in user_id order
+-- (ORDER BY 1) so two statements touching the same owners can't deadlock; an
+-- UPDATE that moves chunks between owners locks both.
+--
+-- Trade-off: parallel ingestion (RAG_INGESTION_WORKERS) still parses and embeds
+-- one user's documents concurrently, but their sync_document_chunks calls
+-- commit one at a time per owner. Each holds the row only for that RPC's own
+-- transaction, a few statements long, so the store stage seldom waits; a bulk
+-- re-index of a single large account just gets nothing from extra store
+-- workers. Versioning per document instead would avoid the lock but make every
+-- search read one row per document.
+CREATE OR REPLACE FUNCTION bump_corpus_versions()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO corpus_versions AS versions (user_id, version)
+    SELECT DISTINCT coalesce(new_rows.user_id, '00000000-0000-0000-0000-000000000000'::uuid), 1
+    FROM new_rows
+    ORDER BY 1
+    ON CONFLICT (user_id) DO UPDATE
+      SET version = versions.version + 1,
+          updated_at = NOW();
+
+  ELSIF TG_OP = 'UPDATE' THEN
+    INSERT INTO corpus_versions AS versions (user_id, version)
+    -- DISTINCT after coalesce: a NULL owner and the nil UUID are the same row
+    SELECT DISTINCT coalesce(changed.user_id, '00000000-0000-0000-0000-000000000000'::uuid), 1
+    FROM (
+      SELECT new_rows.user_id FROM new_rows
+      UNION ALL
+      SELECT old_rows.user_id FROM old_rows
+    ) AS changed
+    ORDER BY 1
+    ON CONFLICT (user_id) DO UPDATE
+      SET version = versions.version + 1,
+          updated_at = NOW();
+
+  ELSE
+    INSERT INTO corpus_versions AS versions (user_id, version)
+    SELECT DISTINCT coalesce(old_rows.user_id, '00000000-0000-0000-0000-000000000000'::uuid), 1
+    FROM old_rows
+    ORDER BY 1
+    ON CONFLICT (user_id) DO UPDATE
+      SET version = versions.version + 1,
+          updated_at = NOW();
+  END IF;
+
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER bump_corpus_versions_on_insert
+  AFTER INSERT ON document_chunks
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION bump_corpus_versions();
+
+CREATE TRIGGER bump_corpus_versions_on_update
+  AFTER UPDATE ON document_chunks
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION bump_corpus_versions();
+
+CREATE TRIGGER bump_corpus_versions_on_delete
+  AFTER DELETE ON document_chunks
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT
+  EXECUTE FUNCTION bump_corpus_versions();
+
+COMMENT ON TABLE corpus_versions IS 'Per-owner counter bumped whenever that owner''s document_chunks change; keys the search result cache';